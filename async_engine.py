@@ -0,0 +1,243 @@
+"""
+Asyncio Crawl Engine
+"""
+
+import time
+import socket
+import asyncio
+import aiohttp
+from aiohttp.abc import AbstractResolver
+
+from utils import print_colored, looks_binary
+from politeness import get_host
+from http_cache import NOT_MODIFIED, get_validators
+from config import DEFAULT_TIMEOUT, READ_CHUNK_SIZE
+
+
+class CachedResolver(AbstractResolver):
+    """aiohttp resolver backed by a dns_cache.DnsCache; lookups that miss run on the default executor"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        addresses = self.cache.resolve(host, block=False)
+        if addresses is None:
+            addresses = await asyncio.get_running_loop().run_in_executor(None, self.cache.resolve, host)
+        hosts = []
+        for address in addresses:
+            address_family = socket.AF_INET6 if ':' in address else socket.AF_INET
+            if family in (socket.AF_UNSPEC, address_family):
+                hosts.append({'hostname': host, 'host': address, 'port': port, 'family': address_family,
+                              'proto': 0, 'flags': socket.AI_NUMERICHOST})
+        if not hosts:
+            raise OSError(f"No address of {host} in the requested family")
+        return hosts
+
+    async def close(self):
+        pass
+
+
+class AsyncCrawler:
+    """
+    Crawl engine for EmailScraper that runs on a single event loop.
+
+    A fixed number of worker coroutines take URLs from the scraper's
+    frontier, so ``concurrency`` requests stay in flight all the time and
+    per-host politeness is the same as in the threads engine. Depth,
+    same-domain and robots.txt rules are the scraper's own, and results
+    are recorded in the scraper, so ``get_results()`` is unchanged.
+
+    Idle workers sleep until their next host is ready, or until another
+    worker queues links or finishes a URL, instead of polling.
+    """
+
+    def __init__(self, scraper, concurrency=None):
+        self.scraper = scraper
+        self.concurrency = max(1, concurrency or scraper.concurrency)
+        self.parse_slots = None
+        self.work_changed = None  # asyncio.Event set when URLs are queued or finished
+
+    def _trace_config(self):
+        """Report requests and new connections to the scraper's connection counters"""
+        counters = self.scraper.sessions.counters
+        
+        async def on_request_start(session, context, params):
+            counters.add_request()
+        
+        async def on_connection_create_end(session, context, params):
+            counters.add_connection()
+        
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        return trace_config
+
+    async def _fetch(self, session, url, cached=None):
+        """
+        Download a page, returning (body, charset, validators), NOT_MODIFIED
+        when the cached entry is still valid, or None on failure or skip.
+        """
+        scraper = self.scraper
+        headers = scraper._get_headers()
+        if cached is not None:
+            headers.update(cached.conditional_headers())
+        start = time.perf_counter()
+        timed = False
+        try:
+            async with session.get(url, headers=headers, allow_redirects=True) as response:
+                scraper.metrics.observe('request', time.perf_counter() - start)
+                timed = True
+                if scraper._cache_revalidated(url, response.status, cached):
+                    return NOT_MODIFIED
+                response.raise_for_status()
+                
+                content_length = response.content_length
+                if not scraper._check_headers(url, response.headers.get('Content-Type'), content_length):
+                    return None
+                
+                body = await self._read_capped(url, response, content_length)
+                if body is None:
+                    return None
+                return body, response.charset, get_validators(response.headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if not timed:
+                scraper.metrics.observe('request', time.perf_counter() - start)
+            self.scraper._mark_failed(url)
+            return None
+
+    async def _parse(self, url, depth, content, encoding):
+        """Parse a page in the scraper's parse pool, or return None to parse inline"""
+        pool = self.scraper.parse_pool
+        if pool is None:
+            return None
+        
+        want_links, same_domain_url = self.scraper._parse_args(url, depth)
+        start = time.perf_counter()
+        async with self.parse_slots:
+            future = pool.submit(content, encoding, url, want_links, same_domain_url,
+                                 self.scraper.want_anchors, self.scraper.near_dups is not None)
+            parsed = await asyncio.wrap_future(future)
+        self.scraper.metrics.observe('parse', time.perf_counter() - start)
+        return parsed
+
+    async def _read_capped(self, url, response, content_length):
+        """
+        Read a body up to max_page_bytes, returning the bytes or None if binary.
+        
+        aiohttp hands over decompressed bytes only, so bytes saved are only
+        estimated for bodies sent without a Content-Encoding.
+        """
+        scraper = self.scraper
+        if response.headers.get('Content-Encoding', 'identity').lower() != 'identity':
+            content_length = None
+        limit = scraper.max_page_bytes
+        body = bytearray()
+        start = time.perf_counter()
+        
+        while len(body) < limit:
+            chunk = await response.content.read(min(READ_CHUNK_SIZE, limit - len(body)))
+            if not chunk:
+                break
+            if not body and looks_binary(chunk, response.charset):
+                scraper._record_download(len(chunk), time.perf_counter() - start)
+                scraper._record_skip(url, content_length - len(chunk) if content_length else 0,
+                                     'skipped_content_type')
+                return None
+            body += chunk
+        
+        scraper._record_download(len(body), time.perf_counter() - start)
+        if len(body) >= limit and not response.content.at_eof():
+            saved = content_length - len(body) if content_length else 0
+            scraper._record_skip(url, max(0, saved), 'pages_truncated')
+        return bytes(body)
+
+    async def _process_url(self, session, url, depth):
+        """Process a single URL"""
+        scraper = self.scraper
+        
+        # robots.txt may need a blocking download, keep it off the event loop unless it is cached
+        if scraper.respect_robots and scraper.robots_cache.peek(url) is None:
+            allowed = await asyncio.to_thread(scraper._should_process, url, depth)
+        else:
+            allowed = scraper._should_process(url, depth)
+        if not allowed:
+            # Nothing was fetched, so the host's slot is given back
+            scraper.politeness.cancel_fetch(get_host(url))
+            return []
+        
+        cached = scraper._cache_lookup(url, depth)
+        page = await self._fetch(session, url, cached)
+        if page is None:
+            return []
+        if page is NOT_MODIFIED:
+            return scraper._handle_page(url, depth, None, parsed=cached.parsed())
+        
+        content, encoding, validators = page
+        fingerprint = scraper._fingerprint(content)
+        parsed = scraper._unchanged(cached, fingerprint)
+        if parsed is None:
+            parsed = await self._parse(url, depth, content, encoding)
+        return scraper._handle_page(url, depth, content, encoding, parsed, validators, fingerprint)
+
+    async def _worker(self, session):
+        """Take ready URLs from the frontier until the crawl is finished"""
+        frontier = self.scraper.urls_queue
+        while True:
+            # Cleared before polling, so a wakeup between the poll and the wait is not lost
+            self.work_changed.clear()
+            item, wait = frontier.poll()
+            if item is None:
+                if frontier.is_finished():
+                    return
+                if frontier.poll_interval is not None:
+                    # Fed from outside the process (e.g. a broker), so checked every poll_interval
+                    wait = min(wait, frontier.poll_interval) if wait is not None else frontier.poll_interval
+                try:
+                    await asyncio.wait_for(self.work_changed.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            url, depth = item
+            try:
+                self.scraper._enqueue_links(await self._process_url(session, url, depth))
+            except Exception as e:
+                print_colored(f"Error processing URL: {str(e)}", 'red')
+            finally:
+                self.scraper._finish_url(url, depth)
+                frontier.task_done(url)
+                self.scraper._update_progress()
+                self.work_changed.set()
+
+    async def run(self):
+        """Crawl until the frontier is empty and no request is in flight"""
+        if self.scraper.parse_pool is not None:
+            self.parse_slots = asyncio.Semaphore(self.scraper.parse_pool.max_pending)
+        self.work_changed = asyncio.Event()
+        
+        timeout = aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT)
+        dns = self.scraper.dns
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.scraper.sessions.pool_per_host if self.scraper.pool_per_host else 0,
+            # The scraper's cache keeps record TTLs, so aiohttp's own fixed-TTL cache is off
+            resolver=CachedResolver(dns) if dns is not None else None,
+            use_dns_cache=dns is None
+        )
+        
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector,
+                                         trace_configs=[self._trace_config()]) as session:
+            workers = [asyncio.create_task(self._worker(session))
+                       for _ in range(self.concurrency)]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+
+def run_async(scraper, concurrency=None):
+    """Run a scraper's crawl with the asyncio engine"""
+    asyncio.run(AsyncCrawler(scraper, concurrency).run())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+End-to-end crawl benchmark
+
+Starts a synthetic_site.SyntheticSite on local ports and crawls it with
+EmailScraper in every engine and configuration below, with politeness
+delays turned off. Each configuration runs in its own process, so CPU
+time and peak RSS are its own. Reports, as JSON, pages/sec, emails/sec,
+p50/p99 page latency (fetch + parse of one page, as seen by a crawl
+worker), CPU seconds and peak RSS per configuration.
+
+Usage:
+  python benchmarks/bench_crawl.py
+  python benchmarks/bench_crawl.py --pages 2000 --hosts 4 --latency-ms 20 --output baseline.json
+  python benchmarks/bench_crawl.py --configs threads,async --error-rate 0.05
+  python benchmarks/bench_crawl.py --configs threads,threads-no-canonical --url-variants 0.3
+  python benchmarks/bench_crawl.py --configs threads,threads-near-dup --trap-pages 500
+  python benchmarks/bench_crawl.py --configs threads,async --hosts 50 --dns-latency-ms 50 --dns-ttl 0
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_site import add_site_arguments, site_from_args
+from stub_dns import StubDnsServer
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Configuration name -> EmailScraper options (or 'shards' for a distributed crawl)
+CONFIGS = {
+    'threads': {'engine': 'threads'},
+    'threads-per-thread-sessions': {'engine': 'threads', 'session_mode': 'per-thread'},
+    'threads-tokenizer': {'engine': 'threads', 'parser': 'tokenizer'},
+    'threads-bs4': {'engine': 'threads', 'parser': 'bs4'},
+    'threads-fingerprint-seen': {'engine': 'threads', 'seen_store': 'fingerprint'},
+    'threads-bloom-seen': {'engine': 'threads', 'seen_store': 'bloom'},
+    'threads-parse-pool': {'engine': 'threads', 'parse_workers': 2},
+    'threads-no-canonical': {'engine': 'threads', 'canonicalize': False},
+    'threads-near-dup': {'engine': 'threads', 'near_duplicates': True},
+    'async': {'engine': 'async'},
+    'async-parse-pool': {'engine': 'async', 'parse_workers': 2},
+    'distributed-2': {'engine': 'threads', 'shards': 2},
+}
+
+
+def percentile(values, fraction):
+    """Get a percentile of a list of numbers (nearest rank)"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def time_pages(scraper, latencies):
+    """Record the time each crawl worker spends on one page"""
+    if scraper.engine == 'async':
+        import async_engine
+
+        process_url = async_engine.AsyncCrawler._process_url
+
+        async def timed(self, session, url, depth):
+            start = time.perf_counter()
+            try:
+                return await process_url(self, session, url, depth)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+        async_engine.AsyncCrawler._process_url = timed
+    else:
+        process_url = scraper._process_url
+
+        def timed(url, depth):
+            start = time.perf_counter()
+            try:
+                return process_url(url, depth)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+        scraper._process_url = timed
+
+
+def usage():
+    """Get (CPU seconds, peak RSS in MB) of this process and its finished children"""
+    if resource is None:
+        return None, None
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return cpu, max(own.ru_maxrss, children.ru_maxrss) / unit
+
+
+def run_one(name, start_url, options, result_file):
+    """Crawl the site with one configuration and write its measurements"""
+    from scraper import EmailScraper
+    from distributed import Coordinator
+
+    options = dict(options)
+    shards = options.pop('shards', None)
+    latencies = []
+    if shards:
+        broker = os.path.join(tempfile.mkdtemp(), 'bench.broker')
+        scraper = Coordinator(broker, start_url, shards=shards, max_depth=options.pop('max_depth'),
+                              same_domain_only=False, worker_options=options)
+    else:
+        scraper = EmailScraper(start_url, same_domain_only=False, **options)
+        time_pages(scraper, latencies)
+
+    start = time.perf_counter()
+    results = scraper.scrape()
+    elapsed = time.perf_counter() - start
+
+    cpu, peak_rss = usage()
+    stats = results['statistics']
+    measurement = {
+        'config': name,
+        'options': options,
+        'pages': stats['pages_visited'],
+        'pages_failed': stats['pages_failed'],
+        'emails': len(results['emails']),
+        'fetches_saved': stats.get('fetches_saved', 0),
+        'near_duplicates': stats.get('near_duplicates', 0),
+        'pages_pruned': stats.get('pages_pruned', 0),
+        'bytes_pruned': stats.get('bytes_pruned', 0),
+        'dns_lookups': stats.get('dns_lookups', 0),
+        'dns_seconds': stats.get('stage_dns_seconds', 0.0),
+        'seconds': elapsed,
+        'pages_per_sec': stats['pages_visited'] / elapsed if elapsed else 0.0,
+        'emails_per_sec': len(results['emails']) / elapsed if elapsed else 0.0,
+        # Pages are timed inside the crawl workers, which run in other processes when distributed
+        'latency_p50_ms': percentile(latencies, 0.50) * 1000 if latencies else None,
+        'latency_p99_ms': percentile(latencies, 0.99) * 1000 if latencies else None,
+        'cpu_seconds': cpu,
+        'peak_rss_mb': peak_rss
+    }
+    with open(result_file, 'w') as f:
+        json.dump(measurement, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end crawl benchmark')
+    add_site_arguments(parser)
+    parser.add_argument('--configs', default=','.join(CONFIGS),
+                        help=f'Configurations to run (default: all of {",".join(CONFIGS)})')
+    parser.add_argument('--threads', type=int, default=8, help='Crawl threads (default: 8)')
+    parser.add_argument('--concurrency', type=int, default=64,
+                        help='Requests in flight with the async engine (default: 64)')
+    parser.add_argument('--depth', type=int, default=50, help='Maximum crawl depth (default: 50)')
+    parser.add_argument('--dns-latency-ms', type=float, default=None,
+                        help='Link the site\'s hosts by name, resolved by a local stub DNS server '
+                             'answering after this delay (default: off, hosts are linked by address)')
+    parser.add_argument('--dns-ttl', type=int, default=300,
+                        help='TTL of the stub DNS server\'s answers in seconds (default: 300)')
+    parser.add_argument('--output', default=None, help='Also write the JSON report to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show the crawlers\' progress output')
+    # Internal: run one configuration in a child process
+    parser.add_argument('--run-one', nargs=4, metavar=('NAME', 'URL', 'OPTIONS', 'RESULT_FILE'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        name, start_url, options, result_file = args.run_one
+        run_one(name, start_url, json.loads(options), result_file)
+        return
+
+    names = [name.strip() for name in args.configs.split(',') if name.strip()]
+    unknown = [name for name in names if name not in CONFIGS]
+    if unknown:
+        parser.error(f"unknown configurations: {', '.join(unknown)}")
+
+    site = site_from_args(args)
+    dns = None
+    if args.dns_latency_ms is not None:
+        site.domain = 'site.test'
+        dns = StubDnsServer(site.host_names(), ttl=args.dns_ttl, latency=args.dns_latency_ms / 1000)
+        dns.start()
+    start_url = site.start()
+    expected = len(site.expected_emails())
+    print(f"Synthetic site: {site.pages} pages on {site.hosts} hosts, {expected} emails, "
+          f"latency {args.latency_ms:g} ms, error rate {args.error_rate:g}", file=sys.stderr)
+
+    report = {'site': site.settings(), 'expected_emails': expected, 'results': []}
+    try:
+        for name in names:
+            options = {
+                'max_depth': args.depth,
+                'max_threads': args.threads,
+                'concurrency': args.concurrency,
+                'delay_range': (0, 0),
+                **CONFIGS[name]
+            }
+            if dns is not None:
+                options.update(dns_cache=True, dns_servers=[dns.server])
+                dns.queries.clear()
+            with tempfile.TemporaryDirectory() as directory:
+                result_file = os.path.join(directory, 'result.json')
+                subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--run-one', name, start_url,
+                     json.dumps(options), result_file],
+                    # The report is the only output on stdout
+                    stdout=sys.stderr if args.verbose else subprocess.DEVNULL,
+                    stderr=None if args.verbose else subprocess.DEVNULL, check=True
+                )
+                with open(result_file) as f:
+                    measurement = json.load(f)
+
+            measurement['complete'] = measurement['emails'] == expected
+            if dns is not None:
+                measurement['dns_queries'] = sum(dns.queries.values())
+            report['results'].append(measurement)
+            latency = (f"p50 {measurement['latency_p50_ms']:.1f} ms, p99 {measurement['latency_p99_ms']:.1f} ms"
+                       if measurement['latency_p50_ms'] is not None else 'latency n/a')
+            print(f"{name:30s} {measurement['pages_per_sec']:8.1f} pages/sec  {latency}  "
+                  f"cpu {measurement['cpu_seconds'] or 0:.2f}s  rss {measurement['peak_rss_mb'] or 0:.0f} MB"
+                  f"{'  %d fetches saved' % measurement['fetches_saved'] if measurement['fetches_saved'] else ''}"
+                  f"{'  dns %.2fs, %d queries' % (measurement['dns_seconds'], measurement['dns_queries']) if dns else ''}"
+                  f"{'' if measurement['complete'] else '  (INCOMPLETE)'}", file=sys.stderr)
+    finally:
+        site.stop()
+        if dns is not None:
+            dns.stop()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Email extraction micro-benchmark
+
+Builds a deterministic golden corpus of HTML pages, checks that
+extractor.find_emails returns exactly what utils.extract_emails returns
+for every page, then reports throughput of both in MB/s.
+
+Usage:
+  python benchmarks/bench_extract.py
+  python benchmarks/bench_extract.py --pages 500 --page-size 200000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import extract_emails
+from extractor import find_emails
+
+# Hand-picked cases around the edges of the email regex
+TRICKY_SNIPPETS = [
+    'contact: info@example.com.',
+    'mailto:Sales.Team+eu@Example.co.uk?subject=hi',
+    'first@a.com,second@b.org;third@c.net',
+    'foo@bar.com@baz.org',
+    'a@b@c.com',
+    '_under@score.com',
+    'x@y.c',
+    'pipe@tld.c|m',
+    'name@host.comé',
+    'ſpecial@example.com',
+    'Kelvin@example.com',
+    'user@exa_mple.com',
+    'café@example.com',
+    'éuser@example.com',
+    '日本@example.jp',
+    'trail@example.com日',
+    '@@double@@at.com',
+    '<a href="mailto:team@example.org">team@example.org</a>',
+    'very.long.local.part.with.dots.and-dashes_and_underscores%percent+plus@sub.domain.example.museum',
+]
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+         'tempor incididunt ut labore et dolore magna aliqua café naïve '
+         '日本語').split()
+
+
+def build_page(rng, page_size, email_density):
+    """Build one synthetic HTML page of roughly page_size characters"""
+    parts = ['<html><head><title>Page</title></head><body>']
+    size = 0
+    while size < page_size:
+        roll = rng.random()
+        if roll < email_density:
+            part = rng.choice(TRICKY_SNIPPETS)
+        elif roll < email_density * 2:
+            user = ''.join(rng.choice('abcdefghij.') for _ in range(rng.randint(1, 12)))
+            part = f'{user}@{rng.choice(WORDS)}.{rng.choice(["com", "org", "io"])}'
+        elif roll < 0.15:
+            part = f'<a href="/page/{rng.randint(0, 10000)}">{rng.choice(WORDS)}</a>'
+        else:
+            part = rng.choice(WORDS)
+        parts.append(part)
+        size += len(part) + 1
+    parts.append('</body></html>')
+    return ' '.join(parts)
+
+
+def build_corpus(pages, page_size, email_density, seed=1234):
+    """Build the golden corpus as a list of str pages"""
+    rng = random.Random(seed)
+    corpus = [build_page(rng, page_size, email_density) for _ in range(pages)]
+    corpus.extend(TRICKY_SNIPPETS)
+    return corpus
+
+
+def check_corpus(corpus):
+    """Return the pages where the new engine disagrees with the current one"""
+    mismatches = []
+    for index, page in enumerate(corpus):
+        expected = extract_emails(page)
+        for encoding in ('utf-8', 'utf-16'):
+            if find_emails(page.encode(encoding)) != expected:
+                mismatches.append((index, encoding))
+        if find_emails(page) != expected:
+            mismatches.append((index, 'str'))
+    return mismatches
+
+
+def measure(func, inputs, total_bytes, repeat):
+    """Return the best throughput of func over inputs in MB/s"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data in inputs:
+            func(data)
+        best = min(best, time.perf_counter() - start)
+    return total_bytes / best / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Email extraction micro-benchmark')
+    parser.add_argument('--pages', type=int, default=200, help='Pages in the corpus (default: 200)')
+    parser.add_argument('--page-size', type=int, default=50000, help='Characters per page (default: 50000)')
+    parser.add_argument('--email-density', type=float, default=0.002,
+                        help='Share of tokens that are emails (default: 0.002)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions (default: 3)')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.pages, args.page_size, args.email_density)
+    encoded = [page.encode('utf-8') for page in corpus]
+    total_bytes = sum(len(data) for data in encoded)
+
+    mismatches = check_corpus(corpus)
+    if mismatches:
+        print(f"FAIL: {len(mismatches)} pages differ from utils.extract_emails: {mismatches[:10]}")
+        sys.exit(1)
+    print(f"Golden corpus: {len(corpus)} pages, {total_bytes / 1e6:.1f} MB, results identical")
+
+    current = measure(lambda data: extract_emails(data.decode('utf-8')), encoded, total_bytes, args.repeat)
+    fast_bytes = measure(find_emails, encoded, total_bytes, args.repeat)
+    fast_text = measure(find_emails, corpus, total_bytes, args.repeat)
+
+    print(f"utils.extract_emails (decode + regex): {current:8.1f} MB/s")
+    print(f"extractor.find_emails (bytes):         {fast_bytes:8.1f} MB/s  ({fast_bytes / current:.1f}x)")
+    print(f"extractor.find_emails (str):           {fast_text:8.1f} MB/s  ({fast_text / current:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Link filter benchmark
+
+Compares the original per-link path (normalize_url, should_skip_url looping
+over SKIP_EXTENSIONS with endswith, is_same_domain parsing both URLs) with
+url_filter.UrlFilter, on hrefs as they come out of extract_page: relative
+and absolute, same-site and external, pages and files. Kept links of both
+paths are checked against each other first. Also reports the cost of the
+include/exclude regexes and domain lists.
+
+Usage:
+  python benchmarks/bench_filter.py
+  python benchmarks/bench_filter.py --links 200000 --patterns 50
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SKIP_EXTENSIONS
+from utils import normalize_url
+from url_filter import UrlFilter
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+         'tempor incididunt ut labore et dolore magna aliqua').split()
+HOSTS = ('example.com', 'www.example.com', 'cdn.example.com', 'twitter.com', 'facebook.com', 'other.org')
+FILES = ('.pdf', '.jpg', '.png', '.zip', '.docx', '.mp4')
+
+
+def build_hrefs(rng, count):
+    """Build raw hrefs: mostly site pages, some external links, files and non-http links"""
+    hrefs = []
+    for _ in range(count):
+        path = '/'.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+        kind = rng.random()
+        if kind < 0.45:
+            hrefs.append(f'/{path}?page={rng.randint(1, 9)}')
+        elif kind < 0.6:
+            hrefs.append(f'{path}/{rng.randint(0, 5000)}')
+        elif kind < 0.8:
+            hrefs.append(f'https://{rng.choice(HOSTS)}/{path}')
+        elif kind < 0.95:
+            hrefs.append(f'/{path}{rng.choice(FILES)}')
+        else:
+            hrefs.append(rng.choice(('mailto:info@example.com', 'javascript:void(0)', '#top')))
+    return hrefs
+
+
+def original_filter(hrefs, base_url, current_url, same_domain_url):
+    """The per-link work the scraper did before UrlFilter"""
+    links = set()
+    for href in hrefs:
+        url = normalize_url(href, base_url, current_url)
+        if not url:
+            continue
+        path = urllib.parse.urlparse(url).path.lower()
+        if any(path.endswith(ext) for ext in SKIP_EXTENSIONS):
+            continue
+        if (urllib.parse.urlparse(url).netloc.lower() ==
+                urllib.parse.urlparse(same_domain_url).netloc.lower()):
+            links.add(url)
+    return links
+
+
+def measure(func, pages, repeat):
+    """Best links/sec over `repeat` runs of func on every page of hrefs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for hrefs in pages:
+            func(hrefs)
+        best = min(best, time.perf_counter() - start)
+    return sum(len(hrefs) for hrefs in pages) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Link filter benchmark')
+    parser.add_argument('--links', type=int, default=100000, help='Hrefs to filter (default: 100000)')
+    parser.add_argument('--per-page', type=int, default=150, help='Hrefs per page (default: 150)')
+    parser.add_argument('--patterns', type=int, default=20,
+                        help='Exclude regexes in the pattern measurement (default: 20)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions (default: 3)')
+    args = parser.parse_args()
+
+    rng = random.Random(1234)
+    pages = [build_hrefs(rng, args.per_page) for _ in range(max(1, args.links // args.per_page))]
+    base_url, current_url = 'https://example.com', 'https://example.com/docs/index.html'
+    print(f"{sum(len(hrefs) for hrefs in pages)} hrefs in {len(pages)} pages")
+
+    url_filter = UrlFilter()
+    for hrefs in pages[:20]:
+        expected = original_filter(hrefs, base_url, current_url, base_url)
+        if set(url_filter.filter(hrefs, base_url, current_url, base_url).values()) != expected:
+            print("FAIL: UrlFilter disagrees with the original path")
+            sys.exit(1)
+
+    baseline = measure(lambda hrefs: original_filter(hrefs, base_url, current_url, base_url),
+                       pages, args.repeat)
+    print(f"{'original (3 urlparse + loop)':34s} {baseline:10.0f} links/sec")
+
+    rejected = {}
+    runs = [
+        ('UrlFilter', url_filter),
+        (f'UrlFilter + {args.patterns} exclude regexes',
+         UrlFilter(exclude=[f'/{word}/{index}' for index in range(args.patterns // len(WORDS) + 1)
+                            for word in WORDS][:args.patterns])),
+        ('UrlFilter + domain lists',
+         UrlFilter(allow_domains=['example.com'], deny_domains=['cdn.example.com'])),
+    ]
+    for name, candidate in runs:
+        rate = measure(lambda hrefs: candidate.filter(hrefs, base_url, current_url, base_url, rejected),
+                       pages, args.repeat)
+        print(f"{name:34s} {rate:10.0f} links/sec  ({rate / baseline:.1f}x)")
+
+    # Without the same-domain filter, so the domain lists get to see external links
+    rejected = {}
+    url_filter = runs[2][1]
+    for hrefs in pages:
+        url_filter.filter(hrefs, base_url, current_url, None, rejected)
+    print("Rejected with domain lists: " + ', '.join(f"{count} {name}" for name, count in sorted(rejected.items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Page processing benchmark
+
+Compares the original per-page path (decode, utils.extract_emails over the
+text, then a BeautifulSoup tree for hrefs) with extractor.extract_page on
+each parser backend. Runs on one core and reports pages/sec; link sets
+of every backend are checked against the original path first. With
+--workers, also reports pages/sec of a ParsePool of 1..N processes.
+
+Usage:
+  python benchmarks/bench_parse.py
+  python benchmarks/bench_parse.py --pages 300 --links 200
+  python benchmarks/bench_parse.py --workers 8
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from utils import extract_emails
+from extractor import extract_page, PARSER_BACKENDS
+from parse_pool import ParsePool
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+         'tempor incididunt ut labore et dolore magna aliqua').split()
+
+
+def build_page(rng, links, paragraphs):
+    """Build one synthetic HTML page with navigation, text, scripts and emails"""
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>Synthetic</title>',
+             '<link rel="stylesheet" href="/static/site.css">',
+             '<script>var menu = "<a href=/not-a-link>"; function f(a, b) { return a < b; }</script>',
+             '<style>a > span { color: red; }</style></head><body><nav><ul>']
+    for _ in range(links):
+        parts.append(f'<li><a class="nav" href="/section/{rng.randint(0, 5000)}?page={rng.randint(1, 9)}&amp;sort=asc">'
+                     f'{rng.choice(WORDS)}</a></li>')
+    parts.append('</ul></nav><main>')
+    for index in range(paragraphs):
+        words = ' '.join(rng.choice(WORDS) for _ in range(80))
+        parts.append(f'<p>{words}</p>')
+        if index % 10 == 0:
+            user = rng.choice(WORDS)
+            parts.append(f'<p>Contact <a href="mailto:{user}%40example.com">{user} at example dot com</a> '
+                         f'or write to {user}.{index}@example.org</p>')
+    parts.append('<!-- <a href="/commented-out">old</a> --></main><footer>info@example.com</footer></body></html>')
+    return ''.join(parts).encode('utf-8')
+
+
+def original_path(content):
+    """The per-page work the scraper did before extract_page"""
+    text = content.decode('utf-8')
+    emails = extract_emails(text)
+    soup = BeautifulSoup(text, 'html.parser')
+    hrefs = [tag.get('href') for tag in soup.find_all(['a', 'link']) if tag.get('href')]
+    return emails, hrefs
+
+
+def measure(func, pages, repeat):
+    """Return the best pages/sec of func over pages"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            func(page)
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best
+
+
+def measure_pool(workers, backend, pages, repeat):
+    """Return the best pages/sec of a ParsePool with the given number of processes"""
+    pool = ParsePool(workers, backend)
+    try:
+        # Warm up the worker processes
+        for page in pages[:workers]:
+            pool.parse(page, 'utf-8', 'https://example.com/', True)
+
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            futures = [pool.submit(page, 'utf-8', 'https://example.com/', True) for page in pages]
+            for future in futures:
+                future.result()
+            best = min(best, time.perf_counter() - start)
+        return len(pages) / best
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Page processing benchmark')
+    parser.add_argument('--pages', type=int, default=100, help='Pages to process (default: 100)')
+    parser.add_argument('--links', type=int, default=150, help='Links per page (default: 150)')
+    parser.add_argument('--paragraphs', type=int, default=60, help='Paragraphs per page (default: 60)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions (default: 3)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Also measure a ParsePool with 1..N processes (default: 0, off)')
+    parser.add_argument('--backend', choices=list(PARSER_BACKENDS), default='lxml',
+                        help='Backend used by the ParsePool measurement (default: lxml)')
+    args = parser.parse_args()
+
+    rng = random.Random(1234)
+    pages = [build_page(rng, args.links, args.paragraphs) for _ in range(args.pages)]
+    size = sum(len(page) for page in pages) / len(pages)
+    print(f"{len(pages)} pages, {size / 1024:.0f} KB each, {args.links} links per page")
+
+    for backend in PARSER_BACKENDS:
+        for page in pages[:10]:
+            emails, hrefs = original_path(page)
+            new_emails, new_hrefs = extract_page(page, 'utf-8', backend)
+            if hrefs != new_hrefs or new_emails[:len(emails)] != emails:
+                print(f"FAIL: backend '{backend}' disagrees with the original path")
+                sys.exit(1)
+
+    baseline = measure(original_path, pages, args.repeat)
+    print(f"{'original (bs4 tree + regex)':30s} {baseline:8.1f} pages/sec")
+    for backend in PARSER_BACKENDS:
+        rate = measure(lambda page: extract_page(page, 'utf-8', backend), pages, args.repeat)
+        print(f"{'extract_page ' + backend:30s} {rate:8.1f} pages/sec  ({rate / baseline:.1f}x)")
+
+    if args.workers:
+        print(f"\nParsePool ({args.backend}, {os.cpu_count()} CPUs available)")
+        single = None
+        for workers in range(1, args.workers + 1):
+            rate = measure_pool(workers, args.backend, pages, args.repeat)
+            single = single or rate
+            print(f"{workers:3d} workers {rate:10.1f} pages/sec  ({rate / single:.2f}x of 1 worker)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Stub DNS server for crawl benchmarks
+
+Answers A queries over UDP on 127.0.0.1 from a fixed table of names, with
+a configurable TTL and response latency. Aliases are answered with a
+CNAME and the target's address (the CNAME can have a TTL of its own); every other name gets NXDOMAIN with an
+SOA record carrying the negative TTL, and AAAA queries for known names
+get an empty answer. Queries are counted per name, so a benchmark can
+tell how many lookups reached the server.
+
+Used by bench_crawl.py (--dns-latency-ms); can also be run on its own and
+given to the scraper with --dns-server.
+
+Usage:
+  python benchmarks/stub_dns.py --record www.example.test=127.0.0.1 --port 5353
+  python benchmarks/stub_dns.py --record a.test=127.0.0.1 --alias b.test=a.test --ttl 5 --latency-ms 50
+"""
+
+import time
+import struct
+import socket
+import argparse
+import threading
+from collections import Counter
+
+TYPE_A = 1
+TYPE_CNAME = 5
+TYPE_SOA = 6
+
+
+def encode_name(name):
+    """Encode a name as uncompressed DNS labels"""
+    return b''.join(bytes([len(label)]) + label.encode('ascii')
+                    for label in name.rstrip('.').split('.') if label) + b'\x00'
+
+
+def record(owner, rtype, ttl, rdata):
+    """Encode one resource record (class IN)"""
+    return owner + struct.pack('!HHIH', rtype, 1, ttl, len(rdata)) + rdata
+
+
+class StubDnsServer:
+    """A UDP DNS server answering from a table of {name: IPv4 address}"""
+
+    def __init__(self, records=None, aliases=None, ttl=300, negative_ttl=60, latency=0.0, cname_ttl=None):
+        self.records = {name.lower().rstrip('.'): address for name, address in (records or {}).items()}
+        self.aliases = {name.lower().rstrip('.'): target.lower().rstrip('.')
+                        for name, target in (aliases or {}).items()}
+        self.ttl = ttl
+        self.cname_ttl = ttl if cname_ttl is None else cname_ttl
+        self.negative_ttl = negative_ttl
+        self.latency = latency
+
+        self.queries = Counter()  # name -> queries received
+        self._lock = threading.Lock()
+        self._sock = None
+        self._running = False
+
+    @property
+    def address(self):
+        """Get the (host, port) the server listens on"""
+        return self._sock.getsockname()
+
+    @property
+    def server(self):
+        """Get the server as a --dns-server value"""
+        host, port = self.address
+        return f"{host}:{port}"
+
+    def answer(self, query):
+        """Build the response to a query packet, or None if it cannot be parsed"""
+        try:
+            query_id, flags = struct.unpack_from('!HH', query)
+            labels = []
+            offset = 12
+            while query[offset]:
+                labels.append(query[offset + 1:offset + 1 + query[offset]].decode('ascii'))
+                offset += 1 + query[offset]
+            qtype = struct.unpack_from('!H', query, offset + 1)[0]
+            question = query[12:offset + 5]
+        except (IndexError, struct.error, UnicodeDecodeError):
+            return None
+        name = '.'.join(labels).lower()
+        with self._lock:
+            self.queries[name] += 1
+
+        answers = []
+        target, owner = name, b'\xc0\x0c'  # a pointer to the question's name
+        if target in self.aliases:
+            target = self.aliases[target]
+            answers.append(record(owner, TYPE_CNAME, self.cname_ttl, encode_name(target)))
+            owner = encode_name(target)
+        address = self.records.get(target)
+        if address is not None and qtype == TYPE_A:
+            answers.append(record(owner, TYPE_A, self.ttl, socket.inet_aton(address)))
+
+        authority = []
+        rcode = 0 if address is not None else 3  # NXDOMAIN
+        if not answers or address is None:
+            soa = (encode_name('ns.stub') + encode_name('hostmaster.stub') +
+                   struct.pack('!IIIII', 1, 3600, 600, 86400, self.negative_ttl))
+            authority.append(record(b'\x00', TYPE_SOA, self.negative_ttl, soa))
+        header = struct.pack('!HHHHHH', query_id, 0x8180 | (flags & 0x0100) | rcode, 1,
+                             len(answers), len(authority), 0)
+        return header + question + b''.join(answers) + b''.join(authority)
+
+    def _reply(self, query, client):
+        if self.latency:
+            time.sleep(self.latency)
+        response = self.answer(query)
+        if response is not None:
+            try:
+                self._sock.sendto(response, client)
+            except OSError:
+                pass
+
+    def _serve(self):
+        while self._running:
+            try:
+                query, client = self._sock.recvfrom(512)
+            except OSError:
+                return
+            # One thread per query, so latency delays queries in parallel, like a real resolver
+            threading.Thread(target=self._reply, args=(query, client), daemon=True).start()
+
+    def start(self, port=0):
+        """Start serving on 127.0.0.1; port 0 picks a free port"""
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(('127.0.0.1', port))
+        self._running = True
+        threading.Thread(target=self._serve, daemon=True).start()
+        return self.server
+
+    def stop(self):
+        self._running = False
+        if self._sock is not None:
+            self._sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub DNS server for crawl benchmarks')
+    parser.add_argument('--record', metavar='NAME=ADDRESS', action='append', default=[],
+                        help='Answer NAME with an IPv4 ADDRESS; can be repeated')
+    parser.add_argument('--alias', metavar='NAME=TARGET', action='append', default=[],
+                        help='Answer NAME with a CNAME to TARGET; can be repeated')
+    parser.add_argument('--ttl', type=int, default=300, help='TTL of answers in seconds (default: 300)')
+    parser.add_argument('--negative-ttl', type=int, default=60,
+                        help='TTL of NXDOMAIN answers in seconds (default: 60)')
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help='Delay before each response in milliseconds (default: 0)')
+    parser.add_argument('--port', type=int, default=5353, help='UDP port (default: 5353)')
+    args = parser.parse_args()
+
+    server = StubDnsServer(dict(entry.split('=', 1) for entry in args.record),
+                           dict(entry.split('=', 1) for entry in args.alias),
+                           ttl=args.ttl, negative_ttl=args.negative_ttl, latency=args.latency_ms / 1000)
+    print(f"Serving {len(server.records)} names on {server.start(args.port)} (use --dns-server {server.server})")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print('\n'.join(f"{count:6d} {name}" for name, count in server.queries.most_common()))
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
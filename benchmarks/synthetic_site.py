@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Synthetic website server for crawl benchmarks
+
+Serves a deterministic generated site graph from one or more local HTTP
+servers (one per simulated host, on 127.0.0.1 with different ports).
+Page N links to page N+1, so every page is reachable, and to
+``fanout - 1`` other pages picked by a seeded RNG, spread over all
+hosts. Page size, emails per page, response latency, the share of
+pages answered with HTTP 500 and the share of links written in another
+spelling of the same URL (trailing slash, tracking or session
+parameters) are configurable; the same settings always produce the
+same site. With ``trap_pages``, every page also links to one of that
+many calendar pages that differ only in their month number and link to
+each other: a crawler trap for near-duplicate detection. With ``domain``,
+hosts are linked by name (host0.DOMAIN, ...) instead of by address, for
+crawls that resolve them through a stub DNS server (see stub_dns.py).
+
+Used by bench_crawl.py; can also be run on its own to crawl by hand.
+
+Usage:
+  python benchmarks/synthetic_site.py --pages 1000 --port 8000
+  python benchmarks/synthetic_site.py --hosts 4 --latency-ms 20 --error-rate 0.02
+  python benchmarks/synthetic_site.py --url-variants 0.3
+  python benchmarks/synthetic_site.py --trap-pages 500
+"""
+
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+         'tempor incididunt ut labore et dolore magna aliqua').split()
+
+# Found on every page, so the crawler's email dedup is exercised too
+SHARED_EMAIL = 'contact@example.com'
+
+# Other spellings of a page URL, served as the same page
+URL_VARIANTS = ('{url}/', '{url}?utm_source=nav&utm_medium=link', '{url}?sessionid={token}',
+                '{url}/?utm_campaign=site')
+
+
+class QuietServer(ThreadingHTTPServer):
+    """Threaded server that ignores clients closing kept-alive connections"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class SyntheticSite:
+    """A generated site graph served by local HTTP servers"""
+
+    def __init__(self, pages=500, fanout=10, page_size=20000, emails_per_page=2.0,
+                 latency=0.0, error_rate=0.0, hosts=1, url_variants=0.0, trap_pages=0, seed=1234,
+                 domain=None):
+        self.pages = max(1, pages)
+        self.fanout = max(1, fanout)
+        self.page_size = page_size
+        self.emails_per_page = emails_per_page
+        self.latency = latency
+        self.error_rate = error_rate
+        self.hosts = max(1, hosts)
+        self.url_variants = url_variants
+        self.trap_pages = trap_pages
+        self.seed = seed
+        self.domain = domain
+
+        self.servers = []
+        self.base_urls = []
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._cache = {}  # page -> (status, body)
+        self._calendar_text = None
+
+    def settings(self):
+        """Get the site parameters, for benchmark reports"""
+        return {
+            'pages': self.pages,
+            'fanout': self.fanout,
+            'page_size': self.page_size,
+            'emails_per_page': self.emails_per_page,
+            'latency': self.latency,
+            'error_rate': self.error_rate,
+            'hosts': self.hosts,
+            'url_variants': self.url_variants,
+            'trap_pages': self.trap_pages,
+            'seed': self.seed,
+            'domain': self.domain
+        }
+
+    def host_names(self):
+        """Get {host name: address} of every host, for a DNS server (empty without a domain)"""
+        if not self.domain:
+            return {}
+        return {f"host{index}.{self.domain}": '127.0.0.1' for index in range(self.hosts)}
+
+    @property
+    def start_url(self):
+        return self.page_url(0)
+
+    def page_url(self, page):
+        """Get the absolute URL of a page, on the host that serves it"""
+        return f"{self.base_urls[page % self.hosts]}/page/{page}"
+
+    def calendar_url(self, month):
+        """Get the absolute URL of a calendar (trap) page"""
+        return f"{self.base_urls[month % self.hosts]}/calendar/{month}"
+
+    def _rng(self, page):
+        return random.Random(self.seed * 1000003 + page)
+
+    def is_error(self, page):
+        """Check if a page is answered with HTTP 500"""
+        return self._rng(page).random() < self.error_rate
+
+    def page_emails(self, page):
+        """Get the emails written on a page"""
+        rng = self._rng(page)
+        rng.random()  # the error draw
+        count = int(self.emails_per_page)
+        if rng.random() < self.emails_per_page - count:
+            count += 1
+        return [f'user{page}.{index}@example.com' for index in range(count)] + [SHARED_EMAIL]
+
+    def page_links(self, page):
+        """Get the pages a page links to"""
+        rng = self._rng(page)
+        rng.random()
+        rng.random()
+        links = [(page + 1) % self.pages]
+        links.extend(rng.randrange(self.pages) for _ in range(self.fanout - 1))
+        return links
+
+    def link_urls(self, page):
+        """Get the URLs written in a page's links, some in another spelling when url_variants is set"""
+        urls = [self.page_url(link) for link in self.page_links(page)]
+        if self.url_variants:
+            rng = random.Random(f"{self.seed}-variants-{page}")
+            for index, url in enumerate(urls):
+                if rng.random() < self.url_variants:
+                    urls[index] = rng.choice(URL_VARIANTS).format(url=url, token=rng.randrange(10 ** 6))
+        return urls
+
+    def expected_emails(self):
+        """Get every email on the pages that are not answered with an error"""
+        emails = set()
+        for page in range(self.pages):
+            if not self.is_error(page):
+                emails.update(self.page_emails(page))
+        return emails
+
+    def render(self, page):
+        """Get the (status, body) of a page"""
+        cached = self._cache.get(page)
+        if cached is not None:
+            return cached
+
+        if self.is_error(page):
+            result = (500, b'<html><body>Internal Server Error</body></html>')
+        else:
+            rng = self._rng(page)
+            parts = [f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Page {page}</title>'
+                     f'</head><body><nav>']
+            parts.extend(f'<a href="{url}">page {link}</a> '
+                         for url, link in zip(self.link_urls(page), self.page_links(page)))
+            if self.trap_pages:
+                parts.append(f'<a href="{self.calendar_url(page % self.trap_pages)}">calendar</a>')
+            parts.append('</nav><main>')
+            emails = self.page_emails(page)
+            size = sum(len(part) for part in parts)
+            paragraph = 0
+            while size < self.page_size or paragraph < len(emails):
+                words = ' '.join(rng.choice(WORDS) for _ in range(60))
+                if paragraph < len(emails):
+                    words += f' write to {emails[paragraph]} for details'
+                part = f'<p>{words}</p>'
+                parts.append(part)
+                size += len(part)
+                paragraph += 1
+            parts.append('</main></body></html>')
+            result = (200, ''.join(parts).encode('utf-8'))
+
+        with self._lock:
+            self._cache[page] = result
+        return result
+
+    def render_calendar(self, month):
+        """Get the body of a calendar page: the same text on every month, linking to the next two"""
+        if self._calendar_text is None:
+            rng = random.Random(f"{self.seed}-calendar")
+            self._calendar_text = ''.join(f"<p>{' '.join(rng.choice(WORDS) for _ in range(60))}</p>"
+                                          for _ in range(5))
+        links = ' '.join(f'<a href="{self.calendar_url(later)}">month {later}</a>'
+                         for later in (month + 1, month + 2) if later < self.trap_pages)
+        return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Calendar {month}</title></head>'
+                f'<body><h1>Events in month {month}</h1>{self._calendar_text}<nav>{links}</nav>'
+                f'</body></html>').encode('utf-8')
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                if site.latency:
+                    time.sleep(site.latency)
+
+                # Query strings and trailing slashes do not change the page
+                path = urlsplit(self.path).path.rstrip('/')
+                if path == '/robots.txt':
+                    status, body, content_type = 200, b'User-agent: *\nAllow: /\n', 'text/plain'
+                elif path.startswith('/page/') and path[6:].isdigit() and int(path[6:]) < site.pages:
+                    status, body = site.render(int(path[6:]))
+                    content_type = 'text/html; charset=utf-8'
+                elif path.startswith('/calendar/') and path[10:].isdigit() and int(path[10:]) < site.trap_pages:
+                    status, body = 200, site.render_calendar(int(path[10:]))
+                    content_type = 'text/html; charset=utf-8'
+                else:
+                    status, body, content_type = 404, b'Not Found', 'text/plain'
+
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self, port=0):
+        """Start one server per host; `port` is the first host's port (0 picks free ports)"""
+        handler = self._handler()
+        for index in range(self.hosts):
+            server = QuietServer(('127.0.0.1', port + index if port else 0), handler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.servers.append(server)
+            host = f"host{index}.{self.domain}" if self.domain else '127.0.0.1'
+            self.base_urls.append(f"http://{host}:{server.server_address[1]}")
+        return self.start_url
+
+    def stop(self):
+        """Shut every server down"""
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.servers = []
+
+
+def add_site_arguments(parser):
+    """Add the site parameters to an argument parser"""
+    parser.add_argument('--pages', type=int, default=500, help='Pages in the site (default: 500)')
+    parser.add_argument('--fanout', type=int, default=10, help='Links per page (default: 10)')
+    parser.add_argument('--page-size', type=int, default=20000, help='Bytes per page (default: 20000)')
+    parser.add_argument('--emails-per-page', type=float, default=2.0,
+                        help='Average unique emails per page (default: 2.0)')
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help='Delay before each response in milliseconds (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Share of pages answered with HTTP 500 (default: 0)')
+    parser.add_argument('--hosts', type=int, default=1,
+                        help='Simulated hosts, one local server each (default: 1)')
+    parser.add_argument('--url-variants', type=float, default=0.0,
+                        help='Share of links written in another spelling of the same URL (default: 0)')
+    parser.add_argument('--trap-pages', type=int, default=0,
+                        help='Near-identical calendar pages linked from the site, a crawler trap (default: 0)')
+    parser.add_argument('--seed', type=int, default=1234, help='Site generator seed (default: 1234)')
+
+
+def site_from_args(args):
+    """Create a SyntheticSite from parsed site arguments"""
+    return SyntheticSite(pages=args.pages, fanout=args.fanout, page_size=args.page_size,
+                         emails_per_page=args.emails_per_page, latency=args.latency_ms / 1000,
+                         error_rate=args.error_rate, hosts=args.hosts, url_variants=args.url_variants,
+                         trap_pages=args.trap_pages, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic website server for crawl benchmarks')
+    add_site_arguments(parser)
+    parser.add_argument('--port', type=int, default=8000,
+                        help='Port of the first host; further hosts use the next ports (default: 8000)')
+    args = parser.parse_args()
+
+    site = site_from_args(args)
+    start_url = site.start(args.port)
+    print(f"Serving {site.pages} pages on {', '.join(site.base_urls)}")
+    print(f"Start URL: {start_url} ({len(site.expected_emails())} emails on reachable pages)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == '__main__':
+    main()
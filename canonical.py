@@ -0,0 +1,188 @@
+"""
+URL Canonicalization Module
+"""
+
+import re
+from urllib.parse import urlsplit, urlunsplit, unquote
+
+from config import CANONICAL_IGNORE_PARAMS, CANONICAL_SESSION_PARAMS, CANONICAL_PATH_PARAMS
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_ESCAPE = re.compile(r'%([0-9A-Fa-f]{2})')
+_UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+
+
+def _escape(match):
+    """Decode escaped unreserved characters and upper-case the other escapes"""
+    char = chr(int(match.group(1), 16))
+    return char if char in _UNRESERVED else '%' + match.group(1).upper()
+
+
+def _compile_names(patterns):
+    """Compile parameter names ('*' matches any ending) into one case-insensitive regex"""
+    names = [re.escape(pattern[:-1]) + '.*' if pattern.endswith('*') else re.escape(pattern)
+             for pattern in patterns]
+    return re.compile(f"(?:{'|'.join(names)})$", re.IGNORECASE) if names else None
+
+
+def remove_dot_segments(path):
+    """Resolve '.' and '..' path segments (RFC 3986, section 5.2.4)"""
+    if '/.' not in path:
+        return path
+    output = []
+    for segment in path.split('/'):
+        if segment == '..':
+            if len(output) > 1:
+                output.pop()
+        elif segment != '.':
+            output.append(segment)
+    if path.endswith(('/.', '/..')):
+        output.append('')
+    return '/'.join(output)
+
+
+class UrlCanonicalizer:
+    """
+    Rewrites the spellings of a URL that name the same page to one form.
+
+    ``canonicalize()`` only applies rewrites that keep the URL pointing
+    at the same resource, so its result is what gets fetched: lower-case
+    scheme and host, no default port, no '.'/'..' segments, normalized
+    escapes, no tracking parameters, sorted query and no fragment.
+    ``key()`` folds further, for deduplication only: http and https,
+    ``www.`` and the bare host, trailing slashes and session ids
+    (CANONICAL_SESSION_PARAMS, CANONICAL_PATH_PARAMS) are treated as the
+    same URL, but the page is still fetched as it was linked.
+
+    ``ignore_params`` adds to CANONICAL_IGNORE_PARAMS; ``host:name``
+    entries are dropped on that host (and its ``www.`` twin) only.
+    """
+
+    def __init__(self, ignore_params=(), fold_scheme=True, fold_www=True,
+                 fold_trailing_slash=True, sort_query=True):
+        self.fold_scheme = fold_scheme
+        self.fold_www = fold_www
+        self.fold_trailing_slash = fold_trailing_slash
+        self.sort_query = sort_query
+
+        params = list(CANONICAL_IGNORE_PARAMS)
+        site_params = {}
+        for entry in ignore_params:
+            host, _, name = entry.rpartition(':')
+            if host:
+                site_params.setdefault(self._bare_host(host.lower()), []).append(name)
+            else:
+                params.append(name)
+        self.params = params
+        self.site_params = site_params
+        self._ignored = _compile_names(params)
+        self._site_ignored = {host: _compile_names(params + names) for host, names in site_params.items()}
+        self._session_params = _compile_names(CANONICAL_SESSION_PARAMS)
+        self._path_params = (re.compile(f";(?:{'|'.join(map(re.escape, CANONICAL_PATH_PARAMS))})=[^/;]*",
+                                        re.IGNORECASE) if CANONICAL_PATH_PARAMS else None)
+
+    @staticmethod
+    def _bare_host(host):
+        return host[4:] if host.startswith('www.') else host
+
+    def _query(self, query, ignored, sort=True):
+        """Drop ignored parameters and sort the rest by name (values of one name keep their order)"""
+        pairs = []
+        for pair in query.split('&'):
+            if not pair:
+                continue
+            name = unquote(pair.split('=', 1)[0].replace('+', ' '))
+            if ignored is None or not ignored.match(name):
+                pairs.append((name, pair))
+        if sort:
+            pairs.sort(key=lambda pair: pair[0])
+        return '&'.join(pair for _, pair in pairs)
+
+    def _canonical_parts(self, url):
+        """Get the (scheme, netloc, path, query) of a URL's canonical form, or None if it is not http(s)"""
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
+            return None
+        scheme = parts.scheme.lower()
+        host = parts.hostname
+        if scheme not in DEFAULT_PORTS or not host:
+            return None
+
+        host = host.rstrip('.')
+        netloc = f"[{host}]" if ':' in host else host
+        if port is not None and port != DEFAULT_PORTS[scheme]:
+            netloc += f":{port}"
+        if '@' in parts.netloc:
+            netloc = parts.netloc.rpartition('@')[0] + '@' + netloc
+
+        path = remove_dot_segments(_ESCAPE.sub(_escape, parts.path or '/'))
+        query = ''
+        if parts.query:
+            ignored = self._site_ignored.get(self._bare_host(host), self._ignored)
+            query = self._query(_ESCAPE.sub(_escape, parts.query), ignored, self.sort_query)
+        return scheme, netloc, path, query
+
+    def _key_parts(self, parts):
+        """Fold canonical (scheme, netloc, path, query) parts into those of the key"""
+        scheme, netloc, path, query = parts
+        if self.fold_scheme:
+            scheme = 'http'
+        if self.fold_www:
+            userinfo, at, host = netloc.rpartition('@')
+            netloc = userinfo + at + self._bare_host(host)
+        if self._path_params is not None and ';' in path:
+            path = self._path_params.sub('', path)
+        if self.fold_trailing_slash:
+            path = path.rstrip('/') or '/'
+        if query and self._session_params is not None:
+            query = self._query(query, self._session_params, sort=False)
+        return scheme, netloc, path, query
+
+    def canonicalize(self, url):
+        """Get the form of an http(s) URL that is fetched; other URLs are returned as they are"""
+        parts = self._canonical_parts(url)
+        return url if parts is None else urlunsplit(parts + ('',))
+
+    def key(self, url):
+        """Get the key a URL is deduplicated by; URLs with equal keys are fetched once"""
+        return self.forms(url)[1]
+
+    def forms(self, url):
+        """
+        Get (canonical URL, key, key parts) of a URL, splitting it once.
+
+        The key parts can be given to spell() so it does not split the key
+        again; they are None for URLs other than http(s).
+        """
+        parts = self._canonical_parts(url)
+        if parts is None:
+            return url, url, None
+        key_parts = self._key_parts(parts)
+        return urlunsplit(parts + ('',)), urlunsplit(key_parts + ('',)), key_parts
+
+    def style(self, url):
+        """Get the (scheme, www., trailing slash) style a URL is written in, for spell()"""
+        parts = urlsplit(url)
+        return (parts.scheme, parts.netloc.rpartition('@')[2].lower().startswith('www.'),
+                parts.path not in ('', '/') and parts.path.endswith('/'))
+
+    def spell(self, key, style, parts=None):
+        """Write a key in a style from style(), undoing the folds of key(); parts are its parts from forms()"""
+        if parts is None:
+            scheme, netloc, path, query, _ = urlsplit(key)
+            if scheme not in DEFAULT_PORTS:
+                return key
+        else:
+            scheme, netloc, path, query = parts
+        style_scheme, www, trailing_slash = style
+        if self.fold_scheme:
+            scheme = style_scheme
+        if self.fold_www and www:
+            userinfo, at, host = netloc.rpartition('@')
+            netloc = userinfo + at + 'www.' + host
+        if self.fold_trailing_slash and trailing_slash and path != '/':
+            path += '/'
+        return urlunsplit((scheme, netloc, path, query, ''))
@@ -24,12 +24,128 @@ SKIP_EXTENSIONS = {
     '.exe', '.msi', '.dmg', '.deb', '.rpm'
 }
 
+# Content types fetched as pages besides text/*; anything else is skipped before the body is read
+TEXT_CONTENT_TYPES = {
+    'application/xhtml+xml', 'application/xml', 'application/json',
+    'application/javascript', 'application/rss+xml', 'application/atom+xml',
+    'application/octet-stream'  # often mislabeled HTML, checked with BINARY_SIGNATURES instead
+}
+
+# Leading bytes of binary files served without a useful Content-Type
+BINARY_SIGNATURES = (
+    b'%PDF', b'PK\x03\x04', b'\x89PNG', b'\xff\xd8\xff', b'GIF8', b'Rar!',
+    b'7z\xbc\xaf', b'\x1f\x8b', b'BZh', b'MZ', b'\x7fELF', b'ID3', b'OggS',
+    b'RIFF', b'\xd0\xcf\x11\xe0', b'fLaC'
+)
+
 # Default settings
 DEFAULT_DEPTH = 3
 DEFAULT_THREADS = 5
 DEFAULT_DELAY_MIN = 1
 DEFAULT_DELAY_MAX = 3
 DEFAULT_TIMEOUT = 10
+DEFAULT_MAX_PAGE_BYTES = 5 * 1024 * 1024  # bodies are cut off after this many bytes
+READ_CHUNK_SIZE = 64 * 1024
+DEFAULT_CONCURRENCY = 100  # requests kept in flight by the async engine
+
+# Crawl engines
+ENGINES = ['threads', 'async']
+
+# HTML parser backends: lxml (C parser, no tree), tokenizer (regex, no tree), bs4 (html.parser tree)
+PARSERS = ['lxml', 'tokenizer', 'bs4']
+
+# Process-pool parsing
+DEFAULT_PARSE_WORKERS = 0  # 0 parses on the I/O threads
+PARSE_QUEUE_PER_WORKER = 4  # pages queued per parser process before fetchers wait
+
+# Crawl order: bfs (breadth-first, in discovery order) or contact (contact-like pages first)
+PRIORITIES = ['bfs', 'contact']
+# Path and link-text words of pages that tend to list emails, with their score
+CONTACT_KEYWORDS = {
+    'contact': 10, 'kontakt': 10, 'impressum': 10, 'imprint': 8, 'email': 6,
+    'about': 6, 'team': 6, 'staff': 6, 'people': 5, 'faculty': 5, 'directory': 5,
+    'office': 3, 'support': 3, 'press': 3, 'legal': 3, 'mail': 3, 'career': 2, 'jobs': 2
+}
+# Path words of listing and utility pages that rarely do
+LOW_VALUE_KEYWORDS = {
+    'tag': -4, 'category': -3, 'archive': -4, 'page': -2, 'feed': -6, 'search': -5,
+    'calendar': -5, 'login': -5, 'cart': -5, 'comment': -4, 'share': -4, 'print': -3
+}
+PRIORITY_DEPTH_PENALTY = 2.0  # score lost per level of depth
+PRIORITY_PARENT_BONUS = 1.0  # score per email on the linking page...
+PRIORITY_PARENT_CAP = 5  # ...counting at most this many emails
+
+# URL canonicalization: tracking parameters dropped from every link ('*' matches any ending);
+# more can be given per host with --ignore-param host:name
+CANONICAL_IGNORE_PARAMS = [
+    'utm_*', 'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+    'igshid', 'ref_src'
+]
+# Session ids, ignored when deduplicating links but kept in the URL that is fetched,
+# as some sites need them
+CANONICAL_SESSION_PARAMS = [
+    'sessionid', 'session_id', 'sid', 'phpsessid', 'jsessionid', 'aspsessionid*', 'cfid', 'cftoken'
+]
+# Session ids appended to path segments, e.g. /page;jsessionid=0A1B (deduplication only too)
+CANONICAL_PATH_PARAMS = ['jsessionid', 'phpsessid', 'sid']
+
+# Seen-URL store settings
+SEEN_STORES = ['exact', 'fingerprint', 'bloom']
+SEEN_BLOOM_CAPACITY = 1000000  # URLs the Bloom filter is sized for
+SEEN_FP_RATE = 0.001  # Bloom filter false-positive rate at capacity
+
+# Near-duplicate detection settings
+NEAR_DUP_DISTANCE = 3  # max differing SimHash bits (of 64) between near-duplicate pages
+NEAR_DUP_SAMPLING = 4  # on pages with over 64 * N distinct 3-word shingles, one in N is a SimHash feature
+NEAR_DUP_MIN_FEATURES = 10  # pages with fewer features are not fingerprinted
+NEAR_DUP_WORD_CACHE = 100000  # word hashes kept for reuse across pages
+TRAP_MIN_PAGES = 5  # pages of a URL pattern fetched before it can be judged a crawler trap
+TRAP_DUPLICATE_RATIO = 0.8  # share of near-duplicates that makes a URL pattern a trap
+TRAP_MAX_PATTERNS = 100000  # URL patterns tracked; later patterns are not learned
+
+# DNS cache settings
+DNS_TIMEOUT = 2.0  # seconds to wait for each nameserver before asking the next
+DNS_DEFAULT_TTL = 300  # seconds an address is kept when the lookup gives no TTL (getaddrinfo, hosts file)
+DNS_MAX_TTL = 3600  # cap on record TTLs
+DNS_NEGATIVE_TTL = 300  # seconds a name that does not exist is remembered, when the reply has no SOA
+DNS_FAILURE_TTL = 30  # seconds before retrying a host whose lookup failed
+DNS_CACHE_SIZE = 10000  # hosts kept in memory (LRU eviction)
+DNS_PREFETCH_THREADS = 4  # background lookups of hosts found in links
+DNS_PREFETCH_QUEUE = 1000  # hosts waiting for a prefetch; more are resolved when fetched
+
+# Connection pool settings
+SESSION_MODES = ['shared', 'per-thread']
+DEFAULT_POOL_HOSTS = 10  # minimum number of per-host pools kept alive
+
+# Crawl state (resume) settings
+STORE_BATCH_SIZE = 500  # buffered writes committed in one transaction
+STORE_CHECKPOINT_INTERVAL = 30  # seconds between checkpoints of the state file
+FRONTIER_MEMORY_LIMIT = 100000  # queued URLs kept in memory before spilling to the state file
+
+# HTTP cache settings
+HTTP_CACHE_MAX_BYTES = 100 * 1024 * 1024  # stored validators and results before LRU eviction
+
+# Distributed crawl settings
+BROKER_LEASE_SIZE = 100  # URLs a worker leases from the broker at a time
+BROKER_WORKER_TIMEOUT = 300  # seconds without a heartbeat before a worker is reported as lost
+BROKER_WORKER_RESTARTS = 3  # times the coordinator restarts a crashed local worker
+BROKER_BATCH_SIZE = 200  # buffered broker writes committed in one transaction
+BROKER_FLUSH_INTERVAL = 1.0  # seconds between flushes of buffered broker writes
+BROKER_POLL_INTERVAL = 0.5  # seconds between broker polls of an idle worker or coordinator
+
+# Metrics and profiling settings
+# Upper bounds (seconds) of the stage timing histogram buckets: 50us to ~60s, doubling
+METRICS_BUCKETS = [0.00005 * 2 ** i for i in range(21)]
+PROFILE_INTERVAL = 0.005  # seconds between stack samples of the sampling profiler
+METRICS_HOST = '127.0.0.1'  # interface of the live metrics endpoint (local only by default)
+METRICS_MAX_HOSTS = 100  # hosts with their own series on the metrics endpoint, busiest first
+
+# Robots.txt cache settings
+ROBOTS_CACHE_TTL = 3600  # seconds a fetched robots.txt stays valid
+ROBOTS_ERROR_TTL = 300  # seconds before retrying a host that failed or returned 5xx
+ROBOTS_CACHE_SIZE = 1024  # max hosts kept in memory (LRU eviction)
 
 # Output formats
-OUTPUT_FORMATS = ['txt', 'csv', 'json', 'xlsx']
\ No newline at end of file
+OUTPUT_FORMATS = ['txt', 'csv', 'json', 'xlsx']
+STREAM_FORMATS = ['ndjson', 'csv', 'xlsx']  # written while the crawl runs
+MAX_SOURCES_PER_EMAIL = 0  # source URLs kept per email (plus a count), 0 keeps all
\ No newline at end of file
@@ -0,0 +1,235 @@
+"""
+Persistent Crawl Store Module
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from config import STORE_BATCH_SIZE, STORE_CHECKPOINT_INTERVAL
+
+# URL states
+QUEUED = 0
+DONE = 1
+FAILED = 2
+SPILLED = 3  # queued, but kept on disk instead of in the in-memory frontier
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS urls_state ON urls (state);
+CREATE TABLE IF NOT EXISTS findings (
+    email TEXT NOT NULL,
+    url TEXT NOT NULL
+);
+"""
+
+
+class CrawlStore:
+    """
+    SQLite (WAL mode) store for a crawl's frontier, seen URLs and findings.
+
+    Writes are buffered and committed in batches: when ``batch_size``
+    operations are pending, or when a checkpoint is due every
+    ``checkpoint_interval`` seconds. A crash loses at most the last
+    uncommitted batch, and the URLs in it are simply crawled again on
+    resume. The store is shared by all crawl threads.
+    """
+
+    def __init__(self, path, batch_size=STORE_BATCH_SIZE,
+                 checkpoint_interval=STORE_CHECKPOINT_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.checkpoint_interval = checkpoint_interval
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+        self._queued = []  # (url, depth, state)
+        self._states = []  # (state, url)
+        self._finished = []  # (url,)
+        self._findings = []  # (email, url)
+        self._pending = 0
+        self._last_checkpoint = time.time()
+        self.stats_provider = None  # callable returning stats saved on checkpoints
+        self.checkpoints = 0
+
+    # Configuration and statistics
+
+    def _get_meta(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                               (key, json.dumps(value)))
+
+    def get_config(self):
+        """Get the crawl settings saved when the crawl started"""
+        return self._get_meta('config')
+
+    def save_config(self, config):
+        """Save the crawl settings (target URL, depth, domain rules)"""
+        with self._lock:
+            self._set_meta('config', config)
+            self._conn.commit()
+
+    def get_stats(self):
+        """Get the statistics saved by the last checkpoint"""
+        return self._get_meta('stats') or {}
+
+    # Buffered writes
+
+    def queue(self, items, state=QUEUED):
+        """Record newly discovered (url, depth) pairs"""
+        with self._lock:
+            for url, depth in items:
+                self._queued.append((url, depth, state))
+                self._pending += 1
+            self._maybe_flush()
+
+    def spill(self, url, depth):
+        """Record a queued URL that is kept on disk instead of in memory"""
+        with self._lock:
+            self._states.append((SPILLED, url))
+            self._pending += 1
+            self._maybe_flush()
+
+    def fail(self, url):
+        """Record a URL whose request failed"""
+        with self._lock:
+            self._states.append((FAILED, url))
+            self._pending += 1
+            self._maybe_flush()
+
+    def finish(self, url):
+        """Record a URL that is done (unless it already failed)"""
+        with self._lock:
+            self._finished.append((url,))
+            self._pending += 1
+            self._maybe_flush()
+
+    def add_findings(self, url, emails):
+        """Record the emails found on a page"""
+        with self._lock:
+            for email in emails:
+                self._findings.append((email, url))
+                self._pending += 1
+            self._maybe_flush()
+
+    def _maybe_flush(self):
+        """Flush when the batch is full and checkpoint when one is due"""
+        if time.time() - self._last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+        elif self._pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Commit all buffered writes in one transaction"""
+        with self._lock:
+            if not self._pending:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO urls (url, depth, state) VALUES (?, ?, ?)', self._queued)
+                self._conn.executemany('UPDATE urls SET state = ? WHERE url = ?', self._states)
+                self._conn.executemany(
+                    f'UPDATE urls SET state = {DONE} WHERE url = ? AND state IN ({QUEUED}, {SPILLED})',
+                    self._finished)
+                self._conn.executemany('INSERT INTO findings (email, url) VALUES (?, ?)', self._findings)
+            self._queued, self._states, self._finished, self._findings = [], [], [], []
+            self._pending = 0
+
+    def checkpoint(self, stats=None):
+        """Flush, save statistics and fold the WAL back into the database"""
+        with self._lock:
+            self.flush()
+            if stats is None and self.stats_provider is not None:
+                stats = self.stats_provider()
+            if stats is not None:
+                self._set_meta('stats', stats)
+                self._conn.commit()
+            self._conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+            self._last_checkpoint = time.time()
+            self.checkpoints += 1
+
+    # Reading state back
+
+    def unspill(self, limit):
+        """Move up to `limit` spilled URLs back to the in-memory frontier"""
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                f'SELECT url, depth FROM urls WHERE state = {SPILLED} ORDER BY rowid LIMIT ?',
+                (limit,)
+            ).fetchall()
+            with self._conn:
+                self._conn.executemany(f'UPDATE urls SET state = {QUEUED} WHERE url = ?',
+                                       [(url,) for url, _ in rows])
+            return rows
+
+    def prepare_resume(self):
+        """Move every unfinished URL to disk and return how many there are"""
+        with self._lock:
+            self.flush()
+            with self._conn:
+                self._conn.execute(f'UPDATE urls SET state = {SPILLED} WHERE state = {QUEUED}')
+            row = self._conn.execute(f'SELECT COUNT(*) FROM urls WHERE state = {SPILLED}').fetchone()
+            return row[0]
+
+    def iter_urls(self, state=None, batch=10000):
+        """Iterate over every URL the crawl has seen, or those in one state"""
+        query = 'SELECT rowid, url FROM urls WHERE rowid > ?'
+        if state is not None:
+            query += f' AND state = {int(state)}'
+        query += ' ORDER BY rowid LIMIT ?'
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(query, (last, batch)).fetchall()
+            if not rows:
+                return
+            for rowid, url in rows:
+                yield url
+            last = rows[-1][0]
+
+    def iter_findings(self):
+        """Iterate over distinct (email, url) findings in discovery order"""
+        # A page fetched again after a crash may have recorded its findings twice
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT email, url FROM findings GROUP BY email, url ORDER BY MIN(rowid)'
+            ).fetchall()
+        return iter(rows)
+
+    def close(self):
+        """Flush and close the database"""
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+def load_config(path):
+    """Get the crawl settings of a state file, or None if it holds no crawl"""
+    if not os.path.exists(path):
+        return None
+    store = CrawlStore(path)
+    try:
+        return store.get_config()
+    finally:
+        store.close()
@@ -0,0 +1,713 @@
+"""
+Distributed Crawling Module
+"""
+
+import os
+import json
+import time
+import signal
+import socket
+import hashlib
+import sqlite3
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from itertools import groupby
+
+from utils import print_colored
+from scraper import EmailScraper
+from frontier import PriorityFrontier
+from canonical import UrlCanonicalizer
+from politeness import get_host
+from provenance import ProvenanceStore
+from url_filter import FILTERS
+from config import (
+    BROKER_LEASE_SIZE, BROKER_WORKER_TIMEOUT, BROKER_WORKER_RESTARTS,
+    BROKER_BATCH_SIZE, BROKER_FLUSH_INTERVAL, BROKER_POLL_INTERVAL
+)
+
+# URL states
+QUEUED = 0
+LEASED = 1  # handed to the worker of the URL's shard
+DONE = 2
+FAILED = 3
+
+# Worker counters summed into the coordinator's statistics
+MERGED_STATS = (
+    'pages_visited', 'pages_failed', 'bytes_downloaded', 'download_time',
+    'bytes_saved', 'time_saved', 'skipped_content_type', 'pages_truncated',
+    'http_requests', 'connections_new', 'connections_reused',
+    'robots_cache_hits', 'robots_cache_misses', 'seen_duplicates', 'worker_idle_time',
+    'near_duplicates', 'near_duplicate_bytes', 'pages_pruned', 'bytes_pruned',
+    'dns_lookups', 'dns_cache_hits', 'dns_negative_hits', 'dns_prefetches', 'dns_failures',
+    *(f'links_rejected_{name}' for name in FILTERS)
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    key TEXT,
+    depth INTEGER NOT NULL,
+    shard INTEGER NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS urls_state ON urls (state);
+CREATE INDEX IF NOT EXISTS urls_shard_state ON urls (shard, state);
+CREATE TABLE IF NOT EXISTS findings (
+    email TEXT NOT NULL,
+    url TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    shard INTEGER PRIMARY KEY,
+    node TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    heartbeat REAL NOT NULL,
+    running INTEGER NOT NULL DEFAULT 1,
+    stats TEXT
+);
+"""
+
+
+def shard_for(url, shards):
+    """Get the shard of a URL from a hash of its host, so each host stays on one worker"""
+    if shards <= 1:
+        return 0
+    digest = hashlib.blake2b(get_host(url).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shards
+
+
+class Broker:
+    """
+    Shared frontier of a distributed crawl, kept in one SQLite (WAL mode)
+    file that the coordinator and every worker open.
+
+    URLs are deduplicated by their canonical key (see
+    canonical.UrlCanonicalizer.key()) and fetched as first reported. Each
+    URL belongs to the shard of its host. A worker leases batches of its
+    shard's queued URLs, and buffers the links, findings and finished
+    URLs it reports until ``batch_size`` writes are pending or
+    ``flush_interval`` seconds have passed. The links of a page are
+    committed in the same transaction as the page's own state, so the
+    crawl is finished exactly when no URL is queued or leased.
+
+    Workers finish pages in any order, so a URL may first be reported
+    from deeper than its shortest path. It keeps the smallest depth it is
+    reported at, and is queued again if it was already leased at a
+    greater one, so the crawl reaches the same pages as a single crawl.
+
+    The file has to be on a filesystem all nodes can lock, e.g. a local
+    disk shared by worker processes on one box.
+    """
+
+    def __init__(self, path, batch_size=BROKER_BATCH_SIZE, flush_interval=BROKER_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.shard = None  # set by register() in worker processes
+        self.shards = 1
+
+        self._lock = threading.RLock()
+        # Transactions are started explicitly, so writers queue on the file lock
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(urls)')]
+        if 'key' not in columns:
+            # Broker files written before URLs were deduplicated by key: each URL is its own key
+            self._conn.execute('ALTER TABLE urls ADD COLUMN key TEXT')
+            self._conn.execute('UPDATE urls SET key = url')
+        self._conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS urls_key ON urls (key)')
+
+        self._queued = []  # (url, key, depth, shard)
+        self._failed = []  # (url,)
+        self._finished = []  # (url, depth)
+        self._findings = []  # (email, url)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+        config = self.get_config()
+        if config is not None:
+            self.shards = config['shards']
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in one write transaction (caller holds the lock)"""
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self._conn.execute('ROLLBACK')
+            raise
+        self._conn.execute('COMMIT')
+
+    # Crawl setup
+
+    def get_config(self):
+        """Get the crawl settings saved by the coordinator"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'config'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def setup(self, config, start_urls):
+        """Save the crawl settings and queue the start (url, key) pairs"""
+        with self._lock:
+            self.shards = config['shards']
+            with self._transaction():
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('config', ?)",
+                                   (json.dumps(config),))
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO urls (url, key, depth, shard, state) VALUES (?, ?, 0, ?, ?)',
+                    [(url, key, shard_for(url, self.shards), QUEUED) for url, key in start_urls]
+                )
+
+    def requeue(self, shard=None):
+        """Queue leased URLs again, of one shard or all, and return how many there were"""
+        query = f'UPDATE urls SET state = {QUEUED} WHERE state = {LEASED}'
+        params = ()
+        if shard is not None:
+            query += ' AND shard = ?'
+            params = (shard,)
+        with self._lock:
+            with self._transaction():
+                return self._conn.execute(query, params).rowcount
+
+    def is_finished(self):
+        """Check if no URL is queued or leased by any worker"""
+        with self._lock:
+            self.flush()
+            row = self._conn.execute(
+                f'SELECT 1 FROM urls WHERE state IN ({QUEUED}, {LEASED}) LIMIT 1'
+            ).fetchone()
+        return row is None
+
+    def count(self, *states):
+        """Count the URLs in some states"""
+        placeholders = ', '.join('?' * len(states))
+        with self._lock:
+            return self._conn.execute(
+                f'SELECT COUNT(*) FROM urls WHERE state IN ({placeholders})', states
+            ).fetchone()[0]
+
+    def pending_shards(self):
+        """Get the shards that still have queued or leased URLs"""
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT DISTINCT shard FROM urls WHERE state IN ({QUEUED}, {LEASED})'
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    # Worker side
+
+    def register(self, shard):
+        """Join the crawl as the worker of a shard, taking over its leased URLs"""
+        with self._lock:
+            self.shard = shard
+            with self._transaction():
+                self._conn.execute(
+                    'INSERT INTO workers (shard, node, pid, heartbeat) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (shard) DO UPDATE SET node = excluded.node, pid = excluded.pid, '
+                    'heartbeat = excluded.heartbeat, running = 1',
+                    (shard, socket.gethostname(), os.getpid(), time.time())
+                )
+                # Left over by an earlier worker of this shard that crashed or was stopped
+                self._conn.execute(f'UPDATE urls SET state = {QUEUED} WHERE state = {LEASED} AND shard = ?',
+                                   (shard,))
+
+    def lease(self, limit):
+        """Take up to `limit` queued URLs of this worker's shard"""
+        with self._lock:
+            self.flush()
+            with self._transaction():
+                rows = self._conn.execute(
+                    f'SELECT url, depth FROM urls WHERE shard = ? AND state = {QUEUED} '
+                    f'ORDER BY rowid LIMIT ?', (self.shard, limit)
+                ).fetchall()
+                self._conn.executemany(f'UPDATE urls SET state = {LEASED} WHERE url = ?',
+                                       [(url,) for url, _ in rows])
+                self._heartbeat()
+            return rows
+
+    def queue(self, items):
+        """Record discovered (url, key, depth) links for the workers of their shards"""
+        with self._lock:
+            for url, key, depth in items:
+                self._queued.append((url, key, depth, shard_for(url, self.shards)))
+                self._pending += 1
+            self._maybe_flush()
+
+    def fail(self, url):
+        """Record a URL whose request failed"""
+        with self._lock:
+            self._failed.append((url,))
+            self._pending += 1
+            self._maybe_flush()
+
+    def finish(self, url, depth):
+        """Record a leased URL that is done, unless it was queued again since"""
+        with self._lock:
+            self._finished.append((url, depth))
+            self._pending += 1
+            self._maybe_flush()
+
+    def add_findings(self, url, emails):
+        """Record the emails found on a page"""
+        with self._lock:
+            for email in emails:
+                self._findings.append((email, url))
+                self._pending += 1
+            self._maybe_flush()
+
+    def _maybe_flush(self):
+        """Flush when the batch is full or the flush interval has passed"""
+        if (self._pending >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def _heartbeat(self, stats=None):
+        """Update this worker's row (caller holds the lock, inside a transaction)"""
+        if self.shard is None:
+            return
+        if stats is None:
+            self._conn.execute('UPDATE workers SET heartbeat = ? WHERE shard = ?',
+                               (time.time(), self.shard))
+        else:
+            self._conn.execute('UPDATE workers SET heartbeat = ?, stats = ? WHERE shard = ?',
+                               (time.time(), json.dumps(stats), self.shard))
+
+    def flush(self):
+        """Commit all buffered writes in one transaction"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            with self._transaction():
+                # Links first, so a finished page never hides work it discovered
+                self._conn.executemany(
+                    f'INSERT INTO urls (url, key, depth, shard, state) VALUES (?, ?, ?, ?, {QUEUED}) '
+                    f'ON CONFLICT (key) DO UPDATE SET depth = excluded.depth, state = {QUEUED} '
+                    f'WHERE excluded.depth < urls.depth AND urls.state != {FAILED} '
+                    f'ON CONFLICT DO NOTHING',
+                    self._queued)
+                self._conn.executemany(
+                    f'UPDATE urls SET state = {FAILED} WHERE url = ? AND state = {LEASED}', self._failed)
+                self._conn.executemany(
+                    f'UPDATE urls SET state = {DONE} WHERE url = ? AND depth = ? AND state = {LEASED}',
+                    self._finished)
+                self._conn.executemany('INSERT INTO findings (email, url) VALUES (?, ?)', self._findings)
+                self._heartbeat()
+            self._queued, self._failed, self._finished, self._findings = [], [], [], []
+            self._pending = 0
+
+    def report(self, stats):
+        """Save this worker's final counters, added to those of earlier runs of the shard"""
+        with self._lock:
+            self.flush()
+            with self._transaction():
+                row = self._conn.execute('SELECT stats FROM workers WHERE shard = ?',
+                                         (self.shard,)).fetchone()
+                if row and row[0]:
+                    earlier = json.loads(row[0])
+                    stats = {**stats, **{key: stats.get(key, 0) + earlier.get(key, 0)
+                                         for key in MERGED_STATS}}
+                self._heartbeat(stats)
+                self._conn.execute('UPDATE workers SET running = 0 WHERE shard = ?', (self.shard,))
+
+    # Reading results
+
+    def iter_findings(self):
+        """Iterate over distinct (email, url) findings in discovery order"""
+        # A page fetched again by a restarted worker may have recorded its findings twice
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT email, url FROM findings GROUP BY email, url ORDER BY MIN(rowid)'
+            ).fetchall()
+        return iter(rows)
+
+    def get_workers(self):
+        """Get shard -> {'node', 'pid', 'heartbeat', 'running', 'stats'} for every worker that joined"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT shard, node, pid, heartbeat, running, stats FROM workers'
+            ).fetchall()
+        return {
+            shard: {'node': node, 'pid': pid, 'heartbeat': heartbeat, 'running': bool(running),
+                    'stats': json.loads(stats) if stats else None}
+            for shard, node, pid, heartbeat, running, stats in rows
+        }
+
+    def close(self):
+        """Flush and close the database"""
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+def load_config(path):
+    """Get the crawl settings of a broker file, or None if it holds no crawl"""
+    if not os.path.exists(path):
+        return None
+    broker = Broker(path)
+    try:
+        return broker.get_config()
+    finally:
+        broker.close()
+
+
+class BrokerFrontier(PriorityFrontier):
+    """
+    Frontier of one worker, fed with URLs leased from the broker.
+
+    A batch of the shard's URLs is leased whenever the local queue runs
+    low, which also flushes the links the worker found itself. The crawl
+    is finished when the local queue is empty and the broker has no
+    queued or leased URL left, checked at most every ``poll_interval``
+    seconds. With a scorer, each leased batch is fetched in priority
+    order (links arrive through the broker, so without their link text).
+    """
+
+    poll_interval = BROKER_POLL_INTERVAL
+
+    def __init__(self, broker, politeness=None, lease_size=BROKER_LEASE_SIZE, scorer=None):
+        super().__init__(scorer, politeness=politeness)
+        self.broker = broker
+        self.lease_size = lease_size
+        self.leased = 0
+        self._next_lease = 0.0
+        self._next_check = 0.0
+        self._remote_finished = False
+
+    def _refill(self):
+        """Lease more URLs when the local queue is half empty (caller holds the lock)"""
+        now = time.monotonic()
+        if self._size >= self.lease_size // 2 or now < self._next_lease:
+            return
+        rows = self.broker.lease(self.lease_size)
+        for url, depth in rows:
+            self._push_memory(url, depth)
+        self.leased += len(rows)
+        if not rows:
+            self._next_lease = now + self.poll_interval
+
+    def _empty(self):
+        """Check if nothing is queued here or in the broker (caller holds the lock)"""
+        if self._size:
+            return False
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._remote_finished = self.broker.is_finished()
+            self._next_check = now + self.poll_interval
+        return self._remote_finished
+
+
+class DistributedWorker(EmailScraper):
+    """
+    EmailScraper that crawls one shard of a distributed crawl.
+
+    URLs, findings and failures go through the broker instead of a local
+    frontier and state file; the target URL, depth and domain settings
+    are taken from the crawl the coordinator set up. Everything else
+    (engine, threads, politeness, parsing) works as in a single crawl.
+    """
+
+    def __init__(self, broker_path, shard, **kwargs):
+        for option in ('state_file', 'http_cache', 'incremental', 'seeds', 'max_pages'):
+            if kwargs.get(option):
+                raise ValueError(f"'{option}' is not supported by distributed workers")
+
+        self.broker = Broker(broker_path)
+        config = self.broker.get_config()
+        if config is None:
+            self.broker.close()
+            raise ValueError(f"No distributed crawl in {broker_path}")
+        if not 0 <= shard < config['shards']:
+            self.broker.close()
+            raise ValueError(f"Shard must be between 0 and {config['shards'] - 1}")
+        self.shard = shard
+
+        super().__init__(config['target_url'], max_depth=config['max_depth'],
+                         same_domain_only=config['same_domain_only'], **kwargs)
+
+        self.broker.register(shard)
+        print_colored(f"Worker for shard {shard} of {config['shards']} ({broker_path})", 'cyan')
+
+    def _create_frontier(self):
+        return BrokerFrontier(self.broker, politeness=self.politeness, scorer=self.scorer)
+
+    def _queue_start_urls(self, seeds=None):
+        """The coordinator queues the start URL in the broker"""
+
+    def _finish_url(self, url, depth):
+        self.broker.finish(url, depth)
+
+    def _record_findings(self, url, page_emails):
+        self.broker.add_findings(url, page_emails)
+
+    def _mark_failed(self, url):
+        super()._mark_failed(url)
+        self.broker.fail(url)
+
+    def _enqueue_links(self, new_links):
+        """
+        Send links to the broker, which keeps each URL at its smallest depth.
+
+        Links are sent in canonical form along with their canonical key,
+        which the broker deduplicates by, as the seen set of a single crawl.
+        """
+        items = []
+        for link, depth, _ in new_links:
+            key = link
+            if self.canonicalizer is not None:
+                link, key, _ = self.canonicalizer.forms(link)
+            items.append((link, key, depth))
+        self.broker.queue(items)
+
+    def scrape(self):
+        """Crawl this shard until the whole distributed crawl is finished"""
+        try:
+            return super().scrape()
+        finally:
+            self.broker.report({**self.stats, 'urls_leased': self.urls_queue.leased})
+            self.broker.close()
+
+
+def run_worker(broker_path, shard, options):
+    """Process entry point of a local worker started by the coordinator"""
+    worker = DistributedWorker(broker_path, shard, **options)
+    worker.scrape()
+
+
+class Coordinator:
+    """
+    Runs a distributed crawl and merges its results.
+
+    The coordinator sets up the broker, starts one worker process per
+    shard (unless the workers run on other nodes, started with
+    ``--shard``), restarts local workers that crash and waits until the
+    broker has no work left. ``get_results()`` returns the merged emails,
+    sources and counters in the format of EmailScraper.get_results(), so
+    DataExporter works unchanged. A broker file that already holds a
+    crawl is resumed.
+    """
+
+    def __init__(self, broker_path, target_url=None, shards=2, max_depth=3,
+                 same_domain_only=True, local_workers=True, max_sources=None,
+                 worker_options=None, poll_interval=BROKER_POLL_INTERVAL):
+        self.broker_path = broker_path
+        self.local_workers = local_workers
+        self.max_sources = max_sources
+        self.worker_options = dict(worker_options or {})
+        self.poll_interval = poll_interval
+
+        self.broker = Broker(broker_path)
+        config = self.broker.get_config()
+        if config is not None:
+            requeued = self.broker.requeue()
+            print_colored(f"Resuming distributed crawl of {config['target_url']} "
+                          f"({requeued} leased URLs queued again)", 'cyan')
+        else:
+            if not target_url:
+                raise ValueError("A target URL is needed to start a distributed crawl")
+            if shards < 1:
+                raise ValueError("A distributed crawl needs at least one shard")
+            config = {
+                'target_url': target_url,
+                'max_depth': max_depth,
+                'same_domain_only': same_domain_only,
+                'shards': shards
+            }
+            # Keyed as workers key links, so links back to the start page are not queued again
+            key = target_url
+            if self.worker_options.get('canonicalize', True):
+                key = UrlCanonicalizer(self.worker_options.get('ignore_params') or ()).key(target_url)
+            self.broker.setup(config, [(target_url, key)])
+
+        self.target_url = config['target_url']
+        self.max_depth = config['max_depth']
+        self.shards = config['shards']
+
+        self.processes = {}  # shard -> local worker process
+        self.restarts = {}  # shard -> times restarted
+        self._lost = set()  # shards reported as lost
+        self._context = multiprocessing.get_context('spawn')
+
+        # Merged results, filled in when the crawl ends
+        self.emails = set()
+        self.email_sources = ProvenanceStore(max_sources)
+        self.workers = {}
+        self.stats = {
+            'shards': self.shards,
+            'worker_restarts': 0,
+            'urls_in_queue': 0,
+            'failed_urls': 0,
+            'start_time': None,
+            'end_time': None
+        }
+
+    def _start_worker(self, shard):
+        """Start a local worker process for a shard"""
+        process = self._context.Process(
+            target=run_worker, args=(self.broker_path, shard, self.worker_options),
+            name=f'crawl-shard-{shard}'
+        )
+        process.start()
+        self.processes[shard] = process
+
+    def _check_workers(self):
+        """Restart crashed local workers and report shards whose worker went silent"""
+        for shard, process in list(self.processes.items()):
+            if process.is_alive() or process.exitcode == 0:
+                continue
+            if self.restarts.get(shard, 0) >= BROKER_WORKER_RESTARTS:
+                continue
+            self.restarts[shard] = self.restarts.get(shard, 0) + 1
+            self.stats['worker_restarts'] += 1
+            print_colored(f"Worker for shard {shard} exited with code {process.exitcode}, "
+                          f"restarting ({self.restarts[shard]}/{BROKER_WORKER_RESTARTS})", 'yellow')
+            self._start_worker(shard)
+
+        workers = self.broker.get_workers()
+        now = time.time()
+        for shard in self.broker.pending_shards() - self._lost:
+            process = self.processes.get(shard)
+            if process is not None and process.is_alive():
+                continue
+            worker = workers.get(shard)
+            last_seen = worker['heartbeat'] if worker else self.stats['start_time']
+            if now - last_seen >= BROKER_WORKER_TIMEOUT:
+                self._lost.add(shard)
+                print_colored(f"Shard {shard} has work left but no worker for "
+                              f"{BROKER_WORKER_TIMEOUT}s; start one with --broker {self.broker_path} "
+                              f"--shard {shard}", 'yellow')
+
+    def _stop_workers(self, interrupted):
+        """Wait for local workers to exit, interrupting them if the crawl was stopped"""
+        # Workers stop on their own once they see the crawl is finished
+        for process in self.processes.values():
+            process.join(timeout=5 if interrupted else 30)
+            if process.is_alive() and interrupted:
+                # Like a Ctrl-C, so the worker still flushes and reports its counters
+                os.kill(process.pid, signal.SIGINT)
+                process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        # Workers on other nodes report their counters shortly after the crawl ends
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            running = [shard for shard, worker in self.broker.get_workers().items()
+                       if worker['running'] and shard not in self.processes
+                       and time.time() - worker['heartbeat'] < BROKER_WORKER_TIMEOUT]
+            if not running:
+                break
+            time.sleep(self.poll_interval)
+
+    def scrape(self):
+        """Run the crawl until no shard has work left, then merge the results"""
+        print_colored(f"Starting distributed email scraping for: {self.target_url}", 'cyan', 'bold')
+        print_colored(f"Max depth: {self.max_depth}, Shards: {self.shards}, Broker: {self.broker_path}", 'blue')
+        if not self.local_workers:
+            print_colored(f"Waiting for workers: --broker {self.broker_path} --shard 0..{self.shards - 1}", 'blue')
+        print()
+
+        self.stats['start_time'] = time.time()
+        interrupted = False
+        try:
+            if self.local_workers:
+                for shard in range(self.shards):
+                    self._start_worker(shard)
+            while not self.broker.is_finished():
+                time.sleep(self.poll_interval)
+                self._check_workers()
+
+        except KeyboardInterrupt:
+            print_colored("\nScraping interrupted by user!", 'yellow', 'bold')
+            interrupted = True
+
+        finally:
+            self._stop_workers(interrupted)
+            self.stats['end_time'] = time.time()
+            self._merge()
+            self.broker.close()
+
+        return self.get_results()
+
+    def _merge(self):
+        """Collect emails, sources and worker counters from the broker"""
+        self.emails = set()
+        self.email_sources = ProvenanceStore(self.max_sources)
+        for url, findings in groupby(self.broker.iter_findings(), key=lambda finding: finding[1]):
+            page_emails = [email for email, _ in findings]
+            self.emails.update(page_emails)
+            self.email_sources.add_page(url, page_emails)
+
+        self.workers = self.broker.get_workers()
+        reports = [worker['stats'] for worker in self.workers.values() if worker['stats']]
+        for key in MERGED_STATS:
+            self.stats[key] = sum(report.get(key, 0) for report in reports)
+        self.stats['emails_found'] = len(self.emails)
+        fetched = self.stats['pages_visited'] + self.stats['pages_failed']
+        self.stats['emails_per_page'] = len(self.emails) / fetched if fetched else 0.0
+        self.stats['workers_reported'] = len(reports)
+        self.stats['urls_in_queue'] = self.broker.count(QUEUED, LEASED)
+        self.stats['failed_urls'] = self.broker.count(FAILED)
+        self.stats.update(self.email_sources.get_stats())
+
+    def get_results(self):
+        """Get the merged results, in the format of EmailScraper.get_results()"""
+        duration = self.stats['end_time'] - self.stats['start_time'] if self.stats['end_time'] else 0
+
+        return {
+            'emails': list(self.emails),
+            'email_sources': self.email_sources,
+            'statistics': {
+                **self.stats,
+                'duration': duration
+            }
+        }
+
+    def print_summary(self):
+        """Print the merged scraping summary and one line per shard"""
+        duration = self.stats['end_time'] - self.stats['start_time'] if self.stats['end_time'] else 0
+
+        print("\n" + "="*70)
+        print_colored("DISTRIBUTED SCRAPING SUMMARY", 'cyan', 'bold')
+        print("="*70)
+        print_colored(f"Target URL: {self.target_url}", 'white')
+        print_colored(f"Total emails found: {len(self.emails)}", 'green', 'bold')
+        print_colored(f"Pages visited: {self.stats.get('pages_visited', 0)}", 'blue')
+        print_colored(f"Pages failed: {self.stats.get('pages_failed', 0)}", 'red')
+        print_colored(f"Emails per page fetched: {self.stats.get('emails_per_page', 0.0):.2f}", 'blue')
+        print_colored(f"Downloaded: {self.stats.get('bytes_downloaded', 0) / 1024:.1f} KB "
+                      f"in {self.stats.get('http_requests', 0)} requests", 'blue')
+        print_colored(f"Email sources: {self.stats['source_pairs']} unique email/URL pairs over "
+                      f"{self.stats['source_urls']} URLs", 'blue')
+        print_colored(f"Shards: {self.shards} ({self.stats['workers_reported']} workers reported, "
+                      f"{self.stats['worker_restarts']} restarts, "
+                      f"{self.stats['urls_in_queue']} URLs left in the broker)", 'blue')
+        if self.worker_options.get('near_duplicates'):
+            # Each worker learns the traps of its own hosts
+            print_colored(f"Near-duplicates: {self.stats.get('near_duplicates', 0)} pages not expanded, "
+                          f"{self.stats.get('pages_pruned', 0)} pages pruned", 'blue')
+        rejected = [f"{self.stats[f'links_rejected_{name}']} {name.replace('_', ' ')}" for name in FILTERS
+                    if self.stats.get(f'links_rejected_{name}')]
+        if rejected:
+            print_colored(f"Links rejected: {', '.join(rejected)}", 'blue')
+        for shard in range(self.shards):
+            worker = self.workers.get(shard)
+            if worker is None:
+                print_colored(f"  Shard {shard}: no worker joined", 'yellow')
+            elif worker['stats'] is None:
+                print_colored(f"  Shard {shard}: {worker['node']} (pid {worker['pid']}), no report", 'yellow')
+            else:
+                print_colored(f"  Shard {shard}: {worker['node']} (pid {worker['pid']}), "
+                              f"{worker['stats']['pages_visited']} pages, "
+                              f"{worker['stats']['pages_failed']} failed", 'blue')
+        print_colored(f"Duration: {duration:.2f} seconds", 'yellow')
+        print_colored(f"Average time per page: {duration/max(self.stats.get('pages_visited', 0), 1):.2f} seconds", 'yellow')
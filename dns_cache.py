@@ -0,0 +1,508 @@
+"""
+DNS Cache Module
+"""
+
+import time
+import queue
+import socket
+import secrets
+import struct
+import threading
+import ipaddress
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from config import (
+    DNS_TIMEOUT, DNS_DEFAULT_TTL, DNS_MAX_TTL, DNS_NEGATIVE_TTL, DNS_FAILURE_TTL,
+    DNS_CACHE_SIZE, DNS_PREFETCH_THREADS, DNS_PREFETCH_QUEUE
+)
+
+RESOLV_CONF = '/etc/resolv.conf'
+HOSTS_FILE = '/etc/hosts'
+
+# Record types and response codes (RFC 1035, RFC 3596)
+TYPE_A = 1
+TYPE_CNAME = 5
+TYPE_SOA = 6
+TYPE_AAAA = 28
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+
+# getaddrinfo errors that mean the name does not exist, as opposed to a failed lookup
+_NONEXISTENT = {socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)}
+
+_getaddrinfo = socket.getaddrinfo
+
+
+class DnsError(Exception):
+    """A lookup that got no usable answer (timeout, server failure, truncated or malformed reply)"""
+
+
+def is_ip_address(host):
+    """Check if a host is an IPv4 or IPv6 address literal"""
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_server(server):
+    """Parse a nameserver 'HOST', 'HOST:PORT' or '[IPv6]:PORT' into (address, port)"""
+    host, port = server.strip(), 53
+    if host.startswith('['):
+        host, _, rest = host[1:].partition(']')
+        if rest:
+            port = rest.lstrip(':')
+    elif host.count(':') == 1:
+        host, port = host.split(':')
+    try:
+        port = int(port)
+    except ValueError:
+        raise ValueError(f"Invalid DNS server '{server}'") from None
+    if not is_ip_address(host) or not 0 < port < 65536:
+        raise ValueError(f"Invalid DNS server '{server}', expected an IP address and optional port")
+    return host, port
+
+
+def read_nameservers(path=RESOLV_CONF):
+    """Get the (address, port) nameservers of resolv.conf, or [] if there are none"""
+    servers = []
+    try:
+        with open(path) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 2 and fields[0] == 'nameserver':
+                    try:
+                        servers.append(parse_server(fields[1].split('%')[0]))
+                    except ValueError:
+                        continue
+    except OSError:
+        pass
+    return servers
+
+
+def read_hosts(path=HOSTS_FILE):
+    """Get the {name: addresses} mapping of a hosts file"""
+    hosts = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                fields = line.split('#', 1)[0].split()
+                if len(fields) >= 2 and is_ip_address(fields[0]):
+                    for name in fields[1:]:
+                        addresses = hosts.setdefault(name.lower().rstrip('.'), [])
+                        if fields[0] not in addresses:
+                            addresses.append(fields[0])
+    except OSError:
+        pass
+    return {name: tuple(addresses) for name, addresses in hosts.items()}
+
+
+def encode_name(name):
+    """Get the ASCII (IDNA) form of a host name, as it is sent and answered"""
+    try:
+        encoded = name.rstrip('.').encode('idna').lower()
+    except UnicodeError as e:
+        raise DnsError(f"Invalid host name '{name}': {e}") from None
+    if any(not label or len(label) > 63 for label in encoded.split(b'.')):
+        raise DnsError(f"Invalid host name '{name}'")
+    return encoded
+
+
+def build_query(query_id, name, qtype):
+    """Build a recursive query packet for one name and record type"""
+    labels = encode_name(name).split(b'.')
+    question = b''.join(bytes([len(label)]) + label for label in labels) + b'\x00'
+    return struct.pack('!HHHHHH', query_id, 0x0100, 1, 0, 0, 0) + question + struct.pack('!HH', qtype, 1)
+
+
+def _read_name(data, offset):
+    """Read a possibly compressed name, returning (name, offset after it)"""
+    labels = []
+    end = None
+    for _ in range(128):
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = struct.unpack_from('!H', data, offset)[0] & 0x3FFF
+        elif length:
+            labels.append(data[offset + 1:offset + 1 + length].decode('ascii', 'replace'))
+            offset += 1 + length
+        else:
+            return '.'.join(labels).lower(), end if end is not None else offset + 1
+    raise DnsError("Name compression loop")
+
+
+class DnsAnswer:
+    """The parts of a DNS response a cache needs"""
+
+    def __init__(self, rcode, addresses=(), ttl=DNS_DEFAULT_TTL, negative_ttl=DNS_NEGATIVE_TTL):
+        self.rcode = rcode
+        self.addresses = addresses
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+
+def parse_response(data, query_id, name, qtype):
+    """
+    Parse the response to a query into a DnsAnswer.
+
+    Addresses are those of ``name`` or of the CNAME chain starting at it;
+    their TTL is the lowest TTL along that chain. The negative TTL comes
+    from the SOA record of the authority section (RFC 2308).
+    """
+    try:
+        reply_id, flags, questions, answers, authorities, _ = struct.unpack_from('!HHHHHH', data)
+        if reply_id != query_id or not flags & 0x8000:
+            raise DnsError("Reply does not match the query")
+        if flags & 0x0200:
+            raise DnsError("Truncated reply")
+        # The reply must repeat our question, so a reply to another query is not taken for ours
+        if questions != 1:
+            raise DnsError("Reply does not match the query")
+        qname, offset = _read_name(data, 12)
+        reply_qtype = struct.unpack_from('!H', data, offset)[0]
+        offset += 4
+        if qname != encode_name(name).decode('ascii') or reply_qtype != qtype:
+            raise DnsError("Reply does not match the query")
+
+        records = []  # (section, owner, type, ttl, value)
+        for index in range(answers + authorities):
+            owner, offset = _read_name(data, offset)
+            rtype, _, ttl, length = struct.unpack_from('!HHIH', data, offset)
+            offset += 10
+            if offset + length > len(data):
+                raise DnsError("Record runs past the end of the reply")
+            value = None
+            if rtype == TYPE_A and length == 4:
+                value = socket.inet_ntop(socket.AF_INET, data[offset:offset + 4])
+            elif rtype == TYPE_AAAA and length == 16:
+                value = socket.inet_ntop(socket.AF_INET6, data[offset:offset + 16])
+            elif rtype == TYPE_CNAME:
+                value = _read_name(data, offset)[0]
+            elif rtype == TYPE_SOA:
+                rdata = _read_name(data, _read_name(data, offset)[1])[1]
+                value = struct.unpack_from('!IIIII', data, rdata)[4]  # MINIMUM
+            records.append((index < answers, owner, rtype, ttl, value))
+            offset += length
+    except (IndexError, struct.error) as e:
+        raise DnsError(f"Malformed reply: {e}") from None
+
+    # Follow the CNAME chain from the queried name
+    names = {encode_name(name).decode('ascii')}
+    ttls = []
+    changed = True
+    while changed:
+        changed = False
+        for answer, owner, rtype, ttl, value in records:
+            if answer and rtype == TYPE_CNAME and owner in names and value not in names:
+                names.add(value)
+                ttls.append(ttl)
+                changed = True
+    addresses = []
+    for answer, owner, rtype, ttl, value in records:
+        if answer and rtype == qtype and owner in names and value is not None and value not in addresses:
+            addresses.append(value)
+            ttls.append(ttl)
+
+    negative_ttl = DNS_NEGATIVE_TTL
+    for answer, owner, rtype, ttl, value in records:
+        if not answer and rtype == TYPE_SOA and value is not None:
+            negative_ttl = min(ttl, value)
+            break
+    return DnsAnswer(flags & 0xF, tuple(addresses), min(ttls) if ttls else DNS_DEFAULT_TTL, negative_ttl)
+
+
+class DnsClient:
+    """
+    Minimal stub-resolver client: A and AAAA queries over UDP.
+
+    Each nameserver is asked in turn until one answers; timeouts, server
+    failures and truncated replies raise DnsError once all of them were
+    tried. Unlike getaddrinfo, the answer carries the records' TTLs.
+    """
+
+    def __init__(self, nameservers, timeout=DNS_TIMEOUT):
+        self.nameservers = list(nameservers)
+        self.timeout = timeout
+
+    def query(self, name, qtype):
+        """Ask the nameservers for one record type of a name, returning a DnsAnswer"""
+        errors = []
+        for address, port in self.nameservers:
+            query_id = secrets.randbits(16)
+            family = socket.AF_INET6 if ':' in address else socket.AF_INET
+            try:
+                with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                    sock.settimeout(self.timeout)
+                    # Connected, so replies from other addresses are dropped by the kernel
+                    sock.connect((address, port))
+                    sock.send(build_query(query_id, name, qtype))
+                    deadline = time.monotonic() + self.timeout
+                    while True:
+                        data = sock.recv(4096)
+                        if len(data) >= 2 and struct.unpack_from('!H', data)[0] == query_id:
+                            break
+                        sock.settimeout(max(0.001, deadline - time.monotonic()))
+                answer = parse_response(data, query_id, name, qtype)
+            except (OSError, DnsError) as e:
+                errors.append(f"{address}:{port}: {e or type(e).__name__}")
+                continue
+            if answer.rcode in (RCODE_NOERROR, RCODE_NXDOMAIN):
+                return answer
+            errors.append(f"{address}:{port}: response code {answer.rcode}")
+        raise DnsError(f"No answer for {name} ({'; '.join(errors) or 'no nameservers'})")
+
+    def lookup(self, name):
+        """
+        Get (addresses, ttl) of a name, with no addresses if it does not exist.
+
+        IPv4 addresses come first, then IPv6 ones, as getaddrinfo orders
+        them by default; the TTL is the lower of the two answers'. A failed
+        AAAA query does not fail a name that has IPv4 addresses.
+        """
+        answer = self.query(name, TYPE_A)
+        if answer.rcode == RCODE_NXDOMAIN:
+            return (), answer.negative_ttl
+        try:
+            answer6 = self.query(name, TYPE_AAAA)
+        except DnsError:
+            if not answer.addresses:
+                raise
+            return answer.addresses, answer.ttl
+        answers = [each for each in (answer, answer6) if each.addresses]
+        if not answers:
+            return (), min(answer.negative_ttl, answer6.negative_ttl)
+        return answer.addresses + answer6.addresses, min(each.ttl for each in answers)
+
+
+class SystemResolver:
+    """Lookups through getaddrinfo, which does not report TTLs"""
+
+    def __init__(self, ttl=DNS_DEFAULT_TTL):
+        self.ttl = ttl
+
+    def lookup(self, name):
+        """Get (addresses, ttl) of a name, with no addresses if it does not exist"""
+        try:
+            infos = _getaddrinfo(name, None, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            if e.errno in _NONEXISTENT:
+                return (), DNS_NEGATIVE_TTL
+            raise DnsError(str(e)) from None
+        return tuple(dict.fromkeys(info[4][0] for info in infos)), self.ttl
+
+
+class DnsEntry:
+    """Cached addresses of one host; no addresses means it does not exist (or the lookup failed)"""
+
+    __slots__ = ('addresses', 'expires', 'failed')
+
+    def __init__(self, addresses, expires, failed=False):
+        self.addresses = addresses
+        self.expires = expires
+        self.failed = failed
+
+
+class _Pending:
+    """A lookup in progress, waited on by other callers of the same host"""
+
+    __slots__ = ('event', 'entry')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.entry = None
+
+
+class DnsCache:
+    """
+    Thread-safe cache of host addresses, shared by every connection of a crawl.
+
+    Hosts are looked up in the hosts file, then with DnsClient on the
+    ``nameservers`` (resolv.conf by default), keeping each answer for its
+    record TTL (at most DNS_MAX_TTL). Names that do not exist are cached
+    for the SOA's negative TTL, failed lookups for DNS_FAILURE_TTL, and
+    names the nameservers cannot answer fall back to getaddrinfo. Each
+    host is looked up once at a time: concurrent callers wait for the
+    lookup in progress. Least recently used hosts are evicted once
+    ``max_hosts`` is reached.
+
+    ``prefetch()`` resolves hosts on background threads as links to them
+    are found, so the connection that fetches them does not wait. With
+    ``metrics`` (a metrics.CrawlMetrics), the time callers of
+    ``resolve()`` wait is recorded as the 'dns' stage.
+    """
+
+    def __init__(self, nameservers=None, metrics=None, max_hosts=DNS_CACHE_SIZE,
+                 prefetch_threads=DNS_PREFETCH_THREADS, timeout=DNS_TIMEOUT, hosts_file=HOSTS_FILE):
+        if nameservers is None:
+            nameservers = read_nameservers()
+        self.client = DnsClient(nameservers, timeout) if nameservers else None
+        self.system = SystemResolver()
+        self.hosts = read_hosts(hosts_file) if hosts_file else {}
+        self.metrics = metrics
+        self.max_hosts = max(1, max_hosts)
+        self.prefetch_threads = prefetch_threads
+
+        self._entries = OrderedDict()  # host -> DnsEntry
+        self._inflight = {}  # host -> _Pending
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._queued = set()  # hosts waiting for a prefetch thread
+        self._threads = []
+
+        self.lookups = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.prefetches = 0
+        self.failures = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize(host):
+        return host.strip('[]').rstrip('.').lower()
+
+    def _lookup(self, host):
+        """Look a host up, returning a new DnsEntry"""
+        addresses = self.hosts.get(host)
+        if addresses is not None:
+            return DnsEntry(addresses, time.monotonic() + DNS_DEFAULT_TTL)
+        try:
+            # Single-label names may need the resolver's search domains
+            if self.client is not None and '.' in host:
+                try:
+                    addresses, ttl = self.client.lookup(host)
+                except DnsError:
+                    addresses, ttl = self.system.lookup(host)
+            else:
+                addresses, ttl = self.system.lookup(host)
+        except DnsError:
+            with self._lock:
+                self.failures += 1
+            return DnsEntry((), time.monotonic() + DNS_FAILURE_TTL, failed=True)
+        return DnsEntry(addresses, time.monotonic() + min(ttl, DNS_MAX_TTL))
+
+    def _get(self, host, block=True, prefetch=False):
+        """Get the fresh entry of a host, looking it up if needed (None when not blocking)"""
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None and entry.expires > time.monotonic():
+                self._entries.move_to_end(host)
+                if not prefetch:
+                    self.hits += 1
+                    if not entry.addresses:
+                        self.negative_hits += 1
+                return entry
+            if not block:
+                return None
+
+            pending = self._inflight.get(host)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[host] = _Pending()
+                self.lookups += 1
+                if prefetch:
+                    self.prefetches += 1
+            elif prefetch:
+                return None
+            else:
+                self.hits += 1
+
+        if not owner:
+            pending.event.wait()
+            return pending.entry
+
+        try:
+            entry = pending.entry = self._lookup(host)
+            with self._lock:
+                self._entries[host] = entry
+                self._entries.move_to_end(host)
+                while len(self._entries) > self.max_hosts:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        finally:
+            with self._lock:
+                self._inflight.pop(host, None)
+            pending.event.set()
+        return entry
+
+    def resolve(self, host, block=True):
+        """
+        Get the IP addresses of a host, raising socket.gaierror if it has none.
+
+        Without ``block``, returns None instead of waiting for a lookup.
+        """
+        host = self._normalize(host)
+        if is_ip_address(host):
+            return (host,)
+        start = time.perf_counter()
+        entry = self._get(host, block)
+        if entry is None and not block:
+            return None
+        if self.metrics is not None:
+            self.metrics.observe('dns', time.perf_counter() - start)
+        if entry is None or entry.failed:
+            raise socket.gaierror(socket.EAI_AGAIN, f"Temporary failure in name resolution: {host}")
+        if not entry.addresses:
+            raise socket.gaierror(socket.EAI_NONAME, f"Name or service not known: {host}")
+        return entry.addresses
+
+    def prefetch(self, host):
+        """Resolve a host on a background thread, unless it is cached or being resolved"""
+        if self.prefetch_threads <= 0 or not host:
+            return
+        host = self._normalize(host)
+        with self._lock:
+            entry = self._entries.get(host)
+            if ((entry is not None and entry.expires > time.monotonic()) or host in self._inflight
+                    or host in self._queued or len(self._queued) >= DNS_PREFETCH_QUEUE):
+                return
+        if is_ip_address(host) or host in self.hosts:
+            return
+        with self._lock:
+            self._queued.add(host)
+            while len(self._threads) < self.prefetch_threads:
+                thread = threading.Thread(target=self._prefetch_worker, name='dns-prefetch', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        self._queue.put(host)
+
+    def prefetch_urls(self, urls):
+        """Prefetch the hosts of URLs"""
+        for host in {urlsplit(url).hostname for url in urls}:
+            self.prefetch(host)
+
+    def _prefetch_worker(self):
+        while True:
+            host = self._queue.get()
+            if host is None:
+                return
+            with self._lock:
+                self._queued.discard(host)
+            try:
+                self._get(host, prefetch=True)
+            except Exception:
+                pass
+
+    def close(self):
+        """Stop the prefetch threads"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            self._queued.clear()
+        for _ in threads:
+            self._queue.put(None)
+
+    def get_stats(self):
+        """Get lookup, hit and prefetch counters"""
+        with self._lock:
+            return {
+                'dns_lookups': self.lookups,
+                'dns_cache_hits': self.hits,
+                'dns_negative_hits': self.negative_hits,
+                'dns_prefetches': self.prefetches,
+                'dns_failures': self.failures,
+                'dns_evictions': self.evictions,
+                'dns_hosts': len(self._entries)
+            }
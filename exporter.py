@@ -4,11 +4,15 @@ Data Export Module
 
 import json
 import csv
+import threading
 import pandas as pd
 from datetime import datetime
 import os
+from openpyxl import Workbook
 from termcolor import colored
 from utils import print_colored
+from provenance import ProvenanceStore
+from config import STREAM_FORMATS
 
 class DataExporter:
     def __init__(self, results, target_url):
@@ -16,6 +20,14 @@ class DataExporter:
         self.target_url = target_url
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.base_filename = f"email_scraping_{self.timestamp}"
+    
+    def _sources(self, email):
+        """Get the source URLs of an email and how many there were (a capped store keeps fewer)"""
+        email_sources = self.results['email_sources']
+        sources = email_sources.get(email, [])
+        if isinstance(email_sources, ProvenanceStore):
+            return sources, email_sources.count(email)
+        return sources, len(sources)
         
     def export_txt(self, filename=None):
         """Export results to text file"""
@@ -35,6 +47,15 @@ class DataExporter:
                 for email in sorted(self.results['emails']):
                     f.write(f"{email}\n")
                 
+                if 'seeds' in self.results:
+                    f.write("\n\nSEEDS:\n")
+                    f.write("-"*20 + "\n")
+                    for seed, seed_result in self.results['seeds'].items():
+                        f.write(f"\n{seed} ({seed_result['pages_visited']} pages, "
+                                f"{len(seed_result['emails'])} emails):\n")
+                        for email in seed_result['emails']:
+                            f.write(f"  - {email}\n")
+                
                 f.write("\n\nEMAIL SOURCES:\n")
                 f.write("-"*20 + "\n")
                 for email, sources in self.results['email_sources'].items():
@@ -65,12 +86,20 @@ class DataExporter:
         try:
             with open(filename, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
-                writer.writerow(['Email', 'Source URLs', 'Source Count'])
                 
-                for email in sorted(self.results['emails']):
-                    sources = self.results['email_sources'].get(email, [])
-                    sources_str = '; '.join(sources)
-                    writer.writerow([email, sources_str, len(sources)])
+                if 'seeds' in self.results:
+                    # Batch crawls: one row per seed and email
+                    writer.writerow(['Seed', 'Email', 'Source URLs', 'Source Count'])
+                    for seed, seed_result in self.results['seeds'].items():
+                        for email in seed_result['emails']:
+                            sources, source_count = self._sources(email)
+                            writer.writerow([seed, email, '; '.join(sources), source_count])
+                else:
+                    writer.writerow(['Email', 'Source URLs', 'Source Count'])
+                    for email in sorted(self.results['emails']):
+                        sources, source_count = self._sources(email)
+                        sources_str = '; '.join(sources)
+                        writer.writerow([email, sources_str, source_count])
             
             print_colored(f"✓ Results exported to {filename}", 'green')
             return filename
@@ -92,9 +121,17 @@ class DataExporter:
                     'total_emails': len(self.results['emails'])
                 },
                 'emails': self.results['emails'],
-                'email_sources': self.results['email_sources'],
+                'email_sources': dict(self.results['email_sources']),
                 'statistics': self.results['statistics']
             }
+            email_sources = self.results['email_sources']
+            if isinstance(email_sources, ProvenanceStore) and email_sources.max_sources:
+                export_data['email_source_counts'] = {email: email_sources.count(email)
+                                                      for email in email_sources}
+            if 'email_diff' in self.results:
+                export_data['email_diff'] = self.results['email_diff']
+            if 'seeds' in self.results:
+                export_data['seeds'] = self.results['seeds']
             
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(export_data, f, indent=2, ensure_ascii=False)
@@ -115,10 +152,10 @@ class DataExporter:
             # Prepare data for Excel
             email_data = []
             for email in sorted(self.results['emails']):
-                sources = self.results['email_sources'].get(email, [])
+                sources, source_count = self._sources(email)
                 email_data.append({
                     'Email': email,
-                    'Source Count': len(sources),
+                    'Source Count': source_count,
                     'First Source': sources[0] if sources else '',
                     'All Sources': '; '.join(sources)
                 })
@@ -137,6 +174,23 @@ class DataExporter:
                 df_stats = pd.DataFrame(stats_data)
                 df_stats.to_excel(writer, sheet_name='Statistics', index=False)
                 
+                # Per-seed sheets for batch crawls
+                if 'seeds' in self.results:
+                    seed_data = []
+                    seed_emails = []
+                    for seed, seed_result in self.results['seeds'].items():
+                        seed_data.append({
+                            'Seed': seed,
+                            'Pages Visited': seed_result['pages_visited'],
+                            'Pages Failed': seed_result['pages_failed'],
+                            'Over Budget': seed_result['pages_over_budget'],
+                            'Emails': len(seed_result['emails'])
+                        })
+                        seed_emails.extend({'Seed': seed, 'Email': email} for email in seed_result['emails'])
+                    pd.DataFrame(seed_data).to_excel(writer, sheet_name='Seeds', index=False)
+                    pd.DataFrame(seed_emails, columns=['Seed', 'Email']).to_excel(
+                        writer, sheet_name='Seed Emails', index=False)
+                
                 # Metadata sheet
                 metadata = [
                     {'Field': 'Target URL', 'Value': self.target_url},
@@ -186,4 +240,137 @@ class DataExporter:
         else:
             print_colored("✗ No files were exported successfully", 'red', 'bold')
         
-        return exported_files
\ No newline at end of file
+        return exported_files
+
+
+class ExportSink:
+    """
+    Base class for exporters that receive findings while the crawl runs.
+
+    EmailScraper calls ``write()`` once per (email, source URL) finding,
+    from any crawl thread, so nothing has to be kept in memory until the
+    end. Subclasses implement ``_open``, ``_write`` and ``_close``.
+    """
+
+    extension = ''
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def open(self, target_url):
+        """Create the output file"""
+        with self._lock:
+            self._open(target_url)
+
+    def write(self, email, source, new):
+        """Write one finding; `new` is True the first time an email is found"""
+        with self._lock:
+            self._write(email, source, new, datetime.now().isoformat(timespec='seconds'))
+            self.rows += 1
+
+    def close(self, statistics=None):
+        """Finish the output file"""
+        with self._lock:
+            self._close(statistics or {})
+        print_colored(f"✓ Streamed {self.rows} findings to {self.filename}", 'green')
+        return self.filename
+
+    def _open(self, target_url):
+        raise NotImplementedError
+
+    def _write(self, email, source, new, found_at):
+        raise NotImplementedError
+
+    def _close(self, statistics):
+        raise NotImplementedError
+
+
+class NDJSONSink(ExportSink):
+    """One JSON object per finding, flushed as it is written"""
+
+    extension = 'ndjson'
+
+    def _open(self, target_url):
+        self._file = open(self.filename, 'w', encoding='utf-8')
+
+    def _write(self, email, source, new, found_at):
+        self._file.write(json.dumps({'email': email, 'source': source, 'new': new,
+                                     'found_at': found_at}, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def _close(self, statistics):
+        self._file.close()
+
+
+class CSVSink(ExportSink):
+    """One CSV row per finding, flushed as it is written"""
+
+    extension = 'csv'
+
+    def _open(self, target_url):
+        self._file = open(self.filename, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['Email', 'Source URL', 'New', 'Found At'])
+        self._file.flush()
+
+    def _write(self, email, source, new, found_at):
+        self._writer.writerow([email, source, new, found_at])
+        self._file.flush()
+
+    def _close(self, statistics):
+        self._file.close()
+
+
+class XLSXSink(ExportSink):
+    """
+    Excel workbook written with openpyxl's write-only mode.
+
+    Rows are streamed to a temporary file instead of kept as cells, so
+    memory stays flat, but the workbook is only readable after close().
+    Statistics and metadata sheets are added when it is closed.
+    """
+
+    extension = 'xlsx'
+
+    def _open(self, target_url):
+        self.target_url = target_url
+        self._workbook = Workbook(write_only=True)
+        self._emails = self._workbook.create_sheet('Emails')
+        self._emails.append(['Email', 'Source URL', 'New', 'Found At'])
+
+    def _write(self, email, source, new, found_at):
+        self._emails.append([email, source, new, found_at])
+
+    def _close(self, statistics):
+        stats_sheet = self._workbook.create_sheet('Statistics')
+        stats_sheet.append(['Metric', 'Value'])
+        for key, value in statistics.items():
+            stats_sheet.append([key, value])
+
+        metadata = self._workbook.create_sheet('Metadata')
+        metadata.append(['Field', 'Value'])
+        metadata.append(['Target URL', self.target_url])
+        metadata.append(['Scraping Date', datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
+        metadata.append(['Findings', self.rows])
+        self._workbook.save(self.filename)
+
+
+SINK_CLASSES = {
+    'ndjson': NDJSONSink,
+    'csv': CSVSink,
+    'xlsx': XLSXSink,
+}
+
+
+def create_sinks(formats, directory='.', base_filename=None):
+    """Create streaming sinks for a list of formats in an output directory"""
+    base_filename = base_filename or f"email_stream_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    sinks = []
+    for fmt in formats:
+        if fmt not in SINK_CLASSES:
+            raise ValueError(f"Unknown stream format '{fmt}', expected one of: {', '.join(STREAM_FORMATS)}")
+        sink_class = SINK_CLASSES[fmt]
+        sinks.append(sink_class(os.path.join(directory, f"{base_filename}.{sink_class.extension}")))
+    return sinks
@@ -0,0 +1,382 @@
+"""
+Fast Extraction Module
+"""
+
+import re
+import html
+import time
+import codecs
+import urllib.parse
+
+from lxml import etree
+from bs4 import BeautifulSoup
+
+# Same patterns as utils.extract_emails / utils.is_valid_email
+EMAIL_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+VALID_EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
+_LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+_DIGITS = '0123456789'
+LOCAL_CHARS = _LETTERS + _DIGITS + '._%+-'
+DOMAIN_CHARS = _LETTERS + _DIGITS + '.-|'
+
+# Non-ASCII characters that [A-Za-z] also matches under re.IGNORECASE
+IGNORECASE_EXTRA = 'İıſK'
+
+_HIGH_BYTES = bytes(range(0x80, 0x100))
+
+# Codecs in which every byte below 0x80 is the ASCII character it looks like
+_ASCII_SAFE_CODECS = ('utf-8', 'ascii', 'iso8859', 'cp125', 'cp437', 'cp850',
+                      'euc', 'koi8', 'mac-', 'tis-620')
+
+
+def is_ascii_compatible(encoding):
+    """Check if '@' and email characters can be found by scanning raw bytes"""
+    try:
+        name = codecs.lookup(encoding).name
+    except LookupError:
+        return False
+    return name.startswith(_ASCII_SAFE_CODECS)
+
+
+def sniff_encoding(data, encoding=None):
+    """Pick the encoding of a document from its BOM or a declared charset"""
+    if data.startswith(codecs.BOM_UTF8):
+        return 'utf-8'
+    if data.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)):
+        return 'utf-32'
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    return encoding or 'utf-8'
+
+
+def _left_run(data, at, lo, chars):
+    """Find where the run of `chars` ending just before `at` starts"""
+    size = 64
+    while True:
+        begin = max(lo, at - size)
+        stripped = data[begin:at].rstrip(chars)
+        if stripped or begin == lo:
+            return begin + len(stripped)
+        size *= 4
+
+
+def _right_run(data, start, chars):
+    """Find where the run of `chars` beginning at `start` ends"""
+    size = 256
+    n = len(data)
+    while True:
+        end = min(n, start + size)
+        chunk = data[start:end]
+        rest = chunk.lstrip(chars)
+        if rest or end == n:
+            return end - len(rest)
+        size *= 4
+
+
+class EmailExtractor:
+    """
+    Email extraction that only looks at the text around '@' characters.
+
+    Patterns are compiled once. For each '@' the surrounding run of
+    address characters is located with C-level strip calls and the
+    original regex is run on that small window only. Bytes are scanned
+    directly for ASCII-compatible encodings, so a page never has to be
+    decoded as a whole. Results are identical to utils.extract_emails.
+    """
+
+    def __init__(self):
+        self._text_pattern = re.compile(EMAIL_PATTERN, re.IGNORECASE)
+        self._text_valid = re.compile(VALID_EMAIL_PATTERN)
+        self._bytes_pattern = re.compile(EMAIL_PATTERN.encode('ascii'), re.IGNORECASE)
+        self._bytes_valid = re.compile(VALID_EMAIL_PATTERN.encode('ascii'))
+
+        self._text_local = LOCAL_CHARS + IGNORECASE_EXTRA
+        self._text_domain = DOMAIN_CHARS + IGNORECASE_EXTRA
+        self._bytes_local = LOCAL_CHARS.encode('ascii')
+        self._bytes_domain = DOMAIN_CHARS.encode('ascii')
+        self._bytes_local_high = self._bytes_local + _HIGH_BYTES
+        self._bytes_domain_high = self._bytes_domain + _HIGH_BYTES
+
+    def extract(self, data, encoding=None):
+        """Extract lowercased emails from str or bytes, in document order"""
+        if isinstance(data, str):
+            return self._scan_text(data)
+
+        encoding = sniff_encoding(data, encoding)
+        if not is_ascii_compatible(encoding):
+            return self._scan_text(data.decode(encoding, 'replace'))
+        return self._scan_bytes(data, encoding)
+
+    def _scan_text(self, text):
+        """Scan a decoded document"""
+        emails = []
+        pattern, valid = self._text_pattern, self._text_valid
+        local_chars, domain_chars = self._text_local, self._text_domain
+        n = len(text)
+        last_end = 0
+
+        at = text.find('@')
+        while at != -1:
+            start = _left_run(text, at, last_end, local_chars)
+            end = _right_run(text, at + 1, domain_chars)
+            if start < at and end > at + 1:
+                for match in pattern.finditer(text, start, min(end + 1, n)):
+                    email = match.group()
+                    if valid.match(email):
+                        emails.append(email.lower())
+                    last_end = match.end()
+            at = text.find('@', end)
+
+        return emails
+
+    def _scan_bytes(self, data, encoding):
+        """Scan raw bytes of an ASCII-compatible document"""
+        emails = []
+        pattern, valid = self._bytes_pattern, self._bytes_valid
+        local_chars, domain_chars = self._bytes_local, self._bytes_domain
+        n = len(data)
+        last_end = 0
+
+        at = data.find(b'@')
+        while at != -1:
+            start = _left_run(data, at, last_end, local_chars)
+            end = _right_run(data, at + 1, domain_chars)
+
+            if (start > 0 and data[start - 1] >= 0x80) or (end < n and data[end] >= 0x80):
+                # Non-ASCII neighbours change \b and IGNORECASE matching, decode just this region
+                last_end, end = self._scan_region(data, at, last_end, encoding, emails)
+            elif start < at and end > at + 1:
+                for match in pattern.finditer(data, start, min(end + 1, n)):
+                    email = match.group()
+                    if valid.match(email):
+                        emails.append(email.decode('ascii').lower())
+                    last_end = match.end()
+            at = data.find(b'@', end)
+
+        return emails
+
+    def _scan_region(self, data, at, last_end, encoding, emails):
+        """Decode the region around one '@' and match it as text"""
+        n = len(data)
+        start = _left_run(data, at, last_end, self._bytes_local_high)
+        end = _right_run(data, at + 1, self._bytes_domain_high)
+
+        # Include the neighbouring characters for \b, widened to ASCII bytes so
+        # the slice never splits a multi-byte character
+        begin = max(0, start - 1)
+        while begin > 0 and data[begin - 1] >= 0x80:
+            begin -= 1
+        stop = min(n, end + 1)
+        while stop < n and data[stop] >= 0x80:
+            stop += 1
+
+        text = data[begin:stop].decode(encoding, 'replace')
+        text_at = len(data[begin:at].decode(encoding, 'replace'))
+        pos = len(data[begin:last_end].decode(encoding, 'replace')) if last_end > begin else 0
+
+        for match in self._text_pattern.finditer(text, pos):
+            if match.start() > text_at:
+                break
+            if match.end() <= text_at:
+                continue
+            email = match.group()
+            if self._text_valid.match(email):
+                emails.append(email.lower())
+            last_end = begin + len(text[:match.end()].encode(encoding, 'replace'))
+        return last_end, end
+
+
+_default_extractor = EmailExtractor()
+
+
+def find_emails(data, encoding=None):
+    """Extract emails from str or bytes with the shared EmailExtractor"""
+    return _default_extractor.extract(data, encoding)
+
+
+# Tags whose href is followed, as in the original BeautifulSoup path
+LINK_TAGS = ('a', 'link')
+
+# Characters of link text kept per href, and bytes searched for the closing </a> by the tokenizer
+ANCHOR_TEXT_LIMIT = 100
+ANCHOR_SCAN_BYTES = 1000
+
+_VALID_EMAIL = re.compile(VALID_EMAIL_PATTERN)
+
+# The tokenizer's scan of the markup: skip comments and script/style bodies, capture <a>/<link> tags
+_TAG_PATTERN = re.compile(
+    rb'<!--.*?-->|<(script|style)\b[^>]*>.*?</\1\s*>|<(a|link)\b([^>]*)>',
+    re.IGNORECASE | re.DOTALL
+)
+_HREF_PATTERN = re.compile(
+    rb'(?:^|\s)href\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))',
+    re.IGNORECASE
+)
+_MAILTO_PATTERN = re.compile(rb'mailto:([^"\'<>\s]+)', re.IGNORECASE)
+_ANCHOR_END_PATTERN = re.compile(rb'</a\s*>', re.IGNORECASE)
+_MARKUP_PATTERN = re.compile(rb'<[^>]*>')
+
+
+def _add_anchor(anchors, href, text):
+    """Keep the first non-empty link text of an href, whitespace collapsed"""
+    if href not in anchors or not anchors[href]:
+        anchors[href] = ' '.join(text.split())[:ANCHOR_TEXT_LIMIT]
+
+
+def parse_mailto(href):
+    """Get the valid, lowercased addresses of a mailto: link"""
+    target = href.strip()[len('mailto:'):].split('?', 1)[0]
+    emails = []
+    for address in urllib.parse.unquote(target).split(','):
+        address = address.strip()
+        if _VALID_EMAIL.match(address):
+            emails.append(address.lower())
+    return emails
+
+
+class _LinkCollector:
+    """lxml parser target that keeps hrefs (and optionally link text) and builds no tree"""
+
+    def __init__(self, anchors=None):
+        self.hrefs = []
+        self.anchors = anchors
+        self._anchor = None  # href of the <a> being read, when collecting link text
+        self._text = []
+
+    def start(self, tag, attrib):
+        if tag in LINK_TAGS:
+            href = attrib.get('href')
+            if href:
+                self.hrefs.append(href)
+                if self.anchors is not None and tag == 'a':
+                    self._anchor = href
+                    self._text = []
+
+    def end(self, tag):
+        if tag == 'a' and self._anchor is not None:
+            _add_anchor(self.anchors, self._anchor, ''.join(self._text))
+            self._anchor = None
+
+    def data(self, data):
+        if self._anchor is not None:
+            self._text.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return self.hrefs
+
+
+def _hrefs_lxml(content, encoding, anchors=None):
+    """Collect hrefs with lxml's C parser, streaming tags to a target"""
+    if not content.strip():
+        return []
+    if isinstance(content, str):
+        parser = etree.HTMLParser(target=_LinkCollector(anchors))
+        return etree.fromstring(content.encode('utf-8'), parser)
+    try:
+        parser = etree.HTMLParser(target=_LinkCollector(anchors), encoding=encoding)
+    except LookupError:
+        # A charset name libxml2 does not know, e.g. 'latin-1': decode it here instead
+        return _hrefs_lxml(content.decode(sniff_encoding(content, encoding), 'replace'), None, anchors)
+    return etree.fromstring(content, parser)
+
+
+def _hrefs_tokenizer(content, encoding, anchors=None):
+    """Collect hrefs with a single regex pass over the tags"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+        encoding = 'utf-8'
+    encoding = sniff_encoding(content, encoding)
+    if not is_ascii_compatible(encoding):
+        content = content.decode(encoding, 'replace').encode('utf-8')
+        encoding = 'utf-8'
+
+    hrefs = []
+    for match in _TAG_PATTERN.finditer(content):
+        attributes = match.group(3)
+        if not attributes:
+            continue
+        href = _HREF_PATTERN.search(attributes)
+        if href:
+            value = href.group(1) or href.group(2) or href.group(3)
+            if value:
+                hrefs.append(html.unescape(value.decode(encoding, 'replace')))
+                if anchors is not None and match.group(2).lower() == b'a':
+                    end = _ANCHOR_END_PATTERN.search(content, match.end(), match.end() + ANCHOR_SCAN_BYTES)
+                    if end:
+                        text = _MARKUP_PATTERN.sub(b' ', content[match.end():end.start()])
+                        _add_anchor(anchors, hrefs[-1], html.unescape(text.decode(encoding, 'replace')))
+    return hrefs
+
+
+def _hrefs_bs4(content, encoding, anchors=None):
+    """Collect hrefs with BeautifulSoup's html.parser tree"""
+    if isinstance(content, bytes):
+        soup = BeautifulSoup(content, 'html.parser', from_encoding=encoding)
+    else:
+        soup = BeautifulSoup(content, 'html.parser')
+    hrefs = []
+    for tag in soup.find_all(LINK_TAGS):
+        href = tag.get('href')
+        if href:
+            hrefs.append(href)
+            if anchors is not None and tag.name == 'a':
+                _add_anchor(anchors, href, tag.get_text(' '))
+    return hrefs
+
+
+PARSER_BACKENDS = {
+    'lxml': _hrefs_lxml,
+    'tokenizer': _hrefs_tokenizer,
+    'bs4': _hrefs_bs4,
+}
+
+
+def extract_page(content, encoding=None, backend='lxml', want_links=True, timings=None, anchors=None):
+    """
+    Extract (emails, hrefs) from a page in two passes over its bytes.
+
+    find_emails first scans around each '@' character, then the parser
+    backend reads the markup once for hrefs (and link text). The scan is
+    not folded into the parser, whose text callbacks miss addresses in
+    attributes and comments that utils.extract_emails finds. Emails are
+    the text emails found by find_emails plus the decoded targets of
+    mailto: links (e.g. percent- or entity-encoded addresses the text
+    scan cannot see). hrefs are the raw href values of <a> and
+    <link> tags, not yet resolved. With want_links=False the markup is
+    not parsed and mailto: targets are picked up with a quick scan.
+
+    With a ``timings`` dict, the seconds spent on the email scan and on
+    parsing the markup are stored in it as 'extract_emails' and
+    'extract_hrefs'. With an ``anchors`` dict, the text of each <a> tag
+    is stored in it by raw href.
+    """
+    start = time.perf_counter()
+    emails = find_emails(content, encoding)
+    seen = set(emails)
+    hrefs = []
+    scanned = time.perf_counter()
+
+    if want_links:
+        hrefs = PARSER_BACKENDS[backend](content, encoding, anchors)
+        mailtos = [href for href in hrefs if href[:7].lower() == 'mailto:']
+    else:
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        mailtos = ['mailto:' + html.unescape(match.group(1).decode('utf-8', 'replace'))
+                   for match in _MAILTO_PATTERN.finditer(data)]
+
+    parsed = time.perf_counter()
+
+    for href in mailtos:
+        for email in parse_mailto(href):
+            if email not in seen:
+                seen.add(email)
+                emails.append(email)
+
+    if timings is not None:
+        timings['extract_emails'] = scanned - start + time.perf_counter() - parsed
+        timings['extract_hrefs'] = parsed - scanned
+    return emails, hrefs
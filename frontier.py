@@ -0,0 +1,276 @@
+"""
+Crawl Frontier Module
+"""
+
+import math
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+from politeness import get_host
+from config import FRONTIER_MEMORY_LIMIT
+
+
+class Frontier:
+    """
+    Thread-safe queue of (url, depth) pairs shared by all crawl workers.
+
+    Workers call ``get()`` as soon as they are free and ``task_done()``
+    when they finish an item, so links discovered by one worker are
+    available to the others immediately. The crawl is finished when the
+    queue is empty and no item is in flight.
+
+    URLs are queued per host. With a ``HostPoliteness`` attached, a URL is
+    only handed out once its host's next fetch slot has arrived, and URLs
+    from other hosts are served in the meantime. A host held by a request
+    in flight gets its next slot when ``task_done()`` is called for it.
+
+    With an ``overflow`` store (see crawl_store.CrawlStore) at most
+    ``memory_limit`` items are kept in memory. Further items are spilled
+    to the store and read back in batches as the in-memory queue drains.
+    """
+
+    # Seconds an idle get() waits before looking for new work again, for
+    # subclasses fed from outside the process (None waits for a put)
+    poll_interval = None
+
+    def __init__(self, items=(), politeness=None, overflow=None,
+                 memory_limit=FRONTIER_MEMORY_LIMIT):
+        self.politeness = politeness
+        self.overflow = overflow
+        self.memory_limit = max(1, memory_limit)
+        self._hosts = {}  # host -> deque of (url, depth)
+        self._ready = []  # heap of (ready time, seq, host), one per queued host
+        self._seq = itertools.count()
+        self._size = 0
+        self._spilled = 0  # items held by the overflow store
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.closed = False
+        self._blocked = False  # a worker waits for a host held by a request in flight
+
+        for url, depth in items:
+            self._push(url, depth)
+
+    def __len__(self):
+        return self._size + self._spilled
+
+    def _empty(self):
+        """Check if nothing is queued, in memory or on disk (caller holds the lock)"""
+        return not self._size and not self._spilled
+
+    def _ready_time(self, host):
+        """Get the time a host may next be fetched"""
+        if self.politeness is None:
+            return 0.0
+        return self.politeness.next_fetch_time(host)
+
+    def _push(self, url, depth, priority=None):
+        """Queue an item, spilling it when memory is full (caller holds the lock)"""
+        if self.overflow is not None and self._size >= self.memory_limit:
+            self.overflow.spill(url, depth)
+            self._spilled += 1
+            return
+        self._push_memory(url, depth, priority)
+
+    def _push_memory(self, url, depth, priority=None):
+        """Queue an item in memory (caller holds the lock)"""
+        host = get_host(url)
+        queue = self._hosts.get(host)
+        if queue is None:
+            queue = self._hosts[host] = self._host_queue()
+            heapq.heappush(self._ready, (self._ready_time(host), next(self._seq), host))
+        self._host_push(queue, url, depth, priority)
+        self._size += 1
+
+    # Per-host queues: FIFO here, subclasses may order them differently
+
+    def _host_queue(self):
+        return deque()
+
+    def _host_push(self, queue, url, depth, priority):
+        queue.append((url, depth))
+
+    def _host_pop(self, queue):
+        return queue.popleft()
+
+    def _host_items(self, queue):
+        return list(queue)
+
+    def _refill(self):
+        """Read spilled items back once memory is half empty (caller holds the lock)"""
+        if not self._spilled or self._size > self.memory_limit // 2:
+            return
+        rows = self.overflow.unspill(self.memory_limit - self._size)
+        for url, depth in rows:
+            self._push_memory(url, depth)
+        self._spilled = max(0, self._spilled - len(rows)) if rows else 0
+
+    def add_spilled(self, count):
+        """Count items the overflow store already holds (e.g. when resuming)"""
+        with self._cond:
+            self._spilled += count
+            self._cond.notify_all()
+
+    def _pop_ready(self):
+        """
+        Take the next item whose host is ready (caller holds the lock).
+
+        Returns (item, None) or (None, seconds until a host is ready); the
+        wait is None when nothing is queued.
+        """
+        self._refill()
+        while self._ready:
+            ready_time, _, host = self._ready[0]
+            actual = self._ready_time(host)
+            if actual != ready_time:
+                # The host was pushed back (e.g. by a Crawl-delay) or released since it was queued
+                heapq.heapreplace(self._ready, (actual, next(self._seq), host))
+                continue
+
+            now = time.monotonic()
+            if ready_time == math.inf:
+                # Only hosts with a request in flight are left; task_done() wakes the workers
+                self._blocked = True
+                return None, None
+            if ready_time > now:
+                return None, ready_time - now
+
+            heapq.heappop(self._ready)
+            queue = self._hosts[host]
+            item = self._host_pop(queue)
+            self._size -= 1
+            if self.politeness is not None:
+                self.politeness.mark_fetch(host, now)
+            if queue:
+                heapq.heappush(self._ready, (max(self._ready_time(host), now),
+                                             next(self._seq), host))
+            else:
+                del self._hosts[host]
+            self.in_flight += 1
+            return item, None
+
+        return None, None
+
+    def put(self, url, depth, priority=None):
+        """Add a URL to the frontier"""
+        with self._cond:
+            self._push(url, depth, priority)
+            self._cond.notify()
+
+    def put_many(self, items, priorities=None):
+        """Add several (url, depth) pairs to the frontier, with optional priorities"""
+        with self._cond:
+            count = 0
+            for url, depth in items:
+                self._push(url, depth, priorities[count] if priorities is not None else None)
+                count += 1
+            if count:
+                self._cond.notify(count)
+
+    def get(self):
+        """
+        Take the next URL, blocking while other workers may still add more.
+
+        Returns None once the crawl is finished or the frontier is closed.
+        """
+        with self._cond:
+            while True:
+                if self.closed:
+                    return None
+                item, wait = self._pop_ready()
+                if item is not None:
+                    return item
+                if wait is None:
+                    if self.in_flight == 0 and self._empty():
+                        return None
+                    self._cond.wait(self.poll_interval)
+                else:
+                    self._cond.wait(wait)
+
+    def poll(self):
+        """
+        Take the next ready URL without blocking.
+
+        Returns (item, None) or (None, seconds to wait); the wait is None
+        when nothing is queued.
+        """
+        with self._cond:
+            if self.closed:
+                return None, None
+            return self._pop_ready()
+
+    def task_done(self, url=None):
+        """Mark an item returned by get() or poll() as processed, releasing the host of its URL"""
+        with self._cond:
+            self.in_flight -= 1
+            released = (self.politeness is not None and url is not None
+                        and self.politeness.finish_fetch(get_host(url)))
+            # A released host, or one given back by cancel_fetch(), may be ready for waiting workers
+            if released or self._blocked or (self.in_flight == 0 and self._empty()):
+                self._blocked = False
+                self._cond.notify_all()
+
+    def is_finished(self):
+        """Check if the frontier is closed, or empty with no work in flight"""
+        with self._cond:
+            return self.closed or (self._empty() and self.in_flight == 0)
+
+    def wait(self, timeout=None):
+        """Wait until the crawl is finished or the frontier is closed"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self.closed or (self._empty() and self.in_flight == 0),
+                timeout
+            )
+
+    def close(self):
+        """Stop handing out work and wake all waiting workers"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def drain(self):
+        """Remove and return every item queued in memory"""
+        with self._cond:
+            items = [item for queue in self._hosts.values() for item in self._host_items(queue)]
+            self._hosts.clear()
+            self._ready.clear()
+            self._size = 0
+            return items
+
+
+class PriorityFrontier(Frontier):
+    """
+    Frontier that hands out each host's highest-priority URL first.
+
+    Hosts are still scheduled by politeness exactly as in Frontier; only
+    the order of the URLs within a host changes. Items are put with the
+    priority computed by a scoring.LinkScorer where the link was found;
+    items without one (seeds, URLs read back from the overflow store or
+    leased from a broker) are scored by URL and depth alone. Equal
+    priorities keep their discovery order, so without a scorer (or with
+    one that returns a constant) the crawl is breadth-first.
+    """
+
+    def __init__(self, scorer, items=(), politeness=None, overflow=None,
+                 memory_limit=FRONTIER_MEMORY_LIMIT):
+        self.scorer = scorer
+        super().__init__(items, politeness, overflow, memory_limit)
+
+    def _host_queue(self):
+        return []
+
+    def _host_push(self, queue, url, depth, priority):
+        if priority is None:
+            priority = self.scorer.score(url, depth) if self.scorer is not None else 0
+        heapq.heappush(queue, (-priority, next(self._seq), url, depth))
+
+    def _host_pop(self, queue):
+        _, _, url, depth = heapq.heappop(queue)
+        return url, depth
+
+    def _host_items(self, queue):
+        return [(url, depth) for _, _, url, depth in sorted(queue)]
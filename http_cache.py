@@ -0,0 +1,216 @@
+"""
+Conditional-GET HTTP Cache Module
+"""
+
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+from config import HTTP_CACHE_MAX_BYTES
+
+# Returned by fetchers when a conditional GET was answered with 304
+NOT_MODIFIED = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    want_links INTEGER NOT NULL,
+    same_domain_url TEXT,
+    link_filter TEXT,
+    emails TEXT NOT NULL,
+    links TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used);
+CREATE TABLE IF NOT EXISTS crawls (
+    target_url TEXT PRIMARY KEY,
+    emails TEXT NOT NULL,
+    finished REAL NOT NULL
+);
+"""
+
+
+def content_fingerprint(content):
+    """Hash a page body with runs of whitespace collapsed"""
+    if isinstance(content, str):
+        content = content.encode('utf-8', 'surrogatepass')
+    return hashlib.blake2b(b' '.join(content.split()), digest_size=16).hexdigest()
+
+
+class CacheEntry:
+    """Validators and extraction results stored for one URL"""
+
+    def __init__(self, url, etag, last_modified, want_links, same_domain_url, emails, links,
+                 fingerprint=None, link_filter=None):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.want_links = want_links
+        self.same_domain_url = same_domain_url
+        self.link_filter = link_filter
+        self.emails = emails
+        self.links = links
+        self.fingerprint = fingerprint
+
+    def conditional_headers(self):
+        """Get the If-None-Match / If-Modified-Since headers for a revalidation"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def parsed(self):
+        """Get the stored results in the (emails, links, error, anchors, simhash, rejected) form of parse_page"""
+        # Link text and SimHash are not stored, so cached links are scored by URL alone
+        # and cached pages are not checked for near-duplicates
+        return list(self.emails), list(self.links), None, {}, None, {}
+
+
+def get_validators(headers):
+    """Get the (ETag, Last-Modified) validators of a response's headers"""
+    return headers.get('ETag'), headers.get('Last-Modified')
+
+
+class HttpCache:
+    """
+    On-disk cache of page validators and extraction results.
+
+    Only the ETag / Last-Modified validators, a fingerprint of the body
+    and the emails and links extracted from a page are stored, not the
+    page itself: a 304 answer to a conditional GET, or a body with an
+    unchanged fingerprint, reuses them without parsing again. An entry
+    is only used when it was parsed with the same link settings a
+    request needs, including the link filter (``link_filter``, see
+    url_filter.UrlFilter.digest) its links were kept by. The least
+    recently used entries are evicted once the stored results exceed
+    ``max_bytes``.
+    """
+
+    def __init__(self, path, max_bytes=HTTP_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(pages)')]
+        if 'fingerprint' not in columns:
+            # Cache files written before fingerprints were stored
+            self._conn.execute('ALTER TABLE pages ADD COLUMN fingerprint TEXT')
+        if 'link_filter' not in columns:
+            # Cache files written before link filters were stored: their links are never reused
+            self._conn.execute('ALTER TABLE pages ADD COLUMN link_filter TEXT')
+        self._conn.commit()
+        self._size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+
+    def lookup(self, url, want_links, same_domain_url=None, link_filter=None):
+        """Get the entry that can answer a request for a URL, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified, want_links, same_domain_url, emails, links, fingerprint, '
+                'link_filter FROM pages WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        etag, last_modified, has_links, cached_domain_url, emails, links, fingerprint, cached_filter = row
+        if (want_links and not has_links) or cached_domain_url != same_domain_url:
+            return None
+        if want_links and cached_filter != link_filter:
+            # Links kept under other include/exclude or domain rules
+            return None
+        return CacheEntry(url, etag, last_modified, bool(has_links), cached_domain_url,
+                          json.loads(emails), json.loads(links), fingerprint, cached_filter)
+
+    def put(self, url, etag, last_modified, want_links, same_domain_url, emails, links,
+            fingerprint=None, link_filter=None):
+        """Store the validators, fingerprint and results of a downloaded page"""
+        if not etag and not last_modified and not fingerprint:
+            return
+        emails_json = json.dumps(emails)
+        links_json = json.dumps(links)
+        size = (len(url) + len(emails_json) + len(links_json) + len(etag or '')
+                + len(last_modified or '') + len(fingerprint or '') + len(link_filter or ''))
+
+        with self._lock:
+            with self._conn:
+                old = self._conn.execute('SELECT size FROM pages WHERE url = ?', (url,)).fetchone()
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO pages (url, etag, last_modified, want_links, same_domain_url, '
+                    'link_filter, emails, links, size, last_used, fingerprint) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (url, etag, last_modified, int(want_links), same_domain_url, link_filter,
+                     emails_json, links_json, size, time.time(), fingerprint)
+                )
+                self._size += size - (old[0] if old else 0)
+                if self._size > self.max_bytes:
+                    self._evict()
+
+    def touch(self, url):
+        """Mark an entry as used by a 304 answer"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute('UPDATE pages SET last_used = ? WHERE url = ?', (time.time(), url))
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits (caller holds the lock)"""
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute('SELECT url, size FROM pages ORDER BY last_used').fetchall()
+        for url, size in rows:
+            if self._size <= target:
+                break
+            self._conn.execute('DELETE FROM pages WHERE url = ?', (url,))
+            self._size -= size
+            self.evictions += 1
+
+    def previous_emails(self, target_url):
+        """Get the emails of the last finished crawl of a target, or None"""
+        with self._lock:
+            row = self._conn.execute('SELECT emails FROM crawls WHERE target_url = ?',
+                                     (target_url,)).fetchone()
+        return set(json.loads(row[0])) if row else None
+
+    def save_emails(self, target_url, emails):
+        """Remember the emails of a finished crawl for the next diff"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute('INSERT OR REPLACE INTO crawls VALUES (?, ?, ?)',
+                                   (target_url, json.dumps(sorted(emails)), time.time()))
+
+    def record(self, hit):
+        """Count a request that was answered from the cache or not"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_stats(self):
+        """Get cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'cache_hits': self.hits,
+                'cache_misses': self.misses,
+                'cache_hit_ratio': self.hits / lookups if lookups else 0.0,
+                'cache_evictions': self.evictions,
+                'cache_bytes': self._size
+            }
+
+    def close(self):
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
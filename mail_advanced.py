@@ -19,9 +19,19 @@ from urllib.parse import urlparse
 
 from utils import print_banner, print_colored
 from scraper import EmailScraper
-from exporter import DataExporter
+from exporter import DataExporter, create_sinks
+from crawl_store import load_config
+from distributed import Coordinator, DistributedWorker, load_config as load_broker_config
+from seeds import load_seeds
+from url_filter import UrlFilter
+from dns_cache import parse_server
 from termcolor import colored
-from config import OUTPUT_FORMATS, DEFAULT_DEPTH, DEFAULT_THREADS
+from config import (
+    OUTPUT_FORMATS, STREAM_FORMATS, DEFAULT_DEPTH, DEFAULT_THREADS, DEFAULT_CONCURRENCY, ENGINES,
+    SEEN_STORES, SEEN_FP_RATE, PARSERS, DEFAULT_PARSE_WORKERS,
+    SESSION_MODES, DEFAULT_MAX_PAGE_BYTES, HTTP_CACHE_MAX_BYTES, MAX_SOURCES_PER_EMAIL, PRIORITIES,
+    NEAR_DUP_DISTANCE
+)
 
 def validate_url(url):
     """Validate URL format"""
@@ -42,14 +52,41 @@ Examples:
   python mail_advanced.py -u https://example.com -d 5 -t 10
   python mail_advanced.py -u https://example.com --cloudflare --no-robots
   python mail_advanced.py -u https://example.com -o txt,csv,json
+  python mail_advanced.py -u https://example.com --engine async --concurrency 200
+  python mail_advanced.py -u https://example.com -t 50 --parse-workers 4
+  python mail_advanced.py -u https://example.com --state-file crawl.db
+  python mail_advanced.py --resume crawl.db
+  python mail_advanced.py -u https://example.com --http-cache cache.db
+  python mail_advanced.py -u https://example.com --http-cache cache.db --incremental
+  python mail_advanced.py -u https://example.com --stream ndjson,csv
+  python mail_advanced.py --seeds sites.txt -d 2 --seed-pages 200
+  python mail_advanced.py -u https://example.com -d 5 --priority contact --max-pages 300
+  python mail_advanced.py -u https://example.com --ignore-param example.com:sort --ignore-param ref
+  python mail_advanced.py -u https://example.com --exclude '/(tag|feed)/' --include '/(team|contact)'
+  python mail_advanced.py -u https://example.com --allow-external --allow-domain example.com --deny-domain cdn.example.com
+  python mail_advanced.py -u https://example.com --allow-external --dns-cache --dns-server 1.1.1.1 --dns-server 8.8.8.8
+  python mail_advanced.py -u https://example.com --broker crawl.broker --shards 4
+  python mail_advanced.py --broker crawl.broker --shard 2
+  python mail_advanced.py -u https://example.com --metrics-file metrics.json --profile crawl.folded
+  python mail_advanced.py -u https://example.com --metrics-port 9100
         """
     )
     
-    # Required arguments
+    # Required arguments (unless resuming or crawling a seeds file)
     parser.add_argument('-u', '--url', 
-                       required=True,
                        help='Target URL to scrape')
     
+    parser.add_argument('--seeds',
+                       metavar='FILE',
+                       default=None,
+                       help='Crawl every URL listed in a file (one per line, optionally followed '
+                            'by depth=N pages=N) in one batch')
+    
+    parser.add_argument('--seed-pages',
+                       type=int,
+                       default=0,
+                       help='Page budget of each seed in batch mode, 0 for no limit (default: 0)')
+    
     # Optional arguments
     parser.add_argument('-d', '--depth',
                        type=int,
@@ -61,15 +98,147 @@ Examples:
                        default=DEFAULT_THREADS,
                        help=f'Number of threads (default: {DEFAULT_THREADS})')
     
+    parser.add_argument('--engine',
+                       choices=ENGINES,
+                       default='threads',
+                       help='Crawl engine: thread pool or asyncio event loop (default: threads)')
+    
+    parser.add_argument('--concurrency',
+                       type=int,
+                       default=DEFAULT_CONCURRENCY,
+                       help=f'Requests kept in flight by the async engine (default: {DEFAULT_CONCURRENCY})')
+    
+    parser.add_argument('--seen-store',
+                       choices=SEEN_STORES,
+                       default='exact',
+                       help='How visited/queued URLs are remembered: exact strings, 64-bit '
+                            'fingerprints or a Bloom filter (default: exact)')
+    
+    parser.add_argument('--seen-fp-rate',
+                       type=float,
+                       default=SEEN_FP_RATE,
+                       help=f'False-positive rate of the Bloom filter seen store (default: {SEEN_FP_RATE})')
+    
+    parser.add_argument('--parser',
+                       choices=PARSERS,
+                       default='lxml',
+                       help='HTML parser backend for link extraction (default: lxml)')
+    
+    parser.add_argument('--parse-workers',
+                       type=int,
+                       default=DEFAULT_PARSE_WORKERS,
+                       help='Parser processes for HTML parsing, 0 parses on the fetch threads '
+                            f'(default: {DEFAULT_PARSE_WORKERS})')
+    
+    parser.add_argument('--session-mode',
+                       choices=SESSION_MODES,
+                       default='shared',
+                       help='One HTTP session shared by all threads, or one per thread (default: shared)')
+    
+    parser.add_argument('--pool-size',
+                       type=int,
+                       default=None,
+                       help='Per-host connection pools kept alive (default: max(10, threads))')
+    
+    parser.add_argument('--pool-per-host',
+                       type=int,
+                       default=None,
+                       help='Keep-alive connections per host (default: threads when shared, 1 per thread)')
+    
+    parser.add_argument('--max-page-bytes',
+                       type=int,
+                       default=DEFAULT_MAX_PAGE_BYTES,
+                       help=f'Stop reading a page body after this many bytes (default: {DEFAULT_MAX_PAGE_BYTES})')
+    
+    parser.add_argument('--priority',
+                       choices=PRIORITIES,
+                       default='bfs',
+                       help='Crawl order: breadth-first, or contact/about/team-like pages first, '
+                            'scored by URL, link text, depth and the linking page\'s emails (default: bfs)')
+    
+    parser.add_argument('--max-pages',
+                       type=int,
+                       default=0,
+                       help='Stop after fetching this many pages, 0 for no limit (default: 0)')
+    
+    parser.add_argument('--no-canonicalize',
+                       action='store_true',
+                       help='Fetch links exactly as written instead of merging spellings of one URL '
+                            '(scheme, www., trailing slash, default port, tracking parameters, query order)')
+    
+    parser.add_argument('--ignore-param',
+                       metavar='[HOST:]NAME',
+                       action='append',
+                       default=[],
+                       help='Also drop this query parameter from links (\'*\' matches any ending), '
+                            'on HOST only if given; can be repeated')
+    
+    parser.add_argument('--near-duplicates',
+                       action='store_true',
+                       help='Do not follow the links of pages that nearly duplicate an earlier page '
+                            '(SimHash), and skip URL patterns that keep producing them (crawler traps)')
+    
+    parser.add_argument('--near-dup-distance',
+                       type=int,
+                       default=NEAR_DUP_DISTANCE,
+                       help=f'Max differing SimHash bits (of 64) between near-duplicate pages '
+                            f'(default: {NEAR_DUP_DISTANCE})')
+    
+    parser.add_argument('--state-file',
+                       default=None,
+                       help='Save crawl state (frontier, seen URLs, findings) to this SQLite file')
+    
+    parser.add_argument('--resume',
+                       metavar='STATE_FILE',
+                       default=None,
+                       help='Resume the crawl saved in a state file; URL, depth and domain '
+                            'settings are taken from it')
+    
+    parser.add_argument('--http-cache',
+                       metavar='CACHE_FILE',
+                       default=None,
+                       help='Revalidate pages with conditional GETs and reuse the results of '
+                            'unchanged pages from this SQLite cache file')
+    
+    parser.add_argument('--http-cache-size',
+                       type=int,
+                       default=HTTP_CACHE_MAX_BYTES,
+                       help=f'Bytes of cached results kept before LRU eviction (default: {HTTP_CACHE_MAX_BYTES})')
+    
+    parser.add_argument('--incremental',
+                       action='store_true',
+                       help='Skip parsing pages whose body is unchanged since the last crawl and '
+                            'report emails added/removed (needs --http-cache)')
+    
+    parser.add_argument('--broker',
+                       metavar='FILE',
+                       default=None,
+                       help='SQLite file holding the shared frontier of a distributed crawl')
+    
+    parser.add_argument('--shards',
+                       type=int,
+                       default=0,
+                       help='Coordinate a distributed crawl with N shards (URLs are split by host '
+                            'hash), running a worker process per shard (needs --broker)')
+    
+    parser.add_argument('--shard',
+                       type=int,
+                       default=None,
+                       help='Join the distributed crawl in --broker as the worker of shard N')
+    
+    parser.add_argument('--no-local-workers',
+                       action='store_true',
+                       help='Coordinate only; the shard workers are started elsewhere with --shard')
+    
     parser.add_argument('--delay-min',
                        type=float,
                        default=1.0,
-                       help='Minimum delay between requests in seconds (default: 1.0)')
+                       help='Minimum delay between requests to the same host in seconds (default: 1.0)')
     
     parser.add_argument('--delay-max',
                        type=float,
                        default=3.0,
-                       help='Maximum delay between requests in seconds (default: 3.0)')
+                       help='Maximum delay between requests to the same host in seconds (default: 3.0)')
     
     parser.add_argument('--cloudflare',
                        action='store_true',
@@ -83,14 +252,79 @@ Examples:
                        action='store_true',
                        help='Allow crawling external domains')
     
+    parser.add_argument('--include',
+                       metavar='REGEX',
+                       action='append',
+                       default=[],
+                       help='Only follow links matching one of these regexes (searched in the whole URL); '
+                            'can be repeated')
+    
+    parser.add_argument('--exclude',
+                       metavar='REGEX',
+                       action='append',
+                       default=[],
+                       help='Do not follow links matching any of these regexes; can be repeated')
+    
+    parser.add_argument('--allow-domain',
+                       metavar='DOMAIN',
+                       action='append',
+                       default=[],
+                       help='Only follow links to this domain or its subdomains; can be repeated')
+    
+    parser.add_argument('--deny-domain',
+                       metavar='DOMAIN',
+                       action='append',
+                       default=[],
+                       help='Never follow links to this domain or its subdomains; can be repeated')
+    
+    parser.add_argument('--dns-cache',
+                       action='store_true',
+                       help='Cache host addresses for their record TTL instead of asking the system resolver '
+                            'on every new connection')
+    
+    parser.add_argument('--dns-server',
+                       metavar='HOST[:PORT]',
+                       action='append',
+                       default=[],
+                       help='Nameserver queried by the DNS cache instead of those in /etc/resolv.conf; '
+                            'implies --dns-cache; can be repeated')
+    
     parser.add_argument('-o', '--output',
                        default='txt,csv',
                        help=f'Output formats: {",".join(OUTPUT_FORMATS)} (default: txt,csv)')
     
+    parser.add_argument('--max-sources',
+                       type=int,
+                       default=MAX_SOURCES_PER_EMAIL,
+                       help='Keep only the first N source URLs of each email plus a count, '
+                            '0 keeps all (default: 0)')
+    
+    parser.add_argument('--stream',
+                       default='',
+                       help=f'Formats written while crawling, one row per finding: '
+                            f'{",".join(STREAM_FORMATS)} (default: none)')
+    
     parser.add_argument('--output-dir',
                        default='.',
                        help='Output directory for results (default: current directory)')
     
+    parser.add_argument('--metrics-file',
+                       metavar='FILE',
+                       default=None,
+                       help='Write per-stage timing histograms and the crawl statistics to a JSON file')
+    
+    parser.add_argument('--metrics-port',
+                       type=int,
+                       metavar='PORT',
+                       default=None,
+                       help='Serve live Prometheus metrics at http://127.0.0.1:PORT/metrics while crawling')
+    
+    parser.add_argument('--profile',
+                       metavar='FILE',
+                       default=None,
+                       help='Sample the crawl threads\' stacks and write them as collapsed stacks '
+                            '(for flame graph tools)')
+    
     parser.add_argument('-v', '--verbose',
                        action='store_true',
                        help='Enable verbose output')
@@ -158,13 +392,51 @@ def interactive_mode():
         'url': url,
         'depth': depth,
         'threads': threads,
+        'engine': 'threads',
+        'concurrency': DEFAULT_CONCURRENCY,
+        'seen_store': 'exact',
+        'seen_fp_rate': SEEN_FP_RATE,
+        'parser': 'lxml',
+        'parse_workers': DEFAULT_PARSE_WORKERS,
+        'session_mode': 'shared',
+        'pool_size': None,
+        'pool_per_host': None,
+        'max_page_bytes': DEFAULT_MAX_PAGE_BYTES,
+        'priority': 'bfs',
+        'max_pages': 0,
+        'no_canonicalize': False,
+        'ignore_param': [],
+        'near_duplicates': False,
+        'near_dup_distance': NEAR_DUP_DISTANCE,
+        'state_file': None,
+        'resume': None,
+        'seeds': None,
+        'seed_pages': 0,
+        'http_cache': None,
+        'http_cache_size': HTTP_CACHE_MAX_BYTES,
+        'incremental': False,
+        'broker': None,
+        'shards': 0,
+        'shard': None,
+        'no_local_workers': False,
         'delay_min': 1.0,
         'delay_max': 3.0,
         'cloudflare': cloudflare,
         'no_robots': ignore_robots,
         'allow_external': allow_external,
+        'include': [],
+        'exclude': [],
+        'allow_domain': [],
+        'deny_domain': [],
+        'dns_cache': False,
+        'dns_server': [],
         'output': ','.join(output_formats),
+        'max_sources': MAX_SOURCES_PER_EMAIL,
+        'stream': '',
         'output_dir': '.',
+        'metrics_file': None,
+        'metrics_port': None,
+        'profile': None,
         'verbose': False
     }
 
@@ -185,6 +457,78 @@ def main():
     else:
         args = parser.parse_args()
     
+    if not 0 <= args.near_dup_distance < 32:
+        parser.error('--near-dup-distance must be between 0 and 31')
+    try:
+        UrlFilter(include=args.include, exclude=args.exclude)
+        for server in args.dns_server:
+            parse_server(server)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    # Distributed crawls keep their URL, depth and domain settings in the broker
+    distributed = args.shards > 0 or args.shard is not None
+    if distributed:
+        if not args.broker:
+            parser.error('--shards and --shard need --broker')
+        if args.shards > 0 and args.shard is not None:
+            parser.error('--shards (coordinator) and --shard (worker) cannot be combined')
+        unsupported = [flag for flag, value in (('--seeds', args.seeds), ('--state-file', args.state_file),
+                                                ('--resume', args.resume), ('--http-cache', args.http_cache),
+                                                ('--incremental', args.incremental), ('--stream', args.stream),
+                                                ('--max-pages', args.max_pages))
+                       if value]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)} cannot be used in a distributed crawl")
+        # The coordinator does not crawl; workers are instrumented with --shard
+        instrumented = [flag for flag, value in (('--metrics-file', args.metrics_file),
+                                                 ('--profile', args.profile),
+                                                 ('--metrics-port', args.metrics_port is not None)) if value]
+        if args.shards > 0 and instrumented:
+            parser.error(f"{', '.join(instrumented)} cannot be used by the coordinator, pass them to --shard workers")
+        config = load_broker_config(args.broker)
+        if config is not None:
+            args.url = config['target_url']
+        elif args.shard is not None:
+            print_colored(f"Error: No distributed crawl in {args.broker}", 'red', 'bold')
+            sys.exit(1)
+        elif not args.url:
+            parser.error('the following arguments are required: -u/--url (or an existing --broker)')
+    
+    # Resume a saved crawl with its own URL, depth and domain settings
+    state_file = args.state_file
+    if args.resume:
+        state = load_config(args.resume)
+        if state is None:
+            print_colored(f"Error: No saved crawl in {args.resume}", 'red', 'bold')
+            sys.exit(1)
+        state_file = args.resume
+        args.url = state['target_url']
+        args.depth = state['max_depth']
+        args.allow_external = not state['same_domain_only']
+    elif state_file and load_config(state_file) is not None:
+        print_colored(f"Error: {state_file} already holds a crawl, use --resume {state_file}", 'red', 'bold')
+        sys.exit(1)
+    elif not args.url and not args.seeds:
+        parser.error('the following arguments are required: -u/--url (or --seeds / --resume)')
+    
+    seeds = None
+    if args.seeds and not args.resume:
+        try:
+            seeds = load_seeds(args.seeds, args.depth, args.seed_pages)
+        except (OSError, ValueError) as e:
+            print_colored(f"Error: Cannot read seeds: {str(e)}", 'red', 'bold')
+            sys.exit(1)
+        invalid_seeds = [seed.url for seed in seeds if not validate_url(seed.url)]
+        if not seeds or invalid_seeds:
+            print_colored(f"Error: No valid seeds in {args.seeds} {', '.join(invalid_seeds)}", 'red', 'bold')
+            sys.exit(1)
+        print_colored(f"Loaded {len(seeds)} seeds from {args.seeds}", 'green')
+        args.url = args.url or seeds[0].url
+    
+    if args.incremental and not args.http_cache:
+        parser.error('--incremental needs --http-cache')
+    
     # Validate URL
     if not validate_url(args.url):
         print_colored("Error: Invalid URL format!", 'red', 'bold')
@@ -198,21 +542,81 @@ def main():
         print_colored(f"Available formats: {', '.join(OUTPUT_FORMATS)}", 'yellow')
         sys.exit(1)
     
+    stream_formats = [fmt.strip() for fmt in args.stream.split(',') if fmt.strip()]
+    invalid_formats = [fmt for fmt in stream_formats if fmt not in STREAM_FORMATS]
+    if invalid_formats:
+        print_colored(f"Error: Invalid stream formats: {', '.join(invalid_formats)}", 'red', 'bold')
+        print_colored(f"Available formats: {', '.join(STREAM_FORMATS)}", 'yellow')
+        sys.exit(1)
+    
     # Create output directory if it doesn't exist
     if not os.path.exists(args.output_dir):
         os.makedirs(args.output_dir)
         print_colored(f"Created output directory: {args.output_dir}", 'green')
     
+    # Crawl settings shared by single crawls and distributed workers
+    crawl_options = {
+        'max_threads': args.threads,
+        'delay_range': (args.delay_min, args.delay_max),
+        'use_cloudflare_bypass': args.cloudflare,
+        'respect_robots': not args.no_robots,
+        'engine': args.engine,
+        'concurrency': args.concurrency,
+        'seen_store': args.seen_store,
+        'seen_fp_rate': args.seen_fp_rate,
+        'parser': args.parser,
+        'parse_workers': args.parse_workers,
+        'session_mode': args.session_mode,
+        'pool_size': args.pool_size,
+        'pool_per_host': args.pool_per_host,
+        'max_page_bytes': args.max_page_bytes,
+        'priority': args.priority,
+        'canonicalize': not args.no_canonicalize,
+        'ignore_params': args.ignore_param,
+        'near_duplicates': args.near_duplicates,
+        'near_dup_distance': args.near_dup_distance,
+        'include': args.include,
+        'exclude': args.exclude,
+        'allow_domains': args.allow_domain,
+        'deny_domains': args.deny_domain,
+        'dns_cache': args.dns_cache or bool(args.dns_server),
+        'dns_servers': args.dns_server
+    }
+    
     # Initialize scraper
-    scraper = EmailScraper(
-        target_url=args.url,
-        max_depth=args.depth,
-        max_threads=args.threads,
-        delay_range=(args.delay_min, args.delay_max),
-        use_cloudflare_bypass=args.cloudflare,
-        respect_robots=not args.no_robots,
-        same_domain_only=not args.allow_external
-    )
+    if args.shard is not None:
+        scraper = DistributedWorker(args.broker, args.shard, profile=args.profile,
+                                    metrics_file=args.metrics_file, metrics_port=args.metrics_port,
+                                    **crawl_options)
+    elif args.shards > 0:
+        scraper = Coordinator(
+            args.broker,
+            target_url=args.url,
+            shards=args.shards,
+            max_depth=args.depth,
+            same_domain_only=not args.allow_external,
+            local_workers=not args.no_local_workers,
+            max_sources=args.max_sources,
+            worker_options=crawl_options
+        )
+    else:
+        scraper = EmailScraper(
+            target_url=args.url,
+            max_depth=args.depth,
+            same_domain_only=not args.allow_external,
+            state_file=state_file,
+            http_cache=args.http_cache,
+            http_cache_size=args.http_cache_size,
+            incremental=args.incremental,
+            sinks=create_sinks(stream_formats, args.output_dir),
+            max_sources=args.max_sources,
+            seeds=seeds,
+            profile=args.profile,
+            metrics_file=args.metrics_file,
+            metrics_port=args.metrics_port,
+            max_pages=args.max_pages,
+            **crawl_options
+        )
     
     try:
         # Start scraping
@@ -222,8 +626,10 @@ def main():
         scraper.print_summary()
         
         # Export results
-        if results['emails']:
-            exporter = DataExporter(results, args.url)
+        if args.shard is not None:
+            print_colored(f"\nFindings saved in {args.broker}; the coordinator exports the merged results", 'cyan')
+        elif results['emails']:
+            exporter = DataExporter(results, f"{len(seeds)} seeds from {args.seeds}" if seeds else args.url)
             
             # Change to output directory
             original_dir = os.getcwd()
@@ -0,0 +1,188 @@
+"""
+Crawl Metrics Module
+"""
+
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+from config import METRICS_BUCKETS
+
+
+class Histogram:
+    """
+    Latency histogram with fixed bucket bounds (in seconds).
+
+    ``observe()`` is a binary search and three additions under a lock, so
+    it is cheap enough to stay on for every page. Quantiles are estimated
+    from the buckets, interpolating inside the bucket they fall in.
+    """
+
+    def __init__(self, bounds=METRICS_BUCKETS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, fraction):
+        """Estimate a quantile in seconds, or None when nothing was observed"""
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+            top = self.max
+        if not count:
+            return None
+
+        rank = fraction * count
+        seen = 0
+        for index, bucket in enumerate(counts):
+            if bucket and seen + bucket >= rank:
+                low = self.bounds[index - 1] if index else 0.0
+                high = self.bounds[index] if index < len(self.bounds) else top
+                return min(top, low + (high - low) * (rank - seen) / bucket)
+            seen += bucket
+        return top
+
+    def to_dict(self):
+        """Get the histogram as cumulative bucket counts, Prometheus style"""
+        with self._lock:
+            counts = list(self.counts)
+            result = {'count': self.count, 'sum': self.sum, 'max': self.max}
+        cumulative = 0
+        buckets = []
+        for bound, bucket in zip(self.bounds + ['+Inf'], counts):
+            cumulative += bucket
+            buckets.append([bound, cumulative])
+        result['buckets'] = buckets
+        return result
+
+
+class CrawlMetrics:
+    """
+    Per-stage timing histograms of a crawl.
+
+    Stages are created on first use, so any part of the crawler can time
+    itself with ``with metrics.time('stage'):`` or report a duration it
+    already measured with ``observe()``.
+    """
+
+    def __init__(self):
+        self.stages = {}  # stage name -> Histogram
+        self._lock = threading.Lock()
+
+    def _stage(self, stage):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, Histogram())
+        return histogram
+
+    def observe(self, stage, seconds):
+        """Record one duration of a stage"""
+        self._stage(stage).observe(seconds)
+
+    def observe_many(self, timings):
+        """Record a {stage: seconds} dict of durations"""
+        for stage, seconds in timings.items():
+            self._stage(stage).observe(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        """Time the body of a with block, also when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stage(stage).observe(time.perf_counter() - start)
+
+    def histograms(self):
+        """Get a {stage: Histogram} snapshot that is safe to iterate while crawling"""
+        with self._lock:
+            return dict(self.stages)
+
+    def summary(self):
+        """Get {stage: {'count', 'seconds', 'mean_ms', 'p50_ms', 'p99_ms', 'max_ms'}}"""
+        result = {}
+        for stage, histogram in sorted(self.stages.items()):
+            p50 = histogram.quantile(0.50)
+            p99 = histogram.quantile(0.99)
+            result[stage] = {
+                'count': histogram.count,
+                'seconds': histogram.sum,
+                'mean_ms': histogram.sum / histogram.count * 1000 if histogram.count else 0.0,
+                'p50_ms': p50 * 1000 if p50 is not None else 0.0,
+                'p99_ms': p99 * 1000 if p99 is not None else 0.0,
+                'max_ms': histogram.max * 1000
+            }
+        return result
+
+    def get_stats(self):
+        """Get the total seconds of each stage as flat counters for the crawl statistics"""
+        return {f'stage_{stage}_seconds': histogram.sum for stage, histogram in self.stages.items()}
+
+    def to_dict(self):
+        """Get every stage's summary and buckets"""
+        summary = self.summary()
+        return {
+            stage: {**summary[stage], 'histogram': self.stages[stage].to_dict()}
+            for stage in summary
+        }
+
+    def dump(self, path, statistics=None):
+        """Write the stage metrics, and optionally the crawl statistics, as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'statistics': statistics or {}, 'stages': self.to_dict()}, f, indent=2)
+
+
+class TimedLock:
+    """
+    Lock that records how long callers wait for it.
+
+    An uncontended acquire costs one extra non-blocking attempt and is
+    not timed; only waits are recorded, as the ``stage`` histogram, while
+    ``acquisitions`` counts every acquire so the two give a contention
+    rate.
+    """
+
+    def __init__(self, metrics, stage='lock_wait'):
+        self.metrics = metrics
+        self.stage = stage
+        self.acquisitions = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, blocking=True, timeout=-1):
+        if not self._lock.acquire(False):
+            if not blocking:
+                return False
+            start = time.perf_counter()
+            if not self._lock.acquire(True, timeout):
+                return False
+            self.metrics.observe(self.stage, time.perf_counter() - start)
+        self.acquisitions += 1  # safe, the lock is held
+        return True
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
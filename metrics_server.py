@@ -0,0 +1,144 @@
+"""
+Live Metrics Endpoint Module
+"""
+
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from url_filter import FILTERS
+from config import METRICS_HOST, METRICS_MAX_HOSTS
+
+PREFIX = 'email_scraper'
+
+# stats key -> (metric name, type, help)
+STAT_METRICS = [
+    ('pages_visited', 'pages_fetched_total', 'counter', 'Pages fetched and processed'),
+    ('pages_failed', 'pages_failed_total', 'counter', 'Pages whose request failed'),
+    ('bytes_downloaded', 'bytes_downloaded_total', 'counter', 'Response body bytes downloaded'),
+    ('download_time', 'download_seconds_total', 'counter', 'Seconds spent reading response bodies'),
+    ('fetches_saved', 'fetches_saved_total', 'counter', 'Fetches avoided by merging spellings of one URL'),
+    ('emails_found', 'emails_found', 'gauge', 'Unique emails found so far'),
+]
+
+
+def _label(value):
+    """Escape a label value for the text exposition format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsServer:
+    """
+    Serves the live counters of a running EmailScraper at /metrics.
+
+    The output is the Prometheus text format, so the endpoint can be
+    scraped by Prometheus or read with curl. Every request takes a fresh
+    snapshot; nothing is computed while no one is asking.
+    """
+
+    def __init__(self, scraper, port, host=METRICS_HOST):
+        self.scraper = scraper
+        self.host = host
+        self.port = port
+        self.server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def start(self):
+        """Start serving on a background thread; port 0 picks a free port"""
+        self.server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True).start()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def render(self):
+        """Get every metric in the text exposition format"""
+        scraper = self.scraper
+        with scraper.lock:
+            stats = dict(scraper.stats)
+            host_pages = dict(scraper.host_pages)
+            host_failures = dict(scraper.host_failures)
+        frontier = scraper.urls_queue
+
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ','.join(f'{key}="{_label(val)}"' for key, val in labels)
+                lines.append(f"{PREFIX}_{name}{suffix}{{{label_text}}} {_number(value)}"
+                             if label_text else f"{PREFIX}_{name}{suffix} {_number(value)}")
+
+        for key, name, kind, help_text in STAT_METRICS:
+            metric(name, kind, help_text, [('', (), stats[key])])
+        metric('http_requests_total', 'counter', 'HTTP requests sent',
+               [('', (), scraper.sessions.get_stats()['http_requests'])])
+        metric('frontier_size', 'gauge', 'URLs queued and not yet handed to a worker',
+               [('', (), len(frontier))])
+        metric('in_flight', 'gauge', 'URLs being fetched or parsed', [('', (), frontier.in_flight)])
+        metric('links_rejected_total', 'counter', 'Links found on pages and not followed, per filter',
+               [('', (('filter', name),), stats[f'links_rejected_{name}']) for name in FILTERS])
+        if stats['start_time']:
+            metric('start_time_seconds', 'gauge', 'Unix time the crawl started', [('', (), stats['start_time'])])
+            metric('uptime_seconds', 'gauge', 'Seconds since the crawl started',
+                   [('', (), time.time() - stats['start_time'])])
+
+        # The busiest hosts only, so an open crawl cannot create unbounded series
+        hosts = sorted(set(host_pages) | set(host_failures),
+                       key=lambda host: host_pages.get(host, 0) + host_failures.get(host, 0),
+                       reverse=True)[:METRICS_MAX_HOSTS]
+        metric('host_pages_total', 'counter', 'Pages fetched per host',
+               [('', (('host', host),), host_pages.get(host, 0)) for host in hosts])
+        metric('host_failures_total', 'counter', 'Failed requests per host',
+               [('', (('host', host),), host_failures.get(host, 0)) for host in hosts])
+        metric('host_error_ratio', 'gauge', 'Share of requests per host that failed', [
+            ('', (('host', host),),
+             host_failures.get(host, 0) / (host_pages.get(host, 0) + host_failures.get(host, 0)))
+            for host in hosts
+        ])
+
+        samples = []
+        for stage, histogram in scraper.metrics.histograms().items():
+            data = histogram.to_dict()
+            samples.extend(('_bucket', (('stage', stage), ('le', _number(bound))), count)
+                           for bound, count in data['buckets'])
+            samples.append(('_sum', (('stage', stage),), data['sum']))
+            samples.append(('_count', (('stage', stage),), data['count']))
+        metric('stage_seconds', 'histogram', 'Time spent per crawl stage', samples)
+
+        return '\n'.join(lines) + '\n'
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = server.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
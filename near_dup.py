@@ -0,0 +1,194 @@
+"""
+Near-Duplicate Detection Module
+"""
+
+import re
+import hashlib
+import threading
+from array import array
+from urllib.parse import urlsplit
+
+from config import (
+    NEAR_DUP_DISTANCE, NEAR_DUP_SAMPLING, NEAR_DUP_MIN_FEATURES, NEAR_DUP_WORD_CACHE,
+    TRAP_MIN_PAGES, TRAP_DUPLICATE_RATIO, TRAP_MAX_PATTERNS
+)
+
+_MASK = (1 << 64) - 1
+
+# Markup, comments and script/style bodies are not page text
+_NON_TEXT = re.compile(rb'<!--.*?-->|<(script|style)\b[^>]*>.*?</\1\s*>|<[^>]*>', re.IGNORECASE | re.DOTALL)
+# Words are lower-cased letters only, so dates, counters and ids do not change the fingerprint
+_WORD_BYTES = bytes(byte | 0x20 if chr(byte).isascii() and chr(byte).isalpha() else 0x20
+                    for byte in range(256))
+_NUMBER = re.compile(r'\d+')
+
+# For each bit of a byte, the byte values that do not have it set
+_BIT_CLEAR = [bytes(value for value in range(256) if not value >> bit & 1) for bit in range(8)]
+
+_word_hashes = {}  # word -> (hash, hash rotated by 1, hash rotated by 2)
+
+
+def _rotate(value, bits):
+    return ((value << bits) | (value >> (64 - bits))) & _MASK
+
+
+def _word_hash(word):
+    hashes = _word_hashes.get(word)
+    if hashes is None:
+        value = int.from_bytes(hashlib.blake2b(word, digest_size=8).digest(), 'little')
+        hashes = (value, _rotate(value, 1), _rotate(value, 2))
+        if len(_word_hashes) < NEAR_DUP_WORD_CACHE:
+            _word_hashes[word] = hashes
+    return hashes
+
+
+def simhash(content):
+    """
+    Get the 64-bit SimHash of a page (raw bytes), or None if it has too little text.
+
+    The features are the distinct 3-word shingles of the page text; on
+    longer pages only one in NEAR_DUP_SAMPLING, picked by hash so that
+    similar pages keep the same ones. A shingle's hash is built from
+    cached word hashes, and the bit votes are counted a byte column at a
+    time.
+    """
+    words = _NON_TEXT.sub(b' ', content).translate(_WORD_BYTES).split()
+    get = _word_hashes.get
+    hashes = [get(word) or _word_hash(word) for word in words]
+    features = {first[2] ^ second[1] ^ third[0] for first, second, third in zip(hashes, hashes[1:], hashes[2:])}
+    if len(features) < NEAR_DUP_MIN_FEATURES:
+        return None
+    if len(features) > NEAR_DUP_SAMPLING * 64:
+        features = {feature for feature in features if not feature % NEAR_DUP_SAMPLING}
+
+    data = array('Q', features).tobytes()
+    half = len(features) / 2
+    fingerprint = 0
+    for position in range(8):
+        column = data[position::8]
+        for bit in range(8):
+            # Features with this bit set, against those without
+            if len(column.translate(None, _BIT_CLEAR[bit])) > half:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+
+def url_pattern(url):
+    """Get the pattern a URL is learned under: host, path with numbers as '#' and query parameter names"""
+    parts = urlsplit(url)
+    names = sorted({pair.split('=', 1)[0] for pair in parts.query.split('&') if pair})
+    pattern = parts.netloc.lower() + _NUMBER.sub('#', parts.path)
+    return f"{pattern}?{'&'.join(names)}" if names else pattern
+
+
+class SimHashIndex:
+    """
+    Fingerprints of the pages seen so far, for near-duplicate lookups.
+
+    Fingerprints are split into ``distance + 1`` bands; two fingerprints
+    at most ``distance`` bits apart agree on at least one whole band, so
+    a lookup only compares the fingerprints that share a band with it.
+    """
+
+    def __init__(self, distance=NEAR_DUP_DISTANCE):
+        self.distance = distance
+        bands = distance + 1
+        width = 64 // bands
+        self._bands = [(index * width, (1 << (64 - index * width if index == bands - 1 else width)) - 1)
+                       for index in range(bands)]
+        self._tables = [{} for _ in range(bands)]  # band value -> fingerprints
+        self.count = 0
+
+    def find(self, fingerprint):
+        """Get a stored fingerprint at most ``distance`` bits from this one, or None"""
+        for (shift, mask), table in zip(self._bands, self._tables):
+            for candidate in table.get(fingerprint >> shift & mask, ()):
+                if bin(candidate ^ fingerprint).count('1') <= self.distance:
+                    return candidate
+        return None
+
+    def add(self, fingerprint):
+        for (shift, mask), table in zip(self._bands, self._tables):
+            table.setdefault(fingerprint >> shift & mask, []).append(fingerprint)
+        self.count += 1
+
+
+class NearDuplicateDetector:
+    """
+    Finds pages that nearly duplicate an earlier page and learns crawler traps.
+
+    ``check()`` is called with the SimHash of every fetched page. A page
+    close to an earlier one that brought no new emails is a duplicate:
+    its links are not followed. Pages are also counted per URL pattern
+    (see url_pattern); once TRAP_MIN_PAGES pages of a pattern were
+    fetched and TRAP_DUPLICATE_RATIO of them were duplicates, the pattern
+    is a trap and ``prune()`` rejects its remaining URLs unfetched.
+    """
+
+    def __init__(self, distance=NEAR_DUP_DISTANCE, min_pages=TRAP_MIN_PAGES,
+                 duplicate_ratio=TRAP_DUPLICATE_RATIO):
+        self.index = SimHashIndex(distance)
+        self.min_pages = min_pages
+        self.duplicate_ratio = duplicate_ratio
+        self._lock = threading.Lock()
+        self._patterns = {}  # pattern -> [pages, duplicates, duplicate bytes]
+        self.traps = set()
+        self.duplicates = 0
+        self.duplicate_bytes = 0
+        self.pages_pruned = 0
+        self.bytes_pruned = 0.0
+
+    def check(self, url, fingerprint, size, new_emails=False):
+        """
+        Record a fetched page of ``size`` bytes, returning (duplicate, trap):
+        whether its links should be skipped, and the URL pattern that just
+        became a trap, if any.
+        """
+        pattern = url_pattern(url)
+        with self._lock:
+            duplicate = self.index.find(fingerprint) is not None
+            if not duplicate:
+                self.index.add(fingerprint)
+            duplicate = duplicate and not new_emails
+            if duplicate:
+                self.duplicates += 1
+                self.duplicate_bytes += size
+
+            counts = self._patterns.get(pattern)
+            if counts is None:
+                if len(self._patterns) >= TRAP_MAX_PATTERNS:
+                    return duplicate, None
+                counts = self._patterns[pattern] = [0, 0, 0]
+            counts[0] += 1
+            if duplicate:
+                counts[1] += 1
+                counts[2] += size
+            if (pattern not in self.traps and counts[0] >= self.min_pages
+                    and counts[1] >= self.duplicate_ratio * counts[0]):
+                self.traps.add(pattern)
+                return duplicate, pattern
+        return duplicate, None
+
+    def prune(self, url):
+        """Check if a URL belongs to a trap pattern, counting it as a page saved"""
+        if not self.traps:
+            return False
+        pattern = url_pattern(url)
+        if pattern not in self.traps:
+            return False
+        with self._lock:
+            _, duplicates, duplicate_bytes = self._patterns[pattern]
+            self.pages_pruned += 1
+            # Estimated as the average size of the pattern's duplicates
+            self.bytes_pruned += duplicate_bytes / duplicates
+        return True
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'near_duplicates': self.duplicates,
+                'near_duplicate_bytes': self.duplicate_bytes,
+                'trap_patterns': len(self.traps),
+                'pages_pruned': self.pages_pruned,
+                'bytes_pruned': int(self.bytes_pruned)
+            }
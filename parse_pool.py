@@ -0,0 +1,138 @@
+"""
+Process-Pool Parsing Module
+"""
+
+import time
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from extractor import extract_page, find_emails
+from near_dup import simhash
+from url_filter import UrlFilter
+from config import PARSE_QUEUE_PER_WORKER
+
+# Link filter of parse_page calls without one; replaced in each worker by ParsePool
+_url_filter = UrlFilter()
+
+
+def _init_worker(url_filter):
+    """Install the pool's link filter in a worker process, so it is pickled once per worker"""
+    global _url_filter
+    _url_filter = url_filter
+
+
+def parse_page(content, encoding, backend, url, want_links, same_domain_url=None,
+               want_anchors=False, want_simhash=False, timings=None, url_filter=None):
+    """
+    Parse one fetched page into (emails, links, error, anchors, simhash, rejected).
+
+    links are already resolved and filtered, so only the compact result
+    has to travel back when this runs in a worker process. With
+    want_anchors, anchors maps links to the text of the <a> tag that
+    pointed to them; otherwise it is empty. With want_simhash, simhash
+    is the page's near_dup.simhash fingerprint; otherwise it is None.
+    Links go through ``url_filter`` (a url_filter.UrlFilter, by default
+    the worker's), and rejected counts the hrefs each filter dropped.
+    With a ``timings`` dict, the seconds spent in each step are stored
+    in it (see extract_page, plus 'filter_links' and 'simhash').
+    """
+    fingerprint = None
+    if want_simhash:
+        start = time.perf_counter()
+        fingerprint = simhash(content)
+        if timings is not None:
+            timings['simhash'] = time.perf_counter() - start
+
+    raw_anchors = {} if want_links and want_anchors else None
+    try:
+        emails, hrefs = extract_page(content, encoding, backend, want_links, timings, raw_anchors)
+    except Exception as e:
+        return (find_emails(content, encoding), [], f"Error extracting links from {url}: {str(e)}", {},
+                fingerprint, {})
+
+    links = []
+    anchors = {}
+    rejected = {}
+    if want_links:
+        start = time.perf_counter()
+        parsed = urlsplit(url)
+        base_url = f"{parsed.scheme}://{parsed.netloc}"
+        accepted = (url_filter or _url_filter).filter(hrefs, base_url, url, same_domain_url, rejected)
+        for href, text in (raw_anchors or {}).items():
+            link = accepted.get(href) if text else None
+            if link is not None and link not in anchors:
+                anchors[link] = text
+        links = list(set(accepted.values()))
+        if timings is not None:
+            timings['filter_links'] = time.perf_counter() - start
+    return emails, links, None, anchors, fingerprint, rejected
+
+
+def parse_page_timed(content, encoding, backend, url, want_links, same_domain_url=None,
+                     want_anchors=False, want_simhash=False):
+    """Parse a page in a worker process, returning (result, timings)"""
+    timings = {}
+    result = parse_page(content, encoding, backend, url, want_links, same_domain_url,
+                        want_anchors, want_simhash, timings)
+    return result, timings
+
+
+class ParsePool:
+    """
+    Pool of parser processes fed with raw response bytes.
+
+    Fetching stays on the I/O threads or event loop; parsing and email
+    extraction run in ``workers`` processes, outside the GIL. At most
+    ``max_pending`` pages are queued or being parsed at once: ``parse()``
+    blocks the caller when the pool is full, so memory stays bounded even
+    when fetching is faster than parsing.
+
+    With ``metrics`` (a metrics.CrawlMetrics), the workers also time
+    their steps and the timings are recorded when each result arrives.
+    ``url_filter`` is sent to each worker once, when it starts.
+    """
+
+    def __init__(self, workers, backend='lxml', max_pending=None, metrics=None, url_filter=None):
+        self.workers = workers
+        self.backend = backend
+        self.max_pending = max_pending or workers * PARSE_QUEUE_PER_WORKER
+        self.metrics = metrics
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                            initargs=(url_filter or UrlFilter(),))
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def submit(self, content, encoding, url, want_links, same_domain_url=None, want_anchors=False,
+               want_simhash=False):
+        """Queue a page without waiting for a free slot, returning a Future"""
+        if self.metrics is None:
+            return self.executor.submit(parse_page, content, encoding, self.backend,
+                                        url, want_links, same_domain_url, want_anchors, want_simhash)
+
+        result = Future()
+        timed = self.executor.submit(parse_page_timed, content, encoding, self.backend,
+                                     url, want_links, same_domain_url, want_anchors, want_simhash)
+
+        def unpack(future):
+            try:
+                parsed, timings = future.result()
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            self.metrics.observe_many(timings)
+            result.set_result(parsed)
+
+        timed.add_done_callback(unpack)
+        return result
+
+    def parse(self, content, encoding, url, want_links, same_domain_url=None, want_anchors=False,
+              want_simhash=False):
+        """Parse a page in the pool, blocking while the pool is full"""
+        with self._slots:
+            future = self.submit(content, encoding, url, want_links, same_domain_url, want_anchors,
+                                 want_simhash)
+            return future.result()
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,109 @@
+"""
+Per-Host Politeness Module
+"""
+
+import math
+import time
+import threading
+import urllib.parse
+
+from utils import get_random_delay
+
+
+def get_host(url):
+    """Get the host (netloc) a URL is fetched from"""
+    return urllib.parse.urlparse(url).netloc.lower()
+
+
+class HostPoliteness:
+    """
+    Tracks the earliest time each host may be fetched again.
+
+    A fetch holds its host until it finishes, then pushes the host's next
+    slot back by a random delay from ``delay_range``, or by the host's
+    robots.txt Crawl-delay when that is longer, so the gap is kept between
+    the end of one request and the start of the next even when responses
+    are slow. With no delay at all, requests to a host may overlap. Hosts
+    are independent, so a crawl over many hosts is not slowed down by the
+    spacing of any single one.
+    """
+
+    def __init__(self, delay_range=(1, 3)):
+        self.delay_range = delay_range
+        self._next_fetch = {}  # host -> earliest allowed time (monotonic)
+        self._last_fetch = {}  # host -> time of the last fetch
+        self._crawl_delays = {}  # host -> robots.txt Crawl-delay
+        self._in_flight = {}  # host -> (delay to keep after its fetch, next slot before it)
+        self._lock = threading.Lock()
+
+    def _delay_for(self, host):
+        """Get the gap to keep after a fetch from a host"""
+        delay = get_random_delay(*self.delay_range)
+        crawl_delay = self._crawl_delays.get(host)
+        if crawl_delay is not None and crawl_delay > delay:
+            delay = crawl_delay
+        return delay
+
+    def next_fetch_time(self, host):
+        """Get the earliest monotonic time a host may be fetched"""
+        with self._lock:
+            return self._next_fetch.get(host, 0.0)
+
+    def mark_fetch(self, host, now=None):
+        """Record a fetch from a host starting, holding the host until finish_fetch() or cancel_fetch()"""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            delay = self._delay_for(host)
+            self._last_fetch[host] = now
+            if delay > 0:
+                self._in_flight[host] = (delay, self._next_fetch.get(host, 0.0))
+                self._next_fetch[host] = math.inf
+            else:
+                self._next_fetch[host] = now
+
+    def finish_fetch(self, host, now=None):
+        """Record a fetch from a host ending and schedule its next slot; False if the host was not held"""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            held = self._in_flight.pop(host, None)
+            if held is None:
+                return False
+            self._last_fetch[host] = now
+            self._next_fetch[host] = now + held[0]
+            return True
+
+    def cancel_fetch(self, host):
+        """Give a host back the slot taken by a fetch that was not made; False if it was not held"""
+        with self._lock:
+            held = self._in_flight.pop(host, None)
+            if held is None:
+                return False
+            self._next_fetch[host] = held[1]
+            return True
+
+    def set_crawl_delay(self, host, delay):
+        """Apply a robots.txt Crawl-delay to a host"""
+        if delay is None:
+            return
+        with self._lock:
+            if self._crawl_delays.get(host) == delay:
+                return
+            self._crawl_delays[host] = delay
+            held = self._in_flight.get(host)
+            if held is not None:
+                # Kept once the fetch in flight ends
+                self._in_flight[host] = (max(held[0], delay), held[1])
+                return
+            last_fetch = self._last_fetch.get(host)
+            if last_fetch is not None:
+                self._next_fetch[host] = max(self._next_fetch.get(host, 0.0), last_fetch + delay)
+
+    def get_stats(self):
+        """Get politeness counters"""
+        with self._lock:
+            return {
+                'hosts_seen': len(self._next_fetch),
+                'hosts_with_crawl_delay': len(self._crawl_delays)
+            }
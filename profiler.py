@@ -0,0 +1,60 @@
+"""
+Sampling Profiler Module
+"""
+
+import sys
+import threading
+from collections import Counter
+
+from config import PROFILE_INTERVAL
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread at a fixed interval.
+
+    Unlike cProfile nothing is hooked into function calls, so the crawl
+    runs at full speed and all worker threads are covered. Samples are
+    written in the collapsed-stack format (``frame;frame;frame count``)
+    read by flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            names.update((thread.ident, thread.name) for thread in threading.enumerate())
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                # Worker threads are merged by their name without the number
+                stack.append(names.get(thread_id, 'thread').split('-')[0].split(' ')[0])
+                self.samples[';'.join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def write(self, path):
+        """Write the collapsed stacks, most frequent first"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,97 @@
+"""
+Email Provenance Store Module
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping
+
+
+class ProvenanceStore(Mapping):
+    """
+    Compact mapping of email -> source URLs.
+
+    Each source page is stored once and referred to by an integer id;
+    each email keeps its source ids in an ``array('I')`` (4 bytes per
+    pair instead of a list slot per raw hit). With ``max_sources`` only
+    the first N sources of an email are kept, plus a count of all of them.
+    Reading ``store[email]`` expands the ids into a list of URLs on
+    demand, so exporters can treat the store as the ``email -> [urls]``
+    dict it replaces.
+
+    Each page is a source of an email at most once: a page recorded
+    again (fetched once more after ``--resume`` or a crash) is found in
+    the URL -> id table and only adds emails it was not recorded with. A
+    page past an email's cap is not counted again. Not thread-safe:
+    EmailScraper only updates it under its own lock.
+    """
+
+    def __init__(self, max_sources=None):
+        self.max_sources = max_sources or None
+        self._urls = []  # id -> url
+        self._ids = {}  # url -> id, None for pages no email keeps as a source
+        self._sources = {}  # email -> array of url ids
+        self._counts = {}  # email -> number of sources, only for emails past the cap
+        self.pairs = 0
+
+    def add_page(self, url, emails):
+        """Record the emails found on one page, ignoring repeats on the page and pairs recorded before"""
+        repeat = url in self._ids
+        url_id = self._ids.get(url)
+        for email in dict.fromkeys(emails):
+            ids = self._sources.get(email)
+            if ids is None:
+                ids = self._sources[email] = array('I')
+            elif repeat and ((url_id is not None and url_id in ids) or email in self._counts):
+                continue
+
+            self.pairs += 1
+            if self.max_sources is None or len(ids) < self.max_sources:
+                if url_id is None:
+                    # Only pages some email keeps as a source are stored
+                    url_id = len(self._urls)
+                    self._urls.append(url)
+                ids.append(url_id)
+            else:
+                self._counts[email] = self._counts.get(email, len(ids)) + 1
+        self._ids[url] = url_id
+
+    def count(self, email):
+        """Get the number of sources of an email, including dropped ones"""
+        if email in self._counts:
+            return self._counts[email]
+        ids = self._sources.get(email)
+        return len(ids) if ids is not None else 0
+
+    def __getitem__(self, email):
+        urls = self._urls
+        return [urls[url_id] for url_id in self._sources[email]]
+
+    def __iter__(self):
+        return iter(self._sources)
+
+    def __len__(self):
+        return len(self._sources)
+
+    def __contains__(self, email):
+        return email in self._sources
+
+    def to_dict(self):
+        """Expand the store into a plain email -> [urls] dict"""
+        return {email: self[email] for email in self._sources}
+
+    def memory_bytes(self):
+        """Estimate the memory used by the store"""
+        size = sys.getsizeof(self._urls) + sys.getsizeof(self._ids)
+        size += sum(sys.getsizeof(url) for url in self._ids)
+        size += sys.getsizeof(self._sources) + sys.getsizeof(self._counts)
+        size += sum(sys.getsizeof(ids) for ids in self._sources.values())
+        return size
+
+    def get_stats(self):
+        """Get store counters"""
+        return {
+            'source_pairs': self.pairs,
+            'source_urls': len(self._urls),
+            'source_memory_bytes': self.memory_bytes()
+        }
@@ -0,0 +1,175 @@
+"""
+Robots.txt Cache Module
+"""
+
+import time
+import random
+import threading
+import urllib.parse
+from collections import OrderedDict
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from config import (
+    USER_AGENTS, DEFAULT_TIMEOUT, ROBOTS_CACHE_TTL, ROBOTS_CACHE_SIZE, ROBOTS_ERROR_TTL
+)
+
+
+def robots_key(url):
+    """Get the cache key (scheme://netloc) for a URL"""
+    parsed = urllib.parse.urlparse(url)
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}"
+
+
+def default_robots_fetcher(robots_url):
+    """Download robots.txt and return (status_code, text)"""
+    response = requests.get(
+        robots_url,
+        headers={'User-Agent': random.choice(USER_AGENTS)},
+        timeout=DEFAULT_TIMEOUT,
+        allow_redirects=True
+    )
+    return response.status_code, response.text
+
+
+class RobotsEntry:
+    """Parsed robots.txt rules for a single host"""
+
+    def __init__(self, parser=None, allow_all=False, disallow_all=False, expires=0):
+        self.parser = parser
+        self.allow_all = allow_all
+        self.disallow_all = disallow_all
+        self.expires = expires
+
+    def can_fetch(self, url, user_agent='*'):
+        """Check if URL can be fetched according to these rules"""
+        if self.disallow_all:
+            return False
+        if self.allow_all or self.parser is None:
+            return True
+        return self.parser.can_fetch(user_agent, url)
+
+    def crawl_delay(self, user_agent='*'):
+        """Get the Crawl-delay for a user agent, or None if not set"""
+        if self.parser is None:
+            return None
+        try:
+            delay = self.parser.crawl_delay(user_agent)
+        except Exception:
+            return None
+        return float(delay) if delay is not None else None
+
+
+class RobotsCache:
+    """
+    Thread-safe robots.txt cache keyed by scheme+netloc.
+
+    Each host is downloaded at most once per TTL, even when many worker
+    threads ask for it at the same time: the first caller fetches, the
+    others wait for its result. Least recently used hosts are evicted
+    once ``max_hosts`` is reached.
+
+    Status handling follows RFC 9309: 2xx responses are parsed, any 4xx
+    means there are no restrictions, and 5xx means the whole host is
+    disallowed until the (shorter) error TTL expires. Network errors keep
+    the old behaviour of assuming the URL is allowed.
+    """
+
+    def __init__(self, fetcher=None, ttl=ROBOTS_CACHE_TTL, max_hosts=ROBOTS_CACHE_SIZE,
+                 error_ttl=ROBOTS_ERROR_TTL):
+        self.fetcher = fetcher or default_robots_fetcher
+        self.ttl = ttl
+        self.max_hosts = max_hosts
+        self.error_ttl = error_ttl
+
+        self._entries = OrderedDict()  # key -> RobotsEntry
+        self._inflight = {}  # key -> threading.Event
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _download(self, key):
+        """Fetch and parse robots.txt for a host key"""
+        now = time.time()
+        try:
+            status, text = self.fetcher(f"{key}/robots.txt")
+        except Exception:
+            return RobotsEntry(allow_all=True, expires=now + self.error_ttl)
+
+        if 200 <= status < 300:
+            parser = RobotFileParser()
+            parser.parse(text.splitlines())
+            return RobotsEntry(parser=parser, expires=now + self.ttl)
+        if 400 <= status < 500:
+            return RobotsEntry(allow_all=True, expires=now + self.ttl)
+        if status >= 500:
+            return RobotsEntry(disallow_all=True, expires=now + self.error_ttl)
+        return RobotsEntry(allow_all=True, expires=now + self.error_ttl)
+
+    def get(self, url):
+        """Get the RobotsEntry for the host of a URL, fetching it if needed"""
+        key = robots_key(url)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                self._inflight[key] = event
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            event.wait()
+            with self._lock:
+                entry = self._entries.get(key)
+            return entry if entry is not None else RobotsEntry(allow_all=True)
+
+        try:
+            entry = self._download(key)
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_hosts:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+        return entry
+
+    def peek(self, url):
+        """Get the cached, unexpired RobotsEntry for the host of a URL without fetching it, or None"""
+        with self._lock:
+            entry = self._entries.get(robots_key(url))
+        return entry if entry is not None and entry.expires > time.time() else None
+
+    def can_fetch(self, url, user_agent='*'):
+        """Check if URL can be fetched according to robots.txt"""
+        return self.get(url).can_fetch(url, user_agent)
+
+    def crawl_delay(self, url, user_agent='*'):
+        """Get the Crawl-delay of the host of a URL, or None if not set"""
+        return self.get(url).crawl_delay(user_agent)
+
+    def get_stats(self):
+        """Get cache hit/miss counters"""
+        with self._lock:
+            return {
+                'robots_cache_hits': self.hits,
+                'robots_cache_misses': self.misses,
+                'robots_cache_evictions': self.evictions,
+                'robots_cache_size': len(self._entries)
+            }
@@ -0,0 +1,93 @@
+"""
+Link Scoring Module
+"""
+
+import re
+from urllib.parse import urlparse
+
+from config import (
+    PRIORITIES, CONTACT_KEYWORDS, LOW_VALUE_KEYWORDS, PRIORITY_DEPTH_PENALTY,
+    PRIORITY_PARENT_BONUS, PRIORITY_PARENT_CAP
+)
+
+_WORD = re.compile(r'[a-z]+')
+
+
+class LinkScorer:
+    """
+    Base class for the priority of a discovered link.
+
+    ``score()`` gets the link, its depth, the text of the <a> tag that
+    pointed to it and the number of emails on the linking page; links
+    with higher scores are fetched first. URLs read back from disk or
+    given as seeds are scored without link text or parent yield.
+    Scorers that never look at link text set ``uses_anchors = False``,
+    so pages are parsed without collecting it.
+    """
+
+    name = 'base'
+    uses_anchors = False
+
+    def score(self, url, depth, anchor_text='', parent_emails=0):
+        raise NotImplementedError
+
+
+class ContactScorer(LinkScorer):
+    """
+    Scores contact-like pages first.
+
+    Words in the URL path and query and in the link text are matched by
+    prefix against CONTACT_KEYWORDS (``/contact-us``, ``/about``,
+    ``/impressum``) and LOW_VALUE_KEYWORDS (``/tag/``, ``?page=3``). The
+    best and the worst match count once each, plus a bonus for links
+    from pages that had emails and a penalty per level of depth.
+    """
+
+    name = 'contact'
+    uses_anchors = True
+
+    def __init__(self, keywords=None, low_value=None, depth_penalty=PRIORITY_DEPTH_PENALTY,
+                 parent_bonus=PRIORITY_PARENT_BONUS, parent_cap=PRIORITY_PARENT_CAP):
+        self.keywords = CONTACT_KEYWORDS if keywords is None else keywords
+        self.low_value = LOW_VALUE_KEYWORDS if low_value is None else low_value
+        self.depth_penalty = depth_penalty
+        self.parent_bonus = parent_bonus
+        self.parent_cap = parent_cap
+        self._cache = {}  # word -> score, words repeat across URLs
+
+    def _word_score(self, word):
+        score = self._cache.get(word)
+        if score is None:
+            score = max((value for keyword, value in self.keywords.items()
+                         if word.startswith(keyword)), default=0)
+            if not score:
+                score = min((value for keyword, value in self.low_value.items()
+                             if word.startswith(keyword)), default=0)
+            if len(self._cache) < 100000:
+                self._cache[word] = score
+        return score
+
+    def _text_score(self, text):
+        scores = [self._word_score(word) for word in _WORD.findall(text.lower())]
+        if not scores:
+            return 0
+        return max(0, max(scores)) + min(0, min(scores))
+
+    def score(self, url, depth, anchor_text='', parent_emails=0):
+        parsed = urlparse(url)
+        score = self._text_score(f"{parsed.path} {parsed.query}")
+        if anchor_text:
+            score += max(0, self._text_score(anchor_text))
+        score += self.parent_bonus * min(parent_emails, self.parent_cap)
+        return score - self.depth_penalty * depth
+
+
+def create_scorer(priority='bfs'):
+    """Create a link scorer by name; bfs (plain breadth-first order) has none"""
+    if priority is None or isinstance(priority, LinkScorer):
+        return priority
+    if priority == 'bfs':
+        return None
+    if priority == 'contact':
+        return ContactScorer()
+    raise ValueError(f"Unknown priority '{priority}', expected one of: {', '.join(PRIORITIES)}")
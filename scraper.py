@@ -3,28 +3,66 @@ Advanced Email Scraper Class
 """
 
 import requests
-import cloudscraper
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from collections import deque
 import time
-import random
-from urllib.parse import urljoin, urlparse
 from tqdm import tqdm
-from termcolor import colored
 import threading
+from itertools import groupby
+from collections import Counter
 
 from utils import (
-    get_random_user_agent, get_random_delay, extract_emails,
-    normalize_url, should_skip_url, is_same_domain, can_fetch,
+    get_random_user_agent, is_text_content_type, looks_binary,
     print_colored
 )
-from config import DEFAULT_TIMEOUT
+from robots import RobotsCache
+from sessions import SessionPool
+from frontier import Frontier, PriorityFrontier
+from politeness import HostPoliteness, get_host
+from seen import create_seen_store
+from scoring import create_scorer
+from canonical import UrlCanonicalizer
+from near_dup import NearDuplicateDetector
+from url_filter import UrlFilter, FILTERS
+from dns_cache import DnsCache, parse_server
+from provenance import ProvenanceStore
+from metrics import CrawlMetrics, TimedLock
+from profiler import SamplingProfiler
+from metrics_server import MetricsServer
+from seeds import Seed, SeedTracker
+from parse_pool import ParsePool, parse_page
+from crawl_store import CrawlStore, FAILED
+from http_cache import HttpCache, NOT_MODIFIED, get_validators, content_fingerprint
+from config import (
+    DEFAULT_TIMEOUT, DEFAULT_MAX_PAGE_BYTES, READ_CHUNK_SIZE, DEFAULT_CONCURRENCY,
+    ENGINES, SEEN_FP_RATE, PARSERS, HTTP_CACHE_MAX_BYTES, NEAR_DUP_DISTANCE
+)
+
+# Counters carried over when a crawl is resumed from its state file
+RESUMED_STATS = (
+    'pages_visited', 'pages_failed', 'bytes_downloaded', 'download_time',
+    'bytes_saved', 'time_saved', 'skipped_content_type', 'pages_truncated'
+)
+
+# Prefix of the url_variants entry of a URL first linked in a spelling unlike its host's
+VARIANT_MARK = '\0'
 
 class EmailScraper:
     def __init__(self, target_url, max_depth=3, max_threads=5, 
                  delay_range=(1, 3), use_cloudflare_bypass=False,
-                 respect_robots=True, same_domain_only=True):
+                 respect_robots=True, same_domain_only=True,
+                 engine='threads', concurrency=DEFAULT_CONCURRENCY,
+                 seen_store='exact', seen_fp_rate=SEEN_FP_RATE, parser='lxml',
+                 parse_workers=0, session_mode='shared', pool_size=None,
+                 pool_per_host=None, max_page_bytes=DEFAULT_MAX_PAGE_BYTES,
+                 state_file=None, http_cache=None, http_cache_size=HTTP_CACHE_MAX_BYTES,
+                 incremental=False, sinks=None, max_sources=None, seeds=None,
+                 profile=None, metrics_file=None, metrics_port=None, priority='bfs',
+                 max_pages=None, canonicalize=True, ignore_params=None, near_duplicates=False,
+                 near_dup_distance=NEAR_DUP_DISTANCE, include=None, exclude=None,
+                 allow_domains=None, deny_domains=None, dns_cache=False, dns_servers=None):
+        
+        # Batch mode: several seeds.Seed start URLs, each with its own budgets
+        self.seed_tracker = SeedTracker(seeds) if seeds else None
+        target_url = target_url or (seeds[0].url if seeds else None)
         
         self.target_url = target_url
         self.max_depth = max_depth
@@ -33,136 +71,654 @@ class EmailScraper:
         self.use_cloudflare_bypass = use_cloudflare_bypass
         self.respect_robots = respect_robots
         self.same_domain_only = same_domain_only
+        self.engine = engine
+        self.concurrency = concurrency
+        self.parser = parser
+        self.parse_workers = parse_workers
+        self.parse_pool = None  # started by scrape() when parse_workers > 0
+        self.pool_per_host = pool_per_host
+        self.max_page_bytes = max_page_bytes
+        self.scorer = create_scorer(priority)  # scoring.LinkScorer, None for breadth-first
+        self.want_anchors = self.scorer is not None and self.scorer.uses_anchors
+        self.max_pages = max_pages or None  # fetches allowed in this run, None for no limit
+        self.pages_started = 0
+        self.deferred_urls = set()  # taken from the frontier after the page budget ran out, not fetched
+        # Which links found on a page are followed (raises ValueError for a bad pattern)
+        self.url_filter = UrlFilter(include=include, exclude=exclude, allow_domains=allow_domains,
+                                    deny_domains=deny_domains)
         
-        # Initialize session
-        if use_cloudflare_bypass:
-            self.session = cloudscraper.create_scraper()
-        else:
-            self.session = requests.Session()
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of: {', '.join(ENGINES)}")
+        
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown parser '{parser}', expected one of: {', '.join(PARSERS)}")
+        
+        if incremental and not http_cache:
+            raise ValueError("Incremental recrawls need an HTTP cache file to store page fingerprints")
+        self.incremental = incremental
+        self.email_diff = None  # emails added/removed since the previous crawl, when incremental
+        self.sinks = list(sinks or [])  # exporter.ExportSink objects fed while crawling
+        self.profile = profile  # collapsed-stack file written by a sampling profiler
+        self.metrics_file = metrics_file  # JSON dump of stage timings and statistics
+        self.metrics = CrawlMetrics()  # per-stage timing histograms
+        self.metrics_port = metrics_port  # live /metrics endpoint while crawling (0 picks a port)
+        
+        if engine == 'async' and use_cloudflare_bypass:
+            print_colored("Cloudflare bypass is not supported by the async engine, using threads", 'yellow')
+            self.engine = 'threads'
+        
+        # Host addresses shared by every connection, with record TTLs (nameservers 'HOST[:PORT]')
+        self.dns = DnsCache([parse_server(server) for server in dns_servers] if dns_servers else None,
+                            metrics=self.metrics) if dns_cache else None
+        
+        # Initialize sessions, with connection pools sized for the thread count
+        self.sessions = SessionPool(
+            max_threads, session_mode, use_cloudflare_bypass,
+            pool_hosts=pool_size, pool_per_host=pool_per_host, dns=self.dns
+        )
+        
+        # Validators and results of earlier crawls, for conditional GETs
+        self.http_cache = HttpCache(http_cache, http_cache_size) if http_cache else None
+        
+        # Robots.txt rules, fetched once per host through our own session
+        self.robots_cache = RobotsCache(fetcher=self._fetch_robots)
         
         # Data storage
         self.emails = set()
-        self.email_sources = {}  # email -> [list of source URLs]
-        self.visited_urls = set()
+        self.email_sources = ProvenanceStore(max_sources)  # email -> source URLs, as interned ids
+        self.seen = create_seen_store(seen_store, fp_rate=seen_fp_rate)  # keys of queued or visited URLs
+        # Links are fetched in canonical form and deduplicated by canonical key
+        self.canonicalizer = UrlCanonicalizer(ignore_params or ()) if canonicalize else None
+        # Other spellings of queued URLs, so each one counts once as a saved fetch; a URL's
+        # first spelling is only kept when it is not written in its host's usual style
+        self.url_variants = create_seen_store(seen_store, fp_rate=seen_fp_rate) if canonicalize else None
+        self.host_styles = {}  # host of a key -> UrlCanonicalizer.style() of its first link
+        # Near-duplicate pages are not expanded, and URL patterns full of them are pruned
+        self.near_dups = NearDuplicateDetector(near_dup_distance) if near_duplicates else None
         self.failed_urls = set()
-        self.urls_queue = deque([(target_url, 0)])  # (url, depth)
+        self.host_pages = Counter()  # host -> pages fetched
+        self.host_failures = Counter()  # host -> failed requests
+        self.politeness = HostPoliteness(delay_range)
+        self.worker_stats = {}  # worker id -> busy/idle seconds and pages
+        
+        # Optional on-disk state, so an interrupted crawl can be resumed
+        self.store = CrawlStore(state_file) if state_file else None
+        self.urls_queue = self._create_frontier()  # (url, depth)
         
         # Statistics
         self.stats = {
             'pages_visited': 0,
             'pages_failed': 0,
             'emails_found': 0,
+            'robots_cache_hits': 0,
+            'robots_cache_misses': 0,
+            'worker_utilization': 0.0,
+            'worker_idle_time': 0.0,
+            'bytes_downloaded': 0,
+            'download_time': 0.0,
+            'bytes_saved': 0,
+            'time_saved': 0.0,
+            'skipped_content_type': 0,
+            'pages_truncated': 0,
+            'http_requests': 0,
+            'connections_new': 0,
+            'connections_reused': 0,
+            'seen_store': seen_store,
+            'seen_urls': 0,
+            'seen_duplicates': 0,
+            'seen_memory_bytes': 0,
+            'seen_variants': 0,
+            'fetches_saved': 0,
+            'near_duplicates': 0,
+            'near_duplicate_bytes': 0,
+            'trap_patterns': 0,
+            'pages_pruned': 0,
+            'bytes_pruned': 0,
+            **{f'links_rejected_{name}': 0 for name in FILTERS},
+            'dns_lookups': 0,
+            'dns_cache_hits': 0,
+            'dns_negative_hits': 0,
+            'dns_prefetches': 0,
+            'dns_failures': 0,
+            'dns_evictions': 0,
+            'dns_hosts': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'cache_hit_ratio': 0.0,
+            'cache_evictions': 0,
+            'cache_bytes': 0,
+            'pages_unchanged': 0,
+            'emails_added': 0,
+            'emails_removed': 0,
+            'source_pairs': 0,
+            'source_urls': 0,
+            'source_memory_bytes': 0,
+            'lock_acquisitions': 0,
+            'priority': self.scorer.name if self.scorer is not None else 'bfs',
+            'emails_per_page': 0.0,
             'start_time': None,
             'end_time': None
         }
         
-        # Thread lock for shared data
-        self.lock = threading.Lock()
+        # Thread lock for shared data, timing how long workers wait for it
+        self.lock = TimedLock(self.metrics)
         
         # Progress bar
         self.pbar = None
+        
+        if self.store is not None and self.store.get_config() is not None:
+            self._restore_state()
+        else:
+            self._queue_start_urls(seeds)
+        
+        if self.store is not None:
+            self.store.stats_provider = self._checkpoint_stats
+
+    def _create_frontier(self):
+        """Create the frontier the crawl workers take URLs from"""
+        if self.scorer is not None:
+            return PriorityFrontier(self.scorer, politeness=self.politeness, overflow=self.store)
+        return Frontier(politeness=self.politeness, overflow=self.store)
+
+    def _queue_start_urls(self, seeds=None):
+        """Queue the target URL, or every seed in batch mode, for a new crawl"""
+        start_urls = [seed.url for seed in seeds] if seeds else [self.target_url]
+        for url in start_urls:
+            self.seen.add(self._seen_key(url))
+        if self.store is not None:
+            self.store.save_config({
+                'target_url': self.target_url,
+                'max_depth': self.max_depth,
+                'same_domain_only': self.same_domain_only,
+                'seeds': [seed.to_list() for seed in seeds] if seeds else None
+            })
+            self.store.queue([(url, 0) for url in start_urls])
+        self.urls_queue.put_many((url, 0) for url in start_urls)
+
+    def _restore_state(self):
+        """Load the frontier, seen URLs, findings and counters of a saved crawl"""
+        config = self.store.get_config()
+        self.target_url = config['target_url']
+        self.max_depth = config['max_depth']
+        self.same_domain_only = config['same_domain_only']
+        if config.get('seeds'):
+            self.seed_tracker = SeedTracker([Seed(*seed) for seed in config['seeds']])
+        seed_urls = {seed.url for seed in self.seed_tracker.seeds} if self.seed_tracker else set()
+        
+        for url in self.store.iter_urls():
+            self.seen.add(self._seen_key(url))
+            if self.seed_tracker is not None and url not in seed_urls:
+                # Earlier URLs count against the page budgets again
+                self.seed_tracker.admit(url)
+        for url in self.store.iter_urls(FAILED):
+            self.failed_urls.add(url)
+        for url, findings in groupby(self.store.iter_findings(), key=lambda finding: finding[1]):
+            page_emails = [email for email, _ in findings]
+            self.emails.update(page_emails)
+            self.email_sources.add_page(url, page_emails)
+        
+        # Every unfinished URL (including those in flight when we stopped) is fetched again
+        pending = self.store.prepare_resume()
+        self.urls_queue.add_spilled(pending)
+        
+        saved = self.store.get_stats()
+        for key in RESUMED_STATS:
+            if key in saved:
+                self.stats[key] = saved[key]
+        self.stats['emails_found'] = len(self.emails)
+        
+        print_colored(f"Resuming crawl of {self.target_url}: {self.stats['pages_visited']} pages visited, "
+                      f"{pending} URLs queued, {len(self.emails)} emails", 'cyan')
+
+    def _checkpoint_stats(self):
+        """Get the counters saved with each checkpoint of the state file"""
+        with self.lock:
+            return {key: self.stats[key] for key in RESUMED_STATS}
+
+    def _finish_url(self, url, depth):
+        """Record in the state file that a URL will not be fetched again"""
+        # URLs left over by the page budget stay queued, for a later run
+        if self.store is not None and url not in self.deferred_urls:
+            self.store.finish(url)
+
+    def _record_findings(self, url, page_emails):
+        """Record the emails of a page in the state file"""
+        if self.store is not None:
+            self.store.add_findings(url, page_emails)
 
-    def _make_request(self, url):
-        """Make HTTP request with error handling"""
+    @property
+    def session(self):
+        """HTTP session for the calling thread"""
+        return self.sessions.get()
+
+    def _fetch_robots(self, robots_url):
+        """Download robots.txt for the robots cache"""
+        response = self.session.get(
+            robots_url,
+            headers={'User-Agent': get_random_user_agent()},
+            timeout=DEFAULT_TIMEOUT,
+            allow_redirects=True
+        )
+        return response.status_code, response.text
+
+    def _get_headers(self):
+        """Build request headers with a random user agent"""
+        return {
+            'User-Agent': get_random_user_agent(),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+        }
+
+    def _check_headers(self, url, content_type, content_length):
+        """Decide from response headers whether to read a body; returns False to skip"""
+        if not is_text_content_type(content_type):
+            self._record_skip(url, content_length, 'skipped_content_type')
+            return False
+        return True
+
+    def _record_skip(self, url, bytes_saved, reason):
+        """Count a page that was skipped or cut short before its body was fully read"""
+        with self.lock:
+            self.stats[reason] += 1
+            if bytes_saved:
+                self.stats['bytes_saved'] += bytes_saved
+                # Estimate time saved from the crawl's download rate so far
+                if self.stats['download_time'] > 0:
+                    rate = self.stats['bytes_downloaded'] / self.stats['download_time']
+                    self.stats['time_saved'] += bytes_saved / rate if rate else 0.0
+
+    def _record_download(self, size, elapsed):
+        """Count bytes read from response bodies"""
+        self.metrics.observe('download', elapsed)
+        with self.lock:
+            self.stats['bytes_downloaded'] += size
+            self.stats['download_time'] += elapsed
+
+    def _read_capped(self, url, chunks, content_length, encoding=None, wire_bytes=None):
+        """
+        Read body chunks up to max_page_bytes, returning the bytes or None if binary.
+        
+        wire_bytes, if given, returns how many bytes have come off the socket
+        so far; Content-Length counts those, not the decompressed chunks.
+        """
+        body = bytearray()
+        start = time.perf_counter()
+        truncated = False
+        read = wire_bytes or (lambda: len(body))
+        
+        for chunk in chunks:
+            if not body and looks_binary(chunk, encoding):
+                body += chunk
+                self._record_download(read(), time.perf_counter() - start)
+                self._record_skip(url, max(0, content_length - read()) if content_length else 0,
+                                  'skipped_content_type')
+                return None
+            body += chunk
+            if len(body) >= self.max_page_bytes:
+                truncated = True
+                break
+        
+        self._record_download(read(), time.perf_counter() - start)
+        if truncated:
+            saved = content_length - read() if content_length else 0
+            del body[self.max_page_bytes:]
+            self._record_skip(url, max(0, saved), 'pages_truncated')
+        return bytes(body)
+
+    def _cache_lookup(self, url, depth):
+        """Get the HTTP cache entry that can answer a request for a URL, or None"""
+        if self.http_cache is None:
+            return None
+        want_links, same_domain_url = self._parse_args(url, depth)
+        return self.http_cache.lookup(url, want_links, same_domain_url, self.url_filter.digest)
+
+    def _cache_revalidated(self, url, status_code, cached):
+        """Count a cacheable request, returning True if it was answered with 304"""
+        if self.http_cache is None:
+            return False
+        hit = cached is not None and status_code == 304
+        self.http_cache.record(hit)
+        if hit:
+            self.http_cache.touch(url)
+        return hit
+
+    def _fingerprint(self, content):
+        """Fingerprint a page body in incremental mode"""
+        return content_fingerprint(content) if self.incremental else None
+
+    def _unchanged(self, cached, fingerprint):
+        """Get the stored results of a page whose body is unchanged, or None to parse it"""
+        if fingerprint is None or cached is None or cached.fingerprint != fingerprint:
+            return None
+        with self.lock:
+            self.stats['pages_unchanged'] += 1
+        return cached.parsed()
+
+    def _make_request(self, url, cached=None):
+        """
+        Make HTTP request with error handling.
+        
+        Returns (body, encoding, validators), NOT_MODIFIED when the cached
+        entry is still valid, or None.
+        """
         try:
-            headers = {
-                'User-Agent': get_random_user_agent(),
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
+            headers = self._get_headers()
+            if cached is not None:
+                headers.update(cached.conditional_headers())
             
-            response = self.session.get(
-                url, 
-                headers=headers, 
-                timeout=DEFAULT_TIMEOUT,
-                allow_redirects=True
-            )
-            response.raise_for_status()
-            return response
+            # Until the response headers arrive: DNS, connect, TLS and server time
+            with self.metrics.time('request'):
+                response = self.session.get(
+                    url, 
+                    headers=headers, 
+                    timeout=DEFAULT_TIMEOUT,
+                    allow_redirects=True,
+                    stream=True
+                )
+            with response:
+                if self._cache_revalidated(url, response.status_code, cached):
+                    response.content  # consume the empty body so the connection is reused
+                    return NOT_MODIFIED
+                response.raise_for_status()
+                
+                content_length = response.headers.get('Content-Length')
+                content_length = int(content_length) if content_length and content_length.isdigit() else None
+                if not self._check_headers(url, response.headers.get('Content-Type'), content_length):
+                    return None
+                
+                body = self._read_capped(url, response.iter_content(chunk_size=READ_CHUNK_SIZE), content_length,
+                                         response.encoding, response.raw.tell)
+                if body is None:
+                    return None
+                return body, response.encoding, get_validators(response.headers)
             
         except requests.exceptions.RequestException as e:
-            with self.lock:
-                self.failed_urls.add(url)
-                self.stats['pages_failed'] += 1
+            self._mark_failed(url)
             return None
 
-    def _extract_links(self, html_content, base_url, current_url):
-        """Extract links from HTML content"""
-        links = set()
-        
-        try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            for tag in soup.find_all(['a', 'link']):
-                href = tag.get('href')
-                if href:
-                    normalized_url = normalize_url(href, base_url, current_url)
-                    if normalized_url and not should_skip_url(normalized_url):
-                        if not self.same_domain_only or is_same_domain(normalized_url, self.target_url):
-                            links.add(normalized_url)
-                            
-        except Exception as e:
-            print_colored(f"Error extracting links from {current_url}: {str(e)}", 'red')
-        
-        return links
+    def _seed_limits(self, url):
+        """Get the max depth and same-domain URL of the seed a URL belongs to"""
+        if self.seed_tracker is None:
+            return self.max_depth, self.target_url
+        seed = self.seed_tracker.seed_for(url)
+        return seed.max_depth, seed.url
 
-    def _process_url(self, url, depth):
-        """Process a single URL"""
-        if url in self.visited_urls or depth > self.max_depth:
-            return []
+    def _should_process(self, url, depth):
+        """Check depth and robots.txt before fetching a URL"""
+        max_depth, _ = self._seed_limits(url)
+        if depth > max_depth:
+            return False
         
-        # Check robots.txt if enabled
-        if self.respect_robots and not can_fetch(url):
-            print_colored(f"Skipping {url} (blocked by robots.txt)", 'yellow')
-            return []
+        # Queued before its URL pattern was found to be a crawler trap
+        if self.near_dups is not None and depth > 0 and self.near_dups.prune(url):
+            return False
         
-        # Add delay between requests
-        time.sleep(get_random_delay(*self.delay_range))
+        # Check robots.txt if enabled
+        if self.respect_robots:
+            # One cache lookup for both the rules and the Crawl-delay, so hits are counted once
+            with self.metrics.time('robots'):
+                rules = self.robots_cache.get(url)
+            if not rules.can_fetch(url):
+                print_colored(f"Skipping {url} (blocked by robots.txt)", 'yellow')
+                return False
+            self.politeness.set_crawl_delay(get_host(url), rules.crawl_delay())
         
-        # Make request
-        response = self._make_request(url)
-        if not response:
-            return []
+        if self.max_pages is not None:
+            with self.lock:
+                self.pages_started += 1
+                started = self.pages_started
+                if started > self.max_pages:
+                    self.deferred_urls.add(url)
+            if started > self.max_pages:
+                if started == self.max_pages + 1:
+                    # Queued URLs stay in the state file, if any, for a later run
+                    print_colored(f"Page budget of {self.max_pages} reached, stopping", 'yellow')
+                    self.urls_queue.close()
+                return False
         
+        return True
+
+    def _mark_failed(self, url):
+        """Record a URL whose request failed"""
+        with self.lock:
+            self.failed_urls.add(url)
+            self.stats['pages_failed'] += 1
+            self.host_failures[get_host(url)] += 1
+        if self.store is not None:
+            self.store.fail(url)
+        if self.seed_tracker is not None:
+            self.seed_tracker.record_failure(url)
+
+    def _parse_args(self, url, depth):
+        """Get the page-independent arguments of parse_page for a URL"""
+        max_depth, seed_url = self._seed_limits(url)
+        want_links = depth < max_depth
+        same_domain_url = seed_url if self.same_domain_only else None
+        return want_links, same_domain_url
+
+    def _parse_page(self, url, depth, content, encoding=None):
+        """Extract (emails, links, error) from a page, in the parse pool if there is one"""
+        want_links, same_domain_url = self._parse_args(url, depth)
+        with self.metrics.time('parse'):
+            if self.parse_pool is not None:
+                return self.parse_pool.parse(content, encoding, url, want_links, same_domain_url,
+                                             self.want_anchors, self.near_dups is not None)
+            timings = {}
+            parsed = parse_page(content, encoding, self.parser, url, want_links, same_domain_url,
+                                self.want_anchors, self.near_dups is not None, timings, self.url_filter)
+        self.metrics.observe_many(timings)
+        return parsed
+
+    def _handle_page(self, url, depth, content, encoding=None, parsed=None, validators=None,
+                     fingerprint=None):
+        """Record a fetched page (raw bytes), extract its emails and return new (link, depth, priority)"""
         with self.lock:
-            self.visited_urls.add(url)
             self.stats['pages_visited'] += 1
-            if self.pbar:
+            self.host_pages[get_host(url)] += 1
+            if self.pbar is not None:
                 self.pbar.set_description(f"Processing: {url[:50]}...")
                 self.pbar.update(1)
         
-        # Extract emails
-        page_emails = extract_emails(response.text)
+        if parsed is None:
+            parsed = self._parse_page(url, depth, content, encoding)
+        page_emails, links, error, anchors, page_simhash, rejected = parsed
+        if error:
+            print_colored(error, 'red')
+        elif (validators is not None or fingerprint) and self.http_cache is not None:
+            want_links, same_domain_url = self._parse_args(url, depth)
+            etag, last_modified = validators or (None, None)
+            self.http_cache.put(url, etag, last_modified, want_links, same_domain_url,
+                                page_emails, links, fingerprint, self.url_filter.digest)
+        
+        if rejected:
+            with self.lock:
+                for name, count in rejected.items():
+                    self.stats[f'links_rejected_{name}'] += count
+        
+        findings = []  # (email, first time found)
         if page_emails:
             with self.lock:
                 for email in page_emails:
+                    findings.append((email, email not in self.emails))
                     self.emails.add(email)
-                    if email not in self.email_sources:
-                        self.email_sources[email] = []
-                    self.email_sources[email].append(url)
-                    
+                self.email_sources.add_page(url, page_emails)
+                
                 self.stats['emails_found'] = len(self.emails)
                 print_colored(f"Found {len(page_emails)} emails on {url}", 'green')
+            self._record_findings(url, page_emails)
+            for sink in self.sinks:
+                for email, new in findings:
+                    sink.write(email, url, new)
+        
+        if self.seed_tracker is not None:
+            self.seed_tracker.record_page(url, page_emails)
+            self.seed_tracker.assign(url, links)
+        
+        if page_simhash is not None and self.near_dups is not None:
+            duplicate, trap = self.near_dups.check(url, page_simhash, len(content),
+                                                   any(new for _, new in findings))
+            if trap is not None:
+                print_colored(f"Crawler trap: skipping further URLs like {trap}", 'yellow')
+            if duplicate:
+                # Its links are (nearly) those of the page it duplicates
+                return []
+        
+        # Links for next depth level, scored while the page's link text and yield are known
+        if self.scorer is None:
+            return [(link, depth + 1, None) for link in links]
+        return [(link, depth + 1, self.scorer.score(link, depth + 1, anchors.get(link, ''), len(page_emails)))
+                for link in links]
+
+    def _seen_key(self, url):
+        """Get the key a URL is deduplicated by"""
+        return url if self.canonicalizer is None else self.canonicalizer.key(url)
+
+    def _host_spelling(self, key, parts, variant):
+        """Get a key (split into parts by canonicalizer.forms()) written in the style of the first link to its host"""
+        if parts is None:
+            return key
+        # The key's netloc names the host however the link spelled it
+        style = self.host_styles.get(parts[1])
+        if style is None:
+            style = self.host_styles.setdefault(parts[1], self.canonicalizer.style(variant))
+        return self.canonicalizer.spell(key, style, parts)
+
+    def _enqueue_links(self, new_links):
+        """Queue links that were never queued or visited before, in canonical form"""
+        fresh = []
+        priorities = []
+        saved = 0
+        for link, link_depth, priority in new_links:
+            variant = key = link
+            if self.canonicalizer is not None:
+                link, key, parts = self.canonicalizer.forms(variant)
+            if self.seen.add(key):
+                if self.canonicalizer is not None and variant != self._host_spelling(key, parts, variant):
+                    # Queued under an unusual spelling, so the host's usual spelling is new too
+                    self.url_variants.add(variant)
+                    self.url_variants.add(VARIANT_MARK + key)
+                if self.near_dups is not None and self.near_dups.prune(link):
+                    continue
+                if self.seed_tracker is None or self.seed_tracker.admit(link):
+                    fresh.append((link, link_depth))
+                    priorities.append(priority)
+            elif self.canonicalizer is not None and (VARIANT_MARK + key in self.url_variants or
+                                                     variant != self._host_spelling(key, parts, variant)):
+                # Every new spelling of a known URL would have been fetched once more
+                saved += self.url_variants.add(variant)
+        if saved:
+            with self.lock:
+                self.stats['fetches_saved'] += saved
+        if self.store is not None:
+            # Recorded before queueing, so a spilled URL is already in the state file
+            self.store.queue(fresh)
+        self.urls_queue.put_many(fresh, priorities if self.scorer is not None else None)
+        if self.dns is not None and fresh:
+            # Resolved while the links wait in the queue
+            self.dns.prefetch_urls(link for link, _ in fresh)
+
+    def _process_url(self, url, depth):
+        """Process a single URL"""
+        if not self._should_process(url, depth):
+            # Nothing was fetched, so the host's slot is given back
+            self.politeness.cancel_fetch(get_host(url))
+            return []
         
-        # Extract links for next depth level
-        new_links = []
-        if depth < self.max_depth:
-            base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
-            links = self._extract_links(response.text, base_url, url)
+        # No sleeping here: the frontier only hands out URLs whose host is ready
+        
+        # Make request, conditional when earlier results are cached
+        cached = self._cache_lookup(url, depth)
+        page = self._make_request(url, cached)
+        if page is None:
+            return []
+        if page is NOT_MODIFIED:
+            return self._handle_page(url, depth, None, parsed=cached.parsed())
+        
+        content, encoding, validators = page
+        fingerprint = self._fingerprint(content)
+        return self._handle_page(url, depth, content, encoding, self._unchanged(cached, fingerprint),
+                                 validators, fingerprint)
+
+    def _update_progress(self, queue_size=None):
+        """Refresh the progress bar counters"""
+        if self.pbar is not None:
+            self.pbar.set_postfix({
+                'Emails': len(self.emails),
+                'Queue': len(self.urls_queue) if queue_size is None else queue_size,
+                'Failed': len(self.failed_urls)
+            })
+
+    def _worker(self, worker_id):
+        """Pull URLs from the shared frontier until the crawl is finished"""
+        busy = idle = 0.0
+        pages = 0
+        
+        while True:
+            wait_start = time.perf_counter()
+            item = self.urls_queue.get()
+            work_start = time.perf_counter()
+            idle += work_start - wait_start
+            if item is None:
+                break
             
-            for link in links:
-                if link not in self.visited_urls:
-                    new_links.append((link, depth + 1))
+            url, depth = item
+            try:
+                self._enqueue_links(self._process_url(url, depth))
+            except Exception as e:
+                print_colored(f"Error processing URL: {str(e)}", 'red')
+            finally:
+                self._finish_url(url, depth)
+                self.urls_queue.task_done(url)
+                busy += time.perf_counter() - work_start
+                pages += 1
+                with self.lock:
+                    self._update_progress()
+        
+        with self.lock:
+            self.worker_stats[worker_id] = {'busy': busy, 'idle': idle, 'pages': pages}
+
+    def _run_threads(self):
+        """Crawl the frontier with worker threads that never wait on a batch"""
+        self.worker_stats = {}
+        workers = [
+            threading.Thread(target=self._worker, args=(i,), name=f'worker-{i}', daemon=True)
+            for i in range(self.max_threads)
+        ]
+        for worker in workers:
+            worker.start()
         
-        return new_links
+        try:
+            # Short waits keep the main thread responsive to Ctrl-C
+            while not self.urls_queue.wait(timeout=0.5):
+                pass
+        finally:
+            self.urls_queue.close()
+            for worker in workers:
+                worker.join()
+            self._update_worker_stats()
+
+    def _update_worker_stats(self):
+        """Summarize per-worker busy/idle time into stats"""
+        busy = sum(w['busy'] for w in self.worker_stats.values())
+        idle = sum(w['idle'] for w in self.worker_stats.values())
+        self.stats['worker_idle_time'] = idle
+        self.stats['worker_utilization'] = busy / (busy + idle) if busy + idle else 0.0
 
     def scrape(self):
         """Main scraping method"""
-        print_colored(f"Starting email scraping for: {self.target_url}", 'cyan', 'bold')
-        print_colored(f"Max depth: {self.max_depth}, Threads: {self.max_threads}", 'blue')
+        if self.seed_tracker is not None:
+            print_colored(f"Starting email scraping for {len(self.seed_tracker.seeds)} seeds", 'cyan', 'bold')
+        else:
+            print_colored(f"Starting email scraping for: {self.target_url}", 'cyan', 'bold')
+        if self.engine == 'async':
+            print_colored(f"Max depth: {self.max_depth}, Engine: async, Concurrency: {self.concurrency}", 'blue')
+        else:
+            print_colored(f"Max depth: {self.max_depth}, Threads: {self.max_threads}", 'blue')
+        if self.parse_workers > 0:
+            print_colored(f"Parse workers: {self.parse_workers} processes", 'blue')
         print_colored(f"Same domain only: {self.same_domain_only}", 'blue')
         print()
         
@@ -171,53 +727,122 @@ class EmailScraper:
         # Initialize progress bar
         self.pbar = tqdm(desc="Initializing...", unit="pages")
         
+        if self.parse_workers > 0:
+            self.parse_pool = ParsePool(self.parse_workers, self.parser, metrics=self.metrics,
+                                        url_filter=self.url_filter)
+        
+        for sink in self.sinks:
+            sink.open(self.target_url)
+        
+        metrics_server = None
+        if self.metrics_port is not None:
+            metrics_server = MetricsServer(self, self.metrics_port)
+            metrics_server.start()
+            print_colored(f"Metrics: {metrics_server.url}", 'blue')
+        
+        profiler = None
+        if self.profile:
+            profiler = SamplingProfiler()
+            profiler.start()
+        
         try:
-            with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-                while self.urls_queue:
-                    # Submit batch of URLs to thread pool
-                    futures = []
-                    batch_size = min(len(self.urls_queue), self.max_threads * 2)
-                    
-                    for _ in range(batch_size):
-                        if not self.urls_queue:
-                            break
-                        url, depth = self.urls_queue.popleft()
-                        future = executor.submit(self._process_url, url, depth)
-                        futures.append(future)
-                    
-                    # Process completed futures
-                    for future in as_completed(futures):
-                        try:
-                            new_links = future.result()
-                            for link, link_depth in new_links:
-                                if link not in self.visited_urls:
-                                    self.urls_queue.append((link, link_depth))
-                        except Exception as e:
-                            print_colored(f"Error processing URL: {str(e)}", 'red')
-                    
-                    # Update progress
-                    if self.pbar:
-                        self.pbar.set_postfix({
-                            'Emails': len(self.emails),
-                            'Queue': len(self.urls_queue),
-                            'Failed': len(self.failed_urls)
-                        })
+            if self.engine == 'async':
+                from async_engine import run_async
+                run_async(self)
+            else:
+                self._run_threads()
         
         except KeyboardInterrupt:
             print_colored("\nScraping interrupted by user!", 'yellow', 'bold')
         
         finally:
-            if self.pbar:
+            if profiler is not None:
+                profiler.stop()
+                profiler.write(self.profile)
+                print_colored(f"Profile: {profiler.sample_count} samples written to {self.profile}", 'blue')
+            if self.parse_pool is not None:
+                self.parse_pool.shutdown()
+                self.parse_pool = None
+            if self.pbar is not None:
                 self.pbar.close()
+            self._update_robots_stats()
+            self._update_connection_stats()
+            # Keep-alive connections are not left open until the scraper is garbage collected
+            self.sessions.close()
+            self._update_seen_stats()
+            self._update_cache_stats()
+            if self.near_dups is not None:
+                self.stats.update(self.near_dups.get_stats())
+            if self.dns is not None:
+                self.dns.close()
+                self.stats.update(self.dns.get_stats())
+            self.stats.update(self.email_sources.get_stats())
+            self.stats.update(self.metrics.get_stats())
+            self.stats['lock_acquisitions'] = self.lock.acquisitions
+            fetched = self.stats['pages_visited'] + self.stats['pages_failed']
+            self.stats['emails_per_page'] = len(self.emails) / fetched if fetched else 0.0
+            if self.incremental:
+                self._diff_emails()
             self.stats['end_time'] = time.time()
+            if self.store is not None:
+                self.store.checkpoint()
+                self.store.close()
+            if self.http_cache is not None:
+                self.http_cache.close()
+            for sink in self.sinks:
+                sink.close(self.get_results()['statistics'])
+            if self.metrics_file:
+                self.metrics.dump(self.metrics_file, self.get_results()['statistics'])
+            if metrics_server is not None:
+                metrics_server.stop()
         
         return self.get_results()
 
+    def _update_robots_stats(self):
+        """Copy robots cache counters into stats"""
+        cache_stats = self.robots_cache.get_stats()
+        self.stats['robots_cache_hits'] = cache_stats['robots_cache_hits']
+        self.stats['robots_cache_misses'] = cache_stats['robots_cache_misses']
+
+    def _update_connection_stats(self):
+        """Copy connection pool counters into stats"""
+        connection_stats = self.sessions.get_stats()
+        self.stats['http_requests'] = connection_stats['http_requests']
+        self.stats['connections_new'] = connection_stats['connections_new']
+        self.stats['connections_reused'] = connection_stats['connections_reused']
+
+    def _update_seen_stats(self):
+        """Copy seen store counters into stats, counting the memory of kept URL spellings too"""
+        self.stats.update(self.seen.get_stats())
+        if self.url_variants is not None:
+            self.stats['seen_variants'] = len(self.url_variants)
+            self.stats['seen_memory_bytes'] += self.url_variants.memory_bytes()
+
+    def _update_cache_stats(self):
+        """Copy HTTP cache counters into stats"""
+        if self.http_cache is not None:
+            self.stats.update(self.http_cache.get_stats())
+
+    def _diff_emails(self):
+        """Compare the emails with the previous finished crawl of the target"""
+        previous = self.http_cache.previous_emails(self.target_url)
+        if previous is not None:
+            self.email_diff = {
+                'added': sorted(self.emails - previous),
+                'removed': sorted(previous - self.emails)
+            }
+            self.stats['emails_added'] = len(self.email_diff['added'])
+            self.stats['emails_removed'] = len(self.email_diff['removed'])
+        
+        # An interrupted crawl would report every unvisited email as removed next time
+        if not len(self.urls_queue):
+            self.http_cache.save_emails(self.target_url, self.emails)
+
     def get_results(self):
         """Get scraping results"""
         duration = self.stats['end_time'] - self.stats['start_time'] if self.stats['end_time'] else 0
         
-        return {
+        results = {
             'emails': list(self.emails),
             'email_sources': self.email_sources,
             'statistics': {
@@ -227,6 +852,11 @@ class EmailScraper:
                 'failed_urls': len(self.failed_urls)
             }
         }
+        if self.email_diff is not None:
+            results['email_diff'] = self.email_diff
+        if self.seed_tracker is not None:
+            results['seeds'] = self.seed_tracker.get_results()
+        return results
 
     def print_summary(self):
         """Print scraping summary"""
@@ -235,10 +865,78 @@ class EmailScraper:
         print("\n" + "="*70)
         print_colored("SCRAPING SUMMARY", 'cyan', 'bold')
         print("="*70)
-        print_colored(f"Target URL: {self.target_url}", 'white')
+        if self.seed_tracker is not None:
+            seeds = self.seed_tracker.get_results()
+            print_colored(f"Seeds: {len(seeds)} "
+                          f"({sum(1 for seed in seeds.values() if seed['emails'])} with emails, "
+                          f"{sum(1 for seed in seeds.values() if seed['pages_over_budget'])} hit their page budget)", 'white')
+        else:
+            print_colored(f"Target URL: {self.target_url}", 'white')
         print_colored(f"Total emails found: {len(self.emails)}", 'green', 'bold')
         print_colored(f"Pages visited: {self.stats['pages_visited']}", 'blue')
         print_colored(f"Pages failed: {self.stats['pages_failed']}", 'red')
+        print_colored(f"Emails per page fetched: {self.stats['emails_per_page']:.2f} "
+                      f"({self.stats['priority']} order)", 'blue')
+        if self.respect_robots:
+            print_colored(f"Robots.txt cache: {self.stats['robots_cache_hits']} hits, "
+                          f"{self.stats['robots_cache_misses']} misses", 'blue')
+        print_colored(f"Downloaded: {self.stats['bytes_downloaded'] / 1024:.1f} KB, "
+                      f"saved ~{self.stats['bytes_saved'] / 1024:.1f} KB / ~{self.stats['time_saved']:.2f}s "
+                      f"({self.stats['skipped_content_type']} non-text skipped, "
+                      f"{self.stats['pages_truncated']} truncated)", 'blue')
+        print_colored(f"Connections: {self.stats['connections_new']} opened, "
+                      f"{self.stats['connections_reused']} reused for {self.stats['http_requests']} requests", 'blue')
+        print_colored(f"Seen URLs: {self.stats['seen_urls']} ({self.stats['seen_store']}, "
+                      f"{self.stats['seen_memory_bytes'] / 1024:.1f} KB), "
+                      f"duplicate links skipped: {self.stats['seen_duplicates']}", 'blue')
+        if self.canonicalizer is not None:
+            print_colored(f"Canonical URLs: {self.stats['fetches_saved']} fetches of duplicate URL "
+                          f"spellings saved ({self.stats['seen_variants']} spellings kept)", 'blue')
+        if self.near_dups is not None:
+            print_colored(f"Near-duplicates: {self.stats['near_duplicates']} pages "
+                          f"({self.stats['near_duplicate_bytes'] / 1024:.1f} KB) not expanded, "
+                          f"{self.stats['trap_patterns']} trap URL patterns learned, "
+                          f"{self.stats['pages_pruned']} pages / ~{self.stats['bytes_pruned'] / 1024:.1f} KB "
+                          f"pruned", 'blue')
+        if self.dns is not None:
+            print_colored(f"DNS cache: {self.stats['dns_cache_hits']} hits, {self.stats['dns_lookups']} lookups "
+                          f"({self.stats['dns_prefetches']} prefetched, {self.stats['dns_negative_hits']} "
+                          f"negative hits, {self.stats['dns_failures']} failed)", 'blue')
+        rejected = [f"{self.stats[f'links_rejected_{name}']} {name.replace('_', ' ')}" for name in FILTERS
+                    if self.stats[f'links_rejected_{name}']]
+        if rejected:
+            print_colored(f"Links rejected: {', '.join(rejected)}", 'blue')
+        print_colored(f"Email sources: {self.stats['source_pairs']} unique email/URL pairs over "
+                      f"{self.stats['source_urls']} URLs ({self.stats['source_memory_bytes'] / 1024:.1f} KB)", 'blue')
+        if self.http_cache is not None:
+            print_colored(f"HTTP cache: {self.stats['cache_hit_ratio']:.1%} hit ratio "
+                          f"({self.stats['cache_hits']} not modified, {self.stats['cache_misses']} downloaded, "
+                          f"{self.stats['cache_evictions']} evicted)", 'blue')
+        if self.incremental:
+            print_colored(f"Unchanged pages (not parsed): {self.stats['pages_unchanged']}", 'blue')
+            if self.email_diff is None:
+                print_colored("Email diff: no previous finished crawl of this target", 'blue')
+            else:
+                print_colored(f"Email diff: +{len(self.email_diff['added'])} added, "
+                              f"-{len(self.email_diff['removed'])} removed since the previous crawl", 'blue')
+                for email in self.email_diff['added']:
+                    print_colored(f"  + {email}", 'green')
+                for email in self.email_diff['removed']:
+                    print_colored(f"  - {email}", 'red')
+        if self.store is not None:
+            print_colored(f"State file: {self.store.path} ({self.store.checkpoints} checkpoints)", 'blue')
+        stages = self.metrics.summary()
+        if stages:
+            print_colored("Stage timings (count, total, p50 / p99):", 'blue')
+            for stage, timing in stages.items():
+                print_colored(f"  {stage:15s} {timing['count']:7d}  {timing['seconds']:8.2f}s  "
+                              f"{timing['p50_ms']:8.2f} / {timing['p99_ms']:.2f} ms", 'blue')
+            if 'lock_wait' in stages:
+                print_colored(f"  Lock contention: {stages['lock_wait']['count']} of "
+                              f"{self.stats['lock_acquisitions']} acquisitions waited", 'blue')
+        if self.worker_stats:
+            print_colored(f"Worker utilization: {self.stats['worker_utilization']:.1%} "
+                          f"(idle {self.stats['worker_idle_time']:.2f}s across {len(self.worker_stats)} workers)", 'blue')
         print_colored(f"Duration: {duration:.2f} seconds", 'yellow')
         print_colored(f"Average time per page: {duration/max(self.stats['pages_visited'], 1):.2f} seconds", 'yellow')
         print("="*70)
\ No newline at end of file
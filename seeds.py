@@ -0,0 +1,130 @@
+"""
+Multi-Seed Batch Crawling Module
+"""
+
+import threading
+
+from politeness import get_host
+
+
+class Seed:
+    """A start URL with its own depth and page budget"""
+
+    def __init__(self, url, max_depth, max_pages=None):
+        self.url = url
+        self.max_depth = max_depth
+        self.max_pages = max_pages or None
+
+    def to_list(self):
+        return [self.url, self.max_depth, self.max_pages]
+
+
+def load_seeds(path, max_depth, max_pages=None):
+    """
+    Read seeds from a text file, one URL per line.
+
+    A line may override the budgets after the URL, e.g.
+    ``https://example.com depth=2 pages=500``. Blank lines and lines
+    starting with '#' are ignored; URLs without a scheme get https://.
+    """
+    seeds = []
+    seen_urls = set()
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            parts = line.split()
+            if not parts or parts[0].startswith('#'):
+                continue
+
+            url = parts[0]
+            if not url.startswith(('http://', 'https://')):
+                url = 'https://' + url
+            seed = Seed(url, max_depth, max_pages)
+            for option in parts[1:]:
+                key, _, value = option.partition('=')
+                if key not in ('depth', 'pages') or not value.isdigit():
+                    raise ValueError(f"{path}:{line_number}: unknown seed option '{option}'")
+                if key == 'depth':
+                    seed.max_depth = int(value)
+                else:
+                    seed.max_pages = int(value) or None
+
+            if url not in seen_urls:
+                seen_urls.add(url)
+                seeds.append(seed)
+    return seeds
+
+
+class SeedTracker:
+    """
+    Maps URLs to the seed they were reached from and enforces its budgets.
+
+    Every host is owned by one seed: the seed's own host, or for external
+    links the seed of the page the host was first linked from. Page
+    budgets are applied when URLs are queued, so a large site stops
+    adding work once its budget is spent, while the frontier's per-host
+    round robin keeps the seeds that are still crawling served in turn.
+    """
+
+    def __init__(self, seeds):
+        self.seeds = list(seeds)
+        self._lock = threading.Lock()
+        self._host_seeds = {}
+        self._admitted = {}  # seed url -> URLs queued so far
+        self._results = {}  # seed url -> per-seed counters and emails
+        for seed in self.seeds:
+            self._host_seeds.setdefault(get_host(seed.url), seed)
+            self._admitted[seed.url] = 1
+            self._results[seed.url] = {
+                'pages_visited': 0,
+                'pages_failed': 0,
+                'pages_over_budget': 0,
+                'emails': set()
+            }
+
+    def seed_for(self, url):
+        """Get the seed that owns a URL's host"""
+        return self._host_seeds.get(get_host(url), self.seeds[0])
+
+    def assign(self, parent_url, links):
+        """Give hosts first seen in a page's links to that page's seed"""
+        seed = self.seed_for(parent_url)
+        with self._lock:
+            for link in links:
+                self._host_seeds.setdefault(get_host(link), seed)
+
+    def admit(self, url):
+        """Count a URL against its seed's page budget, returning False when it is spent"""
+        seed = self.seed_for(url)
+        with self._lock:
+            if seed.max_pages is not None and self._admitted[seed.url] >= seed.max_pages:
+                self._results[seed.url]['pages_over_budget'] += 1
+                return False
+            self._admitted[seed.url] += 1
+            return True
+
+    def record_page(self, url, emails):
+        """Count a visited page and its emails for its seed"""
+        with self._lock:
+            result = self._results[self.seed_for(url).url]
+            result['pages_visited'] += 1
+            result['emails'].update(emails)
+
+    def record_failure(self, url):
+        """Count a failed page for its seed"""
+        with self._lock:
+            self._results[self.seed_for(url).url]['pages_failed'] += 1
+
+    def get_results(self):
+        """Get per-seed results, in seed order"""
+        with self._lock:
+            return {
+                seed.url: {
+                    'max_depth': seed.max_depth,
+                    'max_pages': seed.max_pages,
+                    'pages_visited': self._results[seed.url]['pages_visited'],
+                    'pages_failed': self._results[seed.url]['pages_failed'],
+                    'pages_over_budget': self._results[seed.url]['pages_over_budget'],
+                    'emails': sorted(self._results[seed.url]['emails'])
+                }
+                for seed in self.seeds
+            }
@@ -0,0 +1,178 @@
+"""
+Seen-URL Store Module
+"""
+
+import sys
+import math
+import hashlib
+import threading
+
+from config import SEEN_STORES, SEEN_BLOOM_CAPACITY, SEEN_FP_RATE
+
+
+def url_digest(url, size=8):
+    """Hash a URL to a fixed-size digest"""
+    return hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=size).digest()
+
+
+class SeenStore:
+    """
+    Base class for the set of URLs already queued or visited.
+
+    ``add()`` is an atomic check-and-insert: it returns True only for the
+    first caller that adds a URL, so a link is queued at most once no
+    matter how many workers discover it at the same time.
+    """
+
+    name = 'base'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.duplicates = 0
+
+    def _contains(self, url):
+        raise NotImplementedError
+
+    def _insert(self, url):
+        raise NotImplementedError
+
+    def memory_bytes(self):
+        """Estimate the memory used by the store"""
+        raise NotImplementedError
+
+    def add(self, url):
+        """Add a URL, returning False if it was already seen"""
+        with self._lock:
+            if self._contains(url):
+                self.duplicates += 1
+                return False
+            self._insert(url)
+            self.count += 1
+            return True
+
+    def __contains__(self, url):
+        with self._lock:
+            return self._contains(url)
+
+    def __len__(self):
+        return self.count
+
+    def get_stats(self):
+        """Get store counters"""
+        return {
+            'seen_store': self.name,
+            'seen_urls': self.count,
+            'seen_duplicates': self.duplicates,
+            'seen_memory_bytes': self.memory_bytes()
+        }
+
+
+class ExactSeenSet(SeenStore):
+    """Exact store keeping every full URL string"""
+
+    name = 'exact'
+
+    def __init__(self):
+        super().__init__()
+        self._urls = set()
+
+    def _contains(self, url):
+        return url in self._urls
+
+    def _insert(self, url):
+        self._urls.add(url)
+
+    def memory_bytes(self):
+        with self._lock:
+            return sys.getsizeof(self._urls) + sum(sys.getsizeof(url) for url in self._urls)
+
+
+class FingerprintSeenSet(SeenStore):
+    """
+    Store keeping a 64-bit hash per URL instead of the string.
+
+    Two different URLs collide with probability of about n^2 / 2^65, so
+    even a crawl of millions of URLs is exact in practice.
+    """
+
+    name = 'fingerprint'
+
+    def __init__(self):
+        super().__init__()
+        self._fingerprints = set()
+
+    @staticmethod
+    def _fingerprint(url):
+        return int.from_bytes(url_digest(url, 8), 'little')
+
+    def _contains(self, url):
+        return self._fingerprint(url) in self._fingerprints
+
+    def _insert(self, url):
+        self._fingerprints.add(self._fingerprint(url))
+
+    def memory_bytes(self):
+        with self._lock:
+            # Large ints are 32 bytes each on 64-bit CPython
+            return sys.getsizeof(self._fingerprints) + 32 * len(self._fingerprints)
+
+
+class BloomSeenSet(SeenStore):
+    """
+    Bloom filter store with a fixed memory budget.
+
+    Sized for ``capacity`` URLs at ``fp_rate`` false positives. A false
+    positive makes the crawler skip a URL it has not seen; it never causes
+    a duplicate fetch.
+    """
+
+    name = 'bloom'
+
+    def __init__(self, capacity=SEEN_BLOOM_CAPACITY, fp_rate=SEEN_FP_RATE):
+        super().__init__()
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate must be between 0 and 1")
+        self.capacity = max(1, capacity)
+        self.fp_rate = fp_rate
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, url):
+        digest = url_digest(url, 16)
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _contains(self, url):
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(url))
+
+    def _insert(self, url):
+        bits = self._bits
+        for pos in self._positions(url):
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def memory_bytes(self):
+        return sys.getsizeof(self._bits)
+
+    def estimated_fp_rate(self):
+        """Estimate the current false-positive rate from the fill level"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats['seen_fp_rate'] = self.estimated_fp_rate()
+        return stats
+
+
+def create_seen_store(kind='exact', capacity=SEEN_BLOOM_CAPACITY, fp_rate=SEEN_FP_RATE):
+    """Create a seen-URL store by name"""
+    if kind == 'exact':
+        return ExactSeenSet()
+    if kind == 'fingerprint':
+        return FingerprintSeenSet()
+    if kind == 'bloom':
+        return BloomSeenSet(capacity, fp_rate)
+    raise ValueError(f"Unknown seen store '{kind}', expected one of: {', '.join(SEEN_STORES)}")
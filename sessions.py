@@ -0,0 +1,181 @@
+"""
+HTTP Session and Connection Pool Module
+"""
+
+import socket
+import threading
+
+import requests
+import cloudscraper
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+
+from config import DEFAULT_POOL_HOSTS, SESSION_MODES
+
+
+class ConnectionCounters:
+    """Thread-safe counters of HTTP requests and newly opened connections"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def add_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def add_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def get_stats(self):
+        """Get request, new and reused connection counts"""
+        with self._lock:
+            return {
+                'http_requests': self.requests,
+                'connections_new': self.new_connections,
+                'connections_reused': max(0, self.requests - self.new_connections)
+            }
+
+
+def _counting_pool_class(base, counters, dns=None):
+    """Make a urllib3 connection pool class that reports to counters and resolves hosts through dns"""
+
+    class CountingConnection(base.ConnectionCls):
+        def connect(self):
+            # Called for every TCP (and TLS) handshake, including reconnects
+            if counters is not None:
+                counters.add_connection()
+            return super().connect()
+
+        def _new_conn(self):
+            if dns is None:
+                return super()._new_conn()
+            host = self._dns_host
+            try:
+                addresses = dns.resolve(host)
+            except socket.gaierror as e:
+                raise NameResolutionError(self.host, self, e) from e
+            # Connect to each address in turn, raising the last error once all of them failed;
+            # TLS still checks the certificate against self.host
+            error = None
+            try:
+                for address in addresses:
+                    self._dns_host = address
+                    try:
+                        return super()._new_conn()
+                    except (ConnectTimeoutError, NewConnectionError) as e:
+                        error = e
+            finally:
+                self._dns_host = host
+            raise error
+
+    class CountingPool(base):
+        ConnectionCls = CountingConnection
+
+        def urlopen(self, *args, **kwargs):
+            if counters is not None:
+                counters.add_request()
+            return super().urlopen(*args, **kwargs)
+
+    CountingPool.__name__ = f"Counting{base.__name__}"
+    return CountingPool
+
+
+def configure_pools(session, pool_hosts, pool_per_host, counters=None, dns=None):
+    """
+    Resize the connection pools of every adapter mounted on a session.
+
+    The adapters are re-initialised in place rather than replaced, so
+    cloudscraper's TLS adapter keeps its cipher setup. ``pool_hosts`` is
+    the number of per-host pools kept alive, ``pool_per_host`` the number
+    of keep-alive connections kept for each host. New connections look
+    their host up in ``dns`` (a dns_cache.DnsCache), if given.
+    """
+    for adapter in session.adapters.values():
+        adapter._pool_connections = pool_hosts
+        adapter._pool_maxsize = pool_per_host
+        adapter._pool_block = False
+        adapter.init_poolmanager(pool_hosts, pool_per_host, block=False)
+        if counters is not None or dns is not None:
+            adapter.poolmanager.pool_classes_by_scheme = {
+                'http': _counting_pool_class(HTTPConnectionPool, counters, dns),
+                'https': _counting_pool_class(HTTPSConnectionPool, counters, dns),
+            }
+    return session
+
+
+def create_session(use_cloudflare_bypass=False, pool_hosts=DEFAULT_POOL_HOSTS,
+                   pool_per_host=10, counters=None, dns=None):
+    """Create a requests (or cloudscraper) session with sized connection pools"""
+    if use_cloudflare_bypass:
+        session = cloudscraper.create_scraper()
+    else:
+        session = requests.Session()
+    return configure_pools(session, pool_hosts, pool_per_host, counters, dns)
+
+
+class SessionPool:
+    """
+    Hands out HTTP sessions to crawl threads.
+
+    In ``shared`` mode every thread uses one session whose per-host pool
+    holds as many keep-alive connections as there are threads, so no
+    connection is thrown away while all threads hit the same host. In
+    ``per-thread`` mode each thread gets its own session (and cookie jar)
+    with a single connection per host, which avoids any contention on the
+    shared pool. With ``dns`` (a dns_cache.DnsCache), every session
+    resolves hosts through that one cache.
+    """
+
+    def __init__(self, threads, mode='shared', use_cloudflare_bypass=False,
+                 pool_hosts=None, pool_per_host=None, dns=None):
+        if mode not in SESSION_MODES:
+            raise ValueError(f"Unknown session mode '{mode}', expected one of: {', '.join(SESSION_MODES)}")
+
+        self.mode = mode
+        self.use_cloudflare_bypass = use_cloudflare_bypass
+        self.pool_hosts = pool_hosts or max(DEFAULT_POOL_HOSTS, threads)
+        if pool_per_host:
+            self.pool_per_host = pool_per_host
+        else:
+            self.pool_per_host = max(1, threads) if mode == 'shared' else 1
+        self.counters = ConnectionCounters()
+        self.dns = dns
+        self.sessions_created = 0
+
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+        self._shared = self._new_session() if mode == 'shared' else None
+
+    def _new_session(self):
+        session = create_session(self.use_cloudflare_bypass, self.pool_hosts,
+                                 self.pool_per_host, self.counters, self.dns)
+        with self._lock:
+            self._sessions.append(session)
+            self.sessions_created += 1
+        return session
+
+    def get(self):
+        """Get the session for the calling thread"""
+        if self._shared is not None:
+            return self._shared
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._new_session()
+        return session
+
+    def get_stats(self):
+        """Get connection reuse counters"""
+        stats = self.counters.get_stats()
+        stats['http_sessions'] = self.sessions_created
+        return stats
+
+    def close(self):
+        """Close every session and its connections"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
@@ -0,0 +1,97 @@
+"""
+URL canonicalization tests
+
+Run with: python -m pytest tests (or python -m unittest discover tests)
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from canonical import UrlCanonicalizer
+
+
+class CanonicalizeTest(unittest.TestCase):
+
+    def test_rewrites_that_keep_the_resource(self):
+        canonicalizer = UrlCanonicalizer()
+        self.assertEqual(canonicalizer.canonicalize('HTTP://Example.COM:80/a/./b/../c?b=2&a=1#top'),
+                         'http://example.com/a/c?a=1&b=2')
+        self.assertEqual(canonicalizer.canonicalize('https://example.com:8443/%7euser/%2f'),
+                         'https://example.com:8443/~user/%2F')
+        self.assertEqual(canonicalizer.canonicalize('https://example.com'), 'https://example.com/')
+
+    def test_tracking_params_are_dropped_and_session_ids_kept(self):
+        canonicalizer = UrlCanonicalizer()
+        self.assertEqual(canonicalizer.canonicalize('https://example.com/p?utm_source=x&id=3&fbclid=y'),
+                         'https://example.com/p?id=3')
+        self.assertEqual(canonicalizer.canonicalize('https://example.com/p?sid=42'),
+                         'https://example.com/p?sid=42')
+
+    def test_site_ignored_params_apply_to_that_host_only(self):
+        canonicalizer = UrlCanonicalizer(['example.com:sort', 'ref'])
+        self.assertEqual(canonicalizer.canonicalize('https://www.example.com/?sort=asc&ref=a&q=1'),
+                         'https://www.example.com/?q=1')
+        self.assertEqual(canonicalizer.canonicalize('https://other.org/?sort=asc&ref=a'),
+                         'https://other.org/?sort=asc')
+
+    def test_other_urls_are_returned_as_they_are(self):
+        canonicalizer = UrlCanonicalizer()
+        for url in ('mailto:a@example.com', 'ftp://example.com/x', 'http://[::1/'):
+            self.assertEqual(canonicalizer.canonicalize(url), url)
+
+
+class KeyTest(unittest.TestCase):
+
+    def test_twins_share_a_key(self):
+        canonicalizer = UrlCanonicalizer()
+        twins = ['https://www.example.com/about/', 'http://example.com/about',
+                 'http://EXAMPLE.com:80/about?jsessionid=1', 'https://example.com/about;jsessionid=0A1B']
+        self.assertEqual({canonicalizer.key(url) for url in twins}, {'http://example.com/about'})
+
+    def test_session_param_removal_keeps_query_order(self):
+        canonicalizer = UrlCanonicalizer()
+        self.assertEqual(canonicalizer.key('http://example.com/?b=2&PHPSESSID=x&a=1'),
+                         'http://example.com/?a=1&b=2')
+        self.assertEqual(canonicalizer.key('http://example.com/?ASPSESSIONIDQA=x&q=1'),
+                         'http://example.com/?q=1')
+
+    def test_folds_can_be_turned_off(self):
+        canonicalizer = UrlCanonicalizer(fold_scheme=False, fold_www=False, fold_trailing_slash=False)
+        self.assertEqual(canonicalizer.key('https://www.example.com/a/'), 'https://www.example.com/a/')
+        self.assertNotEqual(canonicalizer.key('https://example.com/a'), canonicalizer.key('http://example.com/a'))
+
+    def test_different_pages_keep_different_keys(self):
+        key = UrlCanonicalizer().key
+        self.assertNotEqual(key('http://example.com/a?id=1'), key('http://example.com/a?id=2'))
+        self.assertNotEqual(key('http://example.com:8080/'), key('http://example.com/'))
+        self.assertNotEqual(key('http://shop.example.com/'), key('http://example.com/'))
+
+
+class SpellTest(unittest.TestCase):
+
+    def test_spell_undoes_the_folds_of_key(self):
+        canonicalizer = UrlCanonicalizer()
+        for url in ('https://www.example.com/team/', 'http://example.com/team', 'https://example.com/',
+                    'http://www.example.com/a/b/?q=1'):
+            with self.subTest(url=url):
+                self.assertEqual(canonicalizer.spell(canonicalizer.key(url), canonicalizer.style(url)), url)
+
+    def test_style(self):
+        canonicalizer = UrlCanonicalizer()
+        self.assertEqual(canonicalizer.style('https://WWW.example.com/a/'), ('https', True, True))
+        self.assertEqual(canonicalizer.style('http://example.com/'), ('http', False, False))
+
+    def test_spell_in_the_style_of_another_url(self):
+        canonicalizer = UrlCanonicalizer()
+        style = canonicalizer.style('https://www.example.com/index/')
+        self.assertEqual(canonicalizer.spell('http://example.com/contact', style),
+                         'https://www.example.com/contact/')
+        self.assertEqual(canonicalizer.spell('mailto:a@example.com', style), 'mailto:a@example.com')
+
+
+if __name__ == '__main__':
+    unittest.main()
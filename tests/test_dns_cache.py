@@ -0,0 +1,95 @@
+"""
+DNS cache tests, against the stub DNS server of the benchmarks
+
+Run with: python -m pytest tests (or python -m unittest discover tests)
+"""
+
+import os
+import sys
+import time
+import socket
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from stub_dns import StubDnsServer
+from synthetic_site import SyntheticSite
+from dns_cache import TYPE_A, DnsCache, DnsError, build_query, parse_response, parse_server
+from sessions import create_session
+
+
+class DnsCacheTest(unittest.TestCase):
+
+    def start_server(self, **options):
+        server = StubDnsServer({'www.example.test': '127.0.0.2', 'cdn.example.test': '127.0.0.3'},
+                               {'static.example.test': 'cdn.example.test'}, **options)
+        server.start()
+        self.addCleanup(server.stop)
+        cache = DnsCache([parse_server(server.server)], prefetch_threads=0, timeout=1, hosts_file=None)
+        return server, cache
+
+    def expires_in(self, cache, host):
+        return cache._entries[host].expires - time.monotonic()
+
+    def test_answer_is_cached_for_its_ttl(self):
+        server, cache = self.start_server(ttl=1)
+        self.assertEqual(cache.resolve('www.example.test'), ('127.0.0.2',))
+        self.assertEqual(cache.resolve('WWW.example.test.'), ('127.0.0.2',))
+        queries = server.queries['www.example.test']
+        self.assertEqual(cache.hits, 1)
+
+        time.sleep(1.1)
+        self.assertEqual(cache.resolve('www.example.test'), ('127.0.0.2',))
+        self.assertGreater(server.queries['www.example.test'], queries)
+        self.assertEqual(cache.lookups, 2)
+
+    def test_nonexistent_name_is_cached_for_the_negative_ttl(self):
+        server, cache = self.start_server(negative_ttl=30)
+        for _ in range(2):
+            with self.assertRaises(socket.gaierror) as raised:
+                cache.resolve('missing.example.test')
+            self.assertEqual(raised.exception.errno, socket.EAI_NONAME)
+        self.assertEqual(server.queries['missing.example.test'], 1)
+        self.assertEqual(cache.negative_hits, 1)
+        self.assertAlmostEqual(self.expires_in(cache, 'missing.example.test'), 30, delta=2)
+
+    def test_cname_chain_uses_its_lowest_ttl(self):
+        server, cache = self.start_server(ttl=300, cname_ttl=20)
+        self.assertEqual(cache.resolve('static.example.test'), ('127.0.0.3',))
+        self.assertAlmostEqual(self.expires_in(cache, 'static.example.test'), 20, delta=2)
+        self.assertEqual(cache.resolve('cdn.example.test'), ('127.0.0.3',))
+        self.assertAlmostEqual(self.expires_in(cache, 'cdn.example.test'), 300, delta=2)
+
+    def test_reply_to_another_question_is_rejected(self):
+        server, _ = self.start_server()
+        reply = server.answer(build_query(7, 'www.example.test', TYPE_A))
+        self.assertEqual(parse_response(reply, 7, 'www.example.test', TYPE_A).addresses, ('127.0.0.2',))
+        with self.assertRaises(DnsError):
+            parse_response(reply, 7, 'cdn.example.test', TYPE_A)
+
+
+class DnsConnectTest(unittest.TestCase):
+
+    def test_connection_falls_through_to_the_next_address(self):
+        site = SyntheticSite(pages=5)
+        site.start()
+        self.addCleanup(site.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        hosts_file = os.path.join(directory.name, 'hosts')
+        with open(hosts_file, 'w') as f:
+            # Nothing listens on 127.0.0.2, so its connection is refused
+            f.write('127.0.0.2 site.example.test\n127.0.0.1 site.example.test\n')
+
+        cache = DnsCache([], prefetch_threads=0, hosts_file=hosts_file)
+        session = create_session(dns=cache)
+        self.addCleanup(session.close)
+        response = session.get(site.start_url.replace('127.0.0.1', 'site.example.test'), timeout=5)
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Email extractor tests: the fast scan must find exactly what utils.extract_emails finds
+
+The corpus in tests/corpus holds one page per encoding, named
+page.<encoding>.html, with addresses next to non-ASCII text.
+
+Run with: python -m pytest tests (or python -m unittest discover tests)
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from bench_extract import TRICKY_SNIPPETS, build_corpus
+from utils import extract_emails
+from extractor import EmailExtractor, extract_page, find_emails, sniff_encoding
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+def read_corpus():
+    """Get (encoding, bytes) of every corpus page"""
+    pages = []
+    for name in sorted(os.listdir(CORPUS)):
+        with open(os.path.join(CORPUS, name), 'rb') as f:
+            pages.append((name[len('page.'):-len('.html')], f.read()))
+    return pages
+
+
+class EmailExtractorTest(unittest.TestCase):
+
+    def test_corpus_covers_multibyte_encodings(self):
+        encodings = {encoding for encoding, _ in read_corpus()}
+        self.assertTrue({'latin-1', 'cp1252', 'utf-16', 'shift_jis', 'utf-8'} <= encodings)
+
+    def test_bytes_match_extract_emails(self):
+        for encoding, data in read_corpus():
+            with self.subTest(encoding=encoding):
+                expected = extract_emails(data.decode(sniff_encoding(data, encoding), 'replace'))
+                self.assertTrue(expected)
+                self.assertEqual(find_emails(data, encoding), expected)
+
+    def test_text_matches_extract_emails(self):
+        extractor = EmailExtractor()
+        for encoding, data in read_corpus():
+            with self.subTest(encoding=encoding):
+                text = data.decode(encoding)
+                self.assertEqual(extractor.extract(text), extract_emails(text))
+
+    def test_mislabelled_charset_matches_extract_emails(self):
+        # Servers often declare latin-1 for cp1252 pages, and utf-8 for anything
+        for encoding, data in read_corpus():
+            for declared in ('latin-1', 'utf-8'):
+                with self.subTest(encoding=encoding, declared=declared):
+                    expected = extract_emails(data.decode(sniff_encoding(data, declared), 'replace'))
+                    self.assertEqual(find_emails(data, declared), expected)
+
+    def test_utf16_is_found_from_its_bom(self):
+        data = dict(read_corpus())['utf-16']
+        self.assertEqual(find_emails(data), extract_emails(data.decode('utf-16')))
+
+    def test_generated_pages_match_extract_emails(self):
+        for text in build_corpus(pages=20, page_size=5000, email_density=0.05) + TRICKY_SNIPPETS:
+            for encoding in ('utf-8', 'utf-16', 'shift_jis'):
+                data = text.encode(encoding, 'replace')
+                expected = extract_emails(data.decode(encoding, 'replace'))
+                self.assertEqual(find_emails(data, encoding), expected)
+
+    def test_page_emails_include_every_text_email(self):
+        for encoding, data in read_corpus():
+            for backend in ('lxml', 'tokenizer', 'bs4'):
+                with self.subTest(encoding=encoding, backend=backend):
+                    emails, _ = extract_page(data, encoding, backend)
+                    self.assertEqual(emails[:len(find_emails(data, encoding))], find_emails(data, encoding))
+
+
+if __name__ == '__main__':
+    unittest.main()
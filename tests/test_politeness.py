@@ -0,0 +1,57 @@
+"""
+Per-host politeness tests
+
+Run with: python -m pytest tests (or python -m unittest discover tests)
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from frontier import Frontier
+from politeness import HostPoliteness
+
+
+class HostPolitenessTest(unittest.TestCase):
+
+    def test_host_is_held_until_its_fetch_finishes(self):
+        politeness = HostPoliteness(delay_range=(2, 2))
+        frontier = Frontier([('http://a.test/1', 0), ('http://a.test/2', 0), ('http://b.test/1', 0)],
+                            politeness=politeness)
+        self.assertEqual(frontier.poll()[0], ('http://a.test/1', 0))
+        self.assertEqual(frontier.poll()[0], ('http://b.test/1', 0))
+        # a.test has a request in flight, however long it takes
+        self.assertEqual(frontier.poll(), (None, None))
+
+        frontier.task_done('http://a.test/1')
+        item, wait = frontier.poll()
+        self.assertIsNone(item)
+        self.assertAlmostEqual(wait, 2, delta=0.5)
+
+    def test_rejected_url_gives_its_slot_back(self):
+        politeness = HostPoliteness(delay_range=(2, 2))
+        frontier = Frontier([('http://a.test/1', 0), ('http://a.test/2', 0)], politeness=politeness)
+        url, _ = frontier.poll()[0]
+        politeness.cancel_fetch('a.test')
+        frontier.task_done(url)
+        self.assertEqual(frontier.poll()[0], ('http://a.test/2', 0))
+
+    def test_crawl_delay_applies_to_the_fetch_in_flight(self):
+        politeness = HostPoliteness(delay_range=(1, 1))
+        politeness.mark_fetch('a.test', now=100.0)
+        politeness.set_crawl_delay('a.test', 5)
+        politeness.finish_fetch('a.test', now=103.0)
+        self.assertEqual(politeness.next_fetch_time('a.test'), 108.0)
+
+    def test_no_delay_lets_requests_overlap(self):
+        politeness = HostPoliteness(delay_range=(0, 0))
+        politeness.mark_fetch('a.test', now=100.0)
+        self.assertEqual(politeness.next_fetch_time('a.test'), 100.0)
+        self.assertFalse(politeness.finish_fetch('a.test'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Resumable crawl tests, against a local synthetic site
+
+Run with: python -m pytest tests (or python -m unittest discover tests)
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from synthetic_site import SyntheticSite
+from crawl_store import DONE
+from scraper import EmailScraper
+
+OPTIONS = {'max_depth': 4, 'max_threads': 1, 'delay_range': (0, 0), 'respect_robots': False}
+
+
+class PageBudgetResumeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.site = SyntheticSite(pages=200, fanout=3, page_size=2000)
+        cls.start_url = cls.site.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.site.stop()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.state_file = os.path.join(directory.name, 'crawl.db')
+
+    def done_urls(self):
+        conn = sqlite3.connect(self.state_file)
+        try:
+            return [url for url, in conn.execute('SELECT url FROM urls WHERE state = ?', (DONE,))]
+        finally:
+            conn.close()
+
+    def test_budget_leaves_unfetched_urls_queued(self):
+        results = EmailScraper(self.start_url, state_file=self.state_file, max_pages=10, **OPTIONS).scrape()
+        self.assertEqual(results['statistics']['pages_visited'], 10)
+        # The URL taken from the frontier once the budget ran out was not fetched
+        self.assertEqual(len(self.done_urls()), 10)
+
+    def test_resumed_crawl_matches_full_crawl(self):
+        full = EmailScraper(self.start_url, **OPTIONS).scrape()
+        EmailScraper(self.start_url, state_file=self.state_file, max_pages=10, **OPTIONS).scrape()
+        resumed = EmailScraper(self.start_url, state_file=self.state_file, **OPTIONS).scrape()
+        self.assertEqual(resumed['statistics']['pages_visited'], full['statistics']['pages_visited'])
+        self.assertEqual(set(resumed['emails']), set(full['emails']))
+
+
+if __name__ == '__main__':
+    unittest.main()
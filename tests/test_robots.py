@@ -0,0 +1,123 @@
+"""
+robots.txt cache tests, with a fake fetcher instead of the network
+
+Run with: python -m pytest tests (or python -m unittest discover tests)
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from robots import RobotsCache
+
+RULES = "User-agent: *\nDisallow: /private\nCrawl-delay: 4\n"
+
+
+class FakeFetcher:
+    """Answers robots.txt requests from a {robots URL: (status, text)} table and counts them"""
+
+    def __init__(self, responses=None, default=(200, RULES), delay=0.0):
+        self.responses = responses or {}
+        self.default = default
+        self.delay = delay
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, robots_url):
+        with self._lock:
+            self.calls[robots_url] += 1
+        if self.delay:
+            time.sleep(self.delay)
+        response = self.responses.get(robots_url, self.default)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class RobotsCacheTest(unittest.TestCase):
+
+    def test_rules_and_crawl_delay(self):
+        cache = RobotsCache(fetcher=FakeFetcher())
+        self.assertFalse(cache.can_fetch('https://example.com/private/a'))
+        self.assertTrue(cache.can_fetch('https://example.com/public'))
+        self.assertEqual(cache.crawl_delay('https://example.com/'), 4.0)
+        self.assertEqual((cache.misses, cache.hits), (1, 2))
+
+    def test_status_handling(self):
+        fetcher = FakeFetcher({
+            'https://gone.test/robots.txt': (404, ''),
+            'https://down.test/robots.txt': (503, ''),
+            'https://broken.test/robots.txt': OSError('connection reset'),
+        })
+        cache = RobotsCache(fetcher=fetcher)
+        self.assertTrue(cache.can_fetch('https://gone.test/private'))
+        self.assertFalse(cache.can_fetch('https://down.test/anything'))
+        self.assertTrue(cache.can_fetch('https://broken.test/private'))
+
+    def test_entries_expire_after_their_ttl(self):
+        fetcher = FakeFetcher({'https://down.test/robots.txt': (500, '')})
+        cache = RobotsCache(fetcher=fetcher, ttl=0.6, error_ttl=0.2)
+        cache.get('https://example.com/a')
+        cache.get('https://down.test/a')
+        cache.get('https://example.com/b')
+        self.assertEqual(fetcher.calls['https://example.com/robots.txt'], 1)
+        self.assertIsNotNone(cache.peek('https://down.test/'))
+
+        time.sleep(0.3)
+        # 5xx answers are kept for the shorter error TTL
+        self.assertIsNone(cache.peek('https://down.test/'))
+        self.assertIsNotNone(cache.peek('https://example.com/'))
+        time.sleep(0.35)
+        cache.get('https://example.com/c')
+        self.assertEqual(fetcher.calls['https://example.com/robots.txt'], 2)
+
+    def test_least_recently_used_host_is_evicted(self):
+        fetcher = FakeFetcher()
+        cache = RobotsCache(fetcher=fetcher, max_hosts=2)
+        cache.get('https://a.test/')
+        cache.get('https://b.test/')
+        cache.get('https://a.test/')
+        cache.get('https://c.test/')
+        self.assertEqual(cache.evictions, 1)
+        self.assertIsNotNone(cache.peek('https://a.test/'))
+        self.assertIsNone(cache.peek('https://b.test/'))
+        self.assertEqual(cache.get_stats()['robots_cache_size'], 2)
+
+    def test_keys_are_scheme_and_netloc(self):
+        fetcher = FakeFetcher()
+        cache = RobotsCache(fetcher=fetcher)
+        cache.get('https://Example.com/a')
+        cache.get('https://example.com/b')
+        cache.get('http://example.com/c')
+        cache.get('https://example.com:8443/d')
+        self.assertEqual(len(fetcher.calls), 3)
+
+    def test_concurrent_callers_share_one_download(self):
+        fetcher = FakeFetcher(delay=0.2)
+        cache = RobotsCache(fetcher=fetcher)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.can_fetch('https://example.com/private')))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(fetcher.calls['https://example.com/robots.txt'], 1)
+        self.assertEqual(results, [False] * 8)
+        self.assertEqual((cache.misses, cache.hits), (1, 7))
+
+    def test_peek_does_not_fetch_or_count(self):
+        fetcher = FakeFetcher()
+        cache = RobotsCache(fetcher=fetcher)
+        self.assertIsNone(cache.peek('https://example.com/'))
+        self.assertEqual((len(fetcher.calls), cache.hits, cache.misses), (0, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
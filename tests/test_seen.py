@@ -0,0 +1,90 @@
+"""
+Seen-URL store tests
+
+Run with: python -m pytest tests (or python -m unittest discover tests)
+"""
+
+import os
+import sys
+import math
+import threading
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import SEEN_STORES
+from seen import BloomSeenSet, create_seen_store
+
+
+def urls(count, prefix='https://example.com/page/'):
+    return [f"{prefix}{index}?q={index * 7}" for index in range(count)]
+
+
+class SeenStoreTest(unittest.TestCase):
+
+    def test_add_is_true_once_per_url(self):
+        for kind in SEEN_STORES:
+            with self.subTest(kind=kind):
+                store = create_seen_store(kind, capacity=1000)
+                self.assertTrue(store.add('https://example.com/a'))
+                self.assertFalse(store.add('https://example.com/a'))
+                self.assertTrue(store.add('https://example.com/b'))
+                self.assertIn('https://example.com/a', store)
+                self.assertEqual((len(store), store.duplicates), (2, 1))
+                self.assertEqual(store.get_stats()['seen_store'], kind)
+
+    def test_concurrent_adds_let_one_caller_win(self):
+        for kind in SEEN_STORES:
+            with self.subTest(kind=kind):
+                store = create_seen_store(kind, capacity=1000)
+                wins = []
+                threads = [threading.Thread(target=lambda: wins.extend(filter(store.add, urls(500))))
+                           for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                self.assertEqual(sorted(wins), sorted(urls(500)))
+
+    def test_fingerprints_do_not_collide(self):
+        # About n^2 / 2^65 expected collisions: 1e-9 for 200k URLs
+        store = create_seen_store('fingerprint')
+        self.assertTrue(all(store.add(url) for url in urls(200000)))
+        self.assertEqual(store.duplicates, 0)
+
+    def test_unknown_store_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            create_seen_store('radix')
+
+
+class BloomSeenSetTest(unittest.TestCase):
+
+    def test_sized_for_capacity_and_rate(self):
+        store = BloomSeenSet(capacity=10000, fp_rate=0.01)
+        self.assertAlmostEqual(store.num_bits / 10000, -math.log(0.01) / math.log(2) ** 2, places=2)
+        self.assertEqual(store.num_hashes, 7)
+        with self.assertRaises(ValueError):
+            BloomSeenSet(fp_rate=1)
+
+    def test_false_positive_rate_stays_near_target(self):
+        store = BloomSeenSet(capacity=10000, fp_rate=0.01)
+        for url in urls(10000):
+            store.add(url)
+        # No false negatives, ever
+        self.assertTrue(all(url in store for url in urls(10000)))
+
+        unseen = urls(20000, 'https://other.example.org/item/')
+        false_positives = sum(url in store for url in unseen) / len(unseen)
+        self.assertLess(false_positives, 0.02)
+        self.assertAlmostEqual(store.estimated_fp_rate(), 0.01, delta=0.002)
+
+    def test_false_positives_grow_past_capacity(self):
+        store = BloomSeenSet(capacity=1000, fp_rate=0.01)
+        for url in urls(4000):
+            store.add(url)
+        self.assertGreater(store.estimated_fp_rate(), 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Link filter tests
+
+Run with: python -m pytest tests (or python -m unittest discover tests)
+"""
+
+import os
+import sys
+import pickle
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from url_filter import FILTERS, UrlFilter, compile_patterns, matches_domain
+
+
+class RejectReasonTest(unittest.TestCase):
+
+    def test_each_filter_names_its_reason(self):
+        url_filter = UrlFilter(include=['/team'], exclude=['/tag/'], allow_domains=['example.com'],
+                               deny_domains=['cdn.example.com'])
+        same = 'example.com'
+        cases = {
+            'http://[::1/team': 'invalid',
+            'https://example.com/team/photo.JPG': 'extension',
+            'https://example.com/team/cv.pdf;v=2': 'extension',
+            'https://other.org/team': 'external',
+            'https://example.com/tag/team': 'excluded',
+            'https://example.com/about': 'not_included',
+            'https://example.com/team': None,
+        }
+        for link, reason in cases.items():
+            with self.subTest(link=link):
+                self.assertEqual(url_filter.reject_reason(link, same), reason)
+
+        # Without a same-domain rule, the domain lists decide
+        self.assertEqual(url_filter.reject_reason('https://img.cdn.example.com/team'), 'denied_domain')
+        self.assertEqual(url_filter.reject_reason('https://other.org/team'), 'not_allowed_domain')
+        self.assertIsNone(url_filter.reject_reason('https://user@shop.example.com.:8443/team'))
+
+    def test_first_rejecting_filter_counts(self):
+        url_filter = UrlFilter(exclude=['.'], deny_domains=['example.com'])
+        self.assertEqual(url_filter.reject_reason('https://example.com/a.pdf'), 'extension')
+        self.assertEqual(url_filter.reject_reason('https://example.com/a'), 'denied_domain')
+        self.assertEqual(url_filter.reject_reason('https://other.org/a'), 'excluded')
+
+    def test_domain_lists_match_subdomains_only(self):
+        domains = frozenset(['example.com'])
+        self.assertTrue(matches_domain('example.com', domains))
+        self.assertTrue(matches_domain('a.b.example.com', domains))
+        self.assertFalse(matches_domain('badexample.com', domains))
+        self.assertFalse(matches_domain('example.com.evil.org', domains))
+        self.assertEqual(UrlFilter(deny_domains=['.Example.COM.']).deny_domains, {'example.com'})
+
+
+class FilterTest(unittest.TestCase):
+
+    def test_filter_resolves_hrefs_and_counts_rejects(self):
+        url_filter = UrlFilter(exclude=['/private'])
+        rejected = {}
+        accepted = url_filter.filter(
+            ['/a', 'b', '//example.com/c#top', 'mailto:x@example.com', '', '/d.png', '/private/e',
+             'https://other.org/f'],
+            'https://example.com', 'https://example.com/dir/page', 'https://example.com/', rejected)
+        self.assertEqual(accepted, {'/a': 'https://example.com/a', 'b': 'https://example.com/dir/b',
+                                    '//example.com/c#top': 'https://example.com/c'})
+        self.assertEqual(rejected, {'invalid': 2, 'extension': 1, 'excluded': 1, 'external': 1})
+        self.assertTrue(set(rejected) <= set(FILTERS))
+
+    def test_bad_patterns_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            UrlFilter(include=['('])
+        with self.assertRaises(ValueError):
+            compile_patterns(['(?P<n>a)', '(?P<n>b)'])
+
+    def test_digest_follows_settings(self):
+        self.assertEqual(UrlFilter(include=['/a']).digest, UrlFilter(include=['/a']).digest)
+        self.assertNotEqual(UrlFilter(include=['/a']).digest, UrlFilter(exclude=['/a']).digest)
+        self.assertNotEqual(UrlFilter().digest, UrlFilter(deny_domains=['example.com']).digest)
+
+    def test_filter_is_picklable(self):
+        url_filter = UrlFilter(include=['/team'], allow_domains=['example.com'])
+        copy = pickle.loads(pickle.dumps(url_filter))
+        self.assertEqual(copy.digest, url_filter.digest)
+        self.assertEqual(copy.reject_reason('https://example.com/about'), 'not_included')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Link Filter Module
+"""
+
+import re
+import json
+import hashlib
+from urllib.parse import urlsplit
+
+from config import SKIP_EXTENSIONS
+from utils import normalize_url, url_extension
+
+# Filters in the order they run; a link is counted by the first one that rejects it
+FILTERS = ('invalid', 'extension', 'external', 'denied_domain', 'not_allowed_domain',
+           'excluded', 'not_included')
+
+
+def compile_patterns(patterns):
+    """Compile regexes into one alternation, so a link is matched against all of them in one search"""
+    if not patterns:
+        return None
+    for pattern in patterns:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Invalid URL pattern '{pattern}': {e}") from None
+    try:
+        return re.compile('|'.join(f"(?:{pattern})" for pattern in patterns))
+    except re.error as e:
+        # e.g. the same group name used in two patterns
+        raise ValueError(f"URL patterns cannot be combined: {e}") from None
+
+
+def domain_set(domains):
+    """Normalize domain names ('.example.com', 'Example.com.') to a set of bare lower-case names"""
+    return frozenset(domain.strip().strip('.').lower() for domain in domains if domain.strip().strip('.'))
+
+
+def matches_domain(host, domains):
+    """Check if a host is one of the domains or a subdomain of one, walking its label suffixes"""
+    if host in domains:
+        return True
+    dot = host.find('.')
+    while dot >= 0:
+        if host[dot + 1:] in domains:
+            return True
+        dot = host.find('.', dot + 1)
+    return False
+
+
+class UrlFilter:
+    """
+    Decides which links found on a page are worth crawling.
+
+    Every href is resolved and split once, then goes through the FILTERS
+    pipeline: extension (a set lookup on the last path segment), same
+    domain (against a netloc split once per page), domain deny and allow
+    lists (``example.com`` also matches its subdomains), then the
+    ``exclude`` and ``include`` regexes, searched anywhere in the URL.
+    With ``include``, only links matching one of its patterns are kept.
+
+    The filter holds no per-crawl state and is picklable, so it is built
+    once and shipped to parse workers as it is. ``digest`` identifies its
+    settings, so links kept by another filter (e.g. in the HTTP cache of
+    an earlier crawl) are not reused.
+    """
+
+    def __init__(self, skip_extensions=SKIP_EXTENSIONS, include=(), exclude=(),
+                 allow_domains=(), deny_domains=()):
+        self.skip_extensions = frozenset(ext.lower() for ext in skip_extensions)
+        self.include = list(include or ())
+        self.exclude = list(exclude or ())
+        self.allow_domains = domain_set(allow_domains or ())
+        self.deny_domains = domain_set(deny_domains or ())
+        self._include = compile_patterns(self.include)
+        self._exclude = compile_patterns(self.exclude)
+        settings = [sorted(self.skip_extensions), self.include, self.exclude,
+                    sorted(self.allow_domains), sorted(self.deny_domains)]
+        self.digest = hashlib.blake2b(json.dumps(settings).encode('utf-8'), digest_size=8).hexdigest()
+
+    def reject_reason(self, link, same_netloc=None):
+        """Get the name of the filter that rejects an absolute link, or None to keep it"""
+        try:
+            parts = urlsplit(link)
+        except ValueError:
+            return 'invalid'
+        if url_extension(parts.path) in self.skip_extensions:
+            return 'extension'
+        netloc = parts.netloc.lower()
+        if same_netloc is not None and netloc != same_netloc:
+            return 'external'
+        if self.deny_domains or self.allow_domains:
+            host = netloc.rpartition('@')[2]
+            if not host.startswith('['):
+                host = host.partition(':')[0]
+            host = host.rstrip('.')
+            if self.deny_domains and matches_domain(host, self.deny_domains):
+                return 'denied_domain'
+            if self.allow_domains and not matches_domain(host, self.allow_domains):
+                return 'not_allowed_domain'
+        if self._exclude is not None and self._exclude.search(link):
+            return 'excluded'
+        if self._include is not None and not self._include.search(link):
+            return 'not_included'
+        return None
+
+    def filter(self, hrefs, base_url, current_url, same_domain_url=None, rejected=None):
+        """
+        Resolve raw hrefs and keep the crawlable ones, returning {href: link}.
+
+        Links must be on the netloc of same_domain_url, if given. With a
+        ``rejected`` dict, each rejected href is counted under the name of
+        the filter that rejected it.
+        """
+        same_netloc = urlsplit(same_domain_url).netloc.lower() if same_domain_url is not None else None
+        reject_reason = self.reject_reason
+        accepted = {}
+        for href in hrefs:
+            link = normalize_url(href, base_url, current_url)
+            reason = reject_reason(link, same_netloc) if link else 'invalid'
+            if reason is None:
+                accepted[href] = link
+            elif rejected is not None:
+                rejected[reason] = rejected.get(reason, 0) + 1
+        return accepted
+
+    def __repr__(self):
+        return (f"UrlFilter(include={self.include!r}, exclude={self.exclude!r}, "
+                f"allow_domains={sorted(self.allow_domains)!r}, deny_domains={sorted(self.deny_domains)!r})")
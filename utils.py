@@ -3,12 +3,19 @@ Utility functions for Email Scraper
 """
 
 import re
+import codecs
 import random
 import time
 import urllib.parse
-from urllib.robotparser import RobotFileParser
 from termcolor import colored
-from config import USER_AGENTS, SKIP_EXTENSIONS
+from config import USER_AGENTS, SKIP_EXTENSIONS, TEXT_CONTENT_TYPES, BINARY_SIGNATURES
+from robots import RobotsCache
+
+# Shared robots.txt cache used when no cache is passed to can_fetch
+_robots_cache = RobotsCache()
+
+# Byte order marks of text encodings whose bodies are full of NUL bytes
+_WIDE_BOMS = (codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
 
 def get_random_user_agent():
     """Get a random user agent from the list"""
@@ -53,16 +60,41 @@ def normalize_url(url, base_url, current_path):
     
     return url
 
+def url_extension(path):
+    """Get the lower-case extension of a URL path's last segment ('.pdf'), or '' if it has none"""
+    segment = path[path.rfind('/') + 1:].partition(';')[0]
+    dot = segment.rfind('.')
+    return segment[dot:].lower() if dot >= 0 else ''
+
 def should_skip_url(url):
     """Check if URL should be skipped based on extension"""
-    parsed = urllib.parse.urlparse(url)
-    path = parsed.path.lower()
-    
-    for ext in SKIP_EXTENSIONS:
-        if path.endswith(ext):
-            return True
-    
-    return False
+    return url_extension(urllib.parse.urlsplit(url).path) in SKIP_EXTENSIONS
+
+def is_text_content_type(content_type):
+    """Check if a Content-Type header may hold HTML or text (missing counts as text)"""
+    if not content_type:
+        return True
+    mime = content_type.split(';', 1)[0].strip().lower()
+    return not mime or mime.startswith('text/') or mime in TEXT_CONTENT_TYPES
+
+def looks_binary(data, encoding=None):
+    """
+    Sniff the first bytes of a body for binary file signatures or NUL bytes.
+
+    NUL bytes are normal in UTF-16 and UTF-32 text, so they are only a sign
+    of a binary file when the body has no such BOM or declared charset.
+    """
+    if data.startswith(BINARY_SIGNATURES):
+        return True
+    if data.startswith(_WIDE_BOMS):
+        return False
+    if encoding:
+        try:
+            if codecs.lookup(encoding).name.startswith(('utf-16', 'utf-32')):
+                return False
+        except LookupError:
+            pass
+    return b'\x00' in data[:512]
 
 def is_same_domain(url1, url2):
     """Check if two URLs belong to the same domain"""
@@ -70,17 +102,10 @@ def is_same_domain(url1, url2):
     domain2 = urllib.parse.urlparse(url2).netloc.lower()
     return domain1 == domain2
 
-def can_fetch(url, user_agent='*'):
-    """Check if URL can be fetched according to robots.txt"""
+def can_fetch(url, user_agent='*', cache=None):
+    """Check if URL can be fetched according to robots.txt (cached per host)"""
     try:
-        parsed = urllib.parse.urlparse(url)
-        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-        
-        rp = RobotFileParser()
-        rp.set_url(robots_url)
-        rp.read()
-        
-        return rp.can_fetch(user_agent, url)
+        return (cache or _robots_cache).can_fetch(url, user_agent)
     except:
         return True  # If robots.txt can't be read, assume it's allowed
 